@@ -0,0 +1,356 @@
+# benchmarks/caja.py
+
+"""
+Mide la latencia del ciclo de venta de Caja (escaneo -> fila -> total ->
+facturar -> guardar ticket) con inventarios e historiales sintéticos de distintos
+tamaños, sin mostrar ventanas.
+
+Cada escala usa una base de datos nueva en un directorio temporal: los datos
+reales de ./db no se tocan. Los resultados (p50/p95/p99 en milisegundos por
+etapa) se guardan en JSON para comparar versiones.
+
+Uso: python -m benchmarks.caja [--escalas 1000 10000 100000] [--tickets 50]
+                               [--lineas 5] [--salida resultados.json]
+                               [--comparar resultados_anteriores.json]
+"""
+
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from PyQt5.QtWidgets import QApplication
+
+from utils import almacenamiento
+from utils.indice_productos import obtener_indice
+from utils.persistencia import escribir_json
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados_caja.json")
+
+ETAPAS = ("sugerir", "sugerir_mixta", "escaneo", "agregar_fila", "actualizar_total", "facturar",
+          "guardar_ticket", "ciclo")
+PRESUPUESTO_SUGERIR_MS = 5  # p50 de las sugerencias que no se nota al escribir
+PROPORCION_NOMBRE = 0.3  # Líneas que se escriben por descripción en vez de escanear el código
+
+PALABRAS = (
+    "ARROZ", "FIDEOS", "ACEITE", "AZUCAR", "YERBA", "CAFE", "LECHE", "QUESO", "JAMON",
+    "GALLETAS", "HARINA", "SAL", "TOMATE", "ARVEJAS", "ATUN", "JABON", "SHAMPOO",
+    "DETERGENTE", "LAVANDINA", "PAPEL", "SERVILLETAS", "GASEOSA", "AGUA", "CERVEZA",
+    "VINO", "CHOCOLATE", "CARAMELOS", "MANTECA", "DULCE", "MERMELADA", "POLENTA",
+    "LENTEJAS", "PAN", "SALCHICHAS", "HUEVOS", "MAYONESA", "KETCHUP", "MOSTAZA",
+)
+MARCAS = ("LA SERENISIMA", "ARCOR", "MOLTO", "MAROLIO", "CAROYENSE", "ILOLAY", "DOVE",
+          "COLGATE", "ALA", "SKIP", "NATURA", "LEDESMA", "TARAGUI", "PLAYADITO")
+
+
+# ------------------ DATOS SINTÉTICOS ------------------
+
+def generar_productos(cantidad, rng):
+    """Genera productos con códigos EAN-13 únicos; uno de cada diez es pesable."""
+    productos = []
+    for i in range(cantidad):
+        es_pesable = i % 10 == 0
+        productos.append({
+            "codigo": f"779{i:010d}",
+            "descripcion": f"{rng.choice(PALABRAS)} {rng.choice(MARCAS)} {rng.randint(1, 999)}"
+                           f"{'KG' if es_pesable else 'G'}",
+            "es_pesable": es_pesable,
+            "cantidad": rng.randint(0, 200),
+            "costo": 0.0,
+            "precio": float(rng.randint(100, 20000)),
+            "fecha_ingreso": "01-01-2025",
+            "fecha_vencimiento": (datetime(2025, 1, 1) + timedelta(days=rng.randint(0, 2000))).strftime("%d-%m-%Y"),
+            "oferta": 0,
+        })
+    return productos
+
+
+def generar_tickets(cantidad, productos, rng, lineas=3):
+    """Genera un historial de tickets repartidos en el último año."""
+    tickets = []
+    hoy = datetime.now()
+    por_dia = {}
+    for _ in range(cantidad):
+        dia = (hoy - timedelta(days=rng.randint(1, 365))).strftime("%d-%m-%Y")
+        por_dia[dia] = por_dia.get(dia, 0) + 1
+        articulos = []
+        for producto in rng.sample(productos, min(lineas, len(productos))):
+            cantidad_linea = rng.randint(100, 1500) if producto["es_pesable"] else rng.randint(1, 5)
+            factor = cantidad_linea / 1000 if producto["es_pesable"] else cantidad_linea
+            articulos.append({
+                "codigo": producto["codigo"],
+                "descripcion": producto["descripcion"],
+                "cantidad": cantidad_linea,
+                "precio_unitario": producto["precio"],
+                "subtotal": round(factor * producto["precio"], 2),
+            })
+        monto = sum(a["subtotal"] for a in articulos)
+        tickets.append({
+            "dia": dia,
+            "cajero": "benchmark",
+            "articulos": articulos,
+            "monto": monto,
+            "numero_ticket": f"{dia}-{por_dia[dia]}",
+            "pagos": [{"metodo": "Efectivo", "monto": monto}],
+            "cambio": 0.0,
+            "num_session": "benchmark",
+        })
+    return tickets
+
+
+def preparar_base(directorio, productos, tickets):
+    """Apunta almacenamiento a una base nueva dentro de directorio y la llena."""
+    almacenamiento.cerrar_conexion()
+    almacenamiento.DB_DIR = os.path.join(directorio, "db")
+    almacenamiento.RUTA_DB = os.path.join(almacenamiento.DB_DIR, "miposqt.db")
+    os.makedirs(almacenamiento.DB_DIR, exist_ok=True)
+
+    # Caja lee la sesión de ./db/session.json
+    escribir_json(os.path.join(almacenamiento.DB_DIR, "session.json"), {
+        "logged_in": True, "current_user": "benchmark", "num_session": "benchmark"
+    })
+
+    almacenamiento.guardar_productos(productos)
+    with almacenamiento.transaccion():
+        for ticket in tickets:
+            almacenamiento.guardar_ticket(ticket)
+    obtener_indice().refrescar(forzar=True)
+
+
+# ------------------ MEDICIÓN ------------------
+
+def cronometrar(objeto, nombre, tiempos):
+    """Reemplaza objeto.nombre por una versión que anota cuánto tarda cada llamada."""
+    original = getattr(objeto, nombre)
+
+    def envoltura(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            tiempos.append(time.perf_counter() - inicio)
+
+    setattr(objeto, nombre, envoltura)
+
+
+def pagar_en_efectivo(dialogo):
+    """Reemplazo de FacturarDialog.exec_: paga el total en efectivo y confirma."""
+    dialogo.pago_input.setText(f"{dialogo.total:.2f}")
+    dialogo.seleccionar_metodo_pago("Efectivo")
+    dialogo.confirmar_factura()
+    return dialogo.result()
+
+
+def esperar_guardado(caja, limite=30):
+    app = QApplication.instance()
+    fin = time.perf_counter() + limite
+    while caja.guardando:
+        if time.perf_counter() > fin:
+            raise RuntimeError("El ticket no terminó de guardarse.")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def resumir(tiempos):
+    """Percentiles en milisegundos de una lista de duraciones en segundos."""
+    ms = sorted(t * 1000 for t in tiempos)
+    if not ms:
+        return None
+    if len(ms) == 1:
+        p50 = p95 = p99 = ms[0]
+    else:
+        cortes = statistics.quantiles(ms, n=100, method="inclusive")
+        p50, p95, p99 = cortes[49], cortes[94], cortes[98]
+    return {
+        "n": len(ms),
+        "p50": round(p50, 3),
+        "p95": round(p95, 3),
+        "p99": round(p99, 3),
+        "media": round(statistics.fmean(ms), 3),
+        "max": round(ms[-1], 3),
+    }
+
+
+def resuelve_por_nombre(caja, producto):
+    """Si la descripción lleva a un único producto (si no, Caja abriría la lista para elegir)."""
+    coincidencias = caja.motor.buscar(producto["descripcion"], limite=2)
+    return len(coincidencias) == 1 and coincidencias[0][0]["codigo"] == producto["codigo"]
+
+
+def medir_escala(escala, n_tickets, lineas, semilla):
+    """Arma una base de escala productos y tickets y reproduce n_tickets ventas."""
+    from ui.caja import Caja
+    from ui.facturar import FacturarDialog
+
+    rng = random.Random(semilla)
+    directorio = tempfile.mkdtemp(prefix=f"miposqt-bench-{escala}-")
+    cwd = os.getcwd()
+    try:
+        os.chdir(directorio)
+        inicio = time.perf_counter()
+        productos = generar_productos(escala, rng)
+        tickets = generar_tickets(escala, productos, rng)
+        preparar_base(directorio, productos, tickets)
+        preparacion = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        caja = Caja()
+        construccion = time.perf_counter() - inicio
+        caja.ejecutor.esperar()  # Ventas recientes para las sugerencias y el caché
+        QApplication.processEvents()
+        caja.cache.reiniciar_estadisticas()
+
+        # "escaneo" es la lectura completa e incluye a agregar_fila y actualizar_total
+        tiempos = {etapa: [] for etapa in ETAPAS}
+        cronometrar(caja, "buscar_producto", tiempos["escaneo"])
+        cronometrar(caja, "agregar_producto_a_tabla", tiempos["agregar_fila"])
+        cronometrar(caja, "actualizar_total", tiempos["actualizar_total"])
+        # El modelo del ticket avisa el cambio de total por señal: se conecta a la versión medida
+        caja.modelo.total_cambiado.disconnect()
+        caja.modelo.total_cambiado.connect(caja.actualizar_total)
+        envio = []  # Parte síncrona de guardar_ticket (arma el ticket y lo encola)
+        cronometrar(caja, "guardar_ticket", envio)
+
+        # Las consultas mixtas (parte del código y parte de una palabra) usan su
+        # propio generador, así el resto de la corrida no cambia respecto de las anteriores
+        rng_mixta = random.Random(semilla + 1)
+        # Una parte de las líneas se escribe por nombre, que es lo que pasa por el caché
+        rng_nombre = random.Random(semilla + 2)
+        exec_original = FacturarDialog.exec_
+        FacturarDialog.exec_ = pagar_en_efectivo
+        try:
+            for _ in range(n_tickets):
+                inicio_ciclo = time.perf_counter()
+                for producto in rng.sample(productos, lineas):
+                    # Lo que consulta la lista de sugerencias al hacer una pausa escribiendo
+                    palabra = rng.choice(producto["descripcion"].split())
+                    inicio = time.perf_counter()
+                    caja.sugerencias.sugerir(palabra[:rng.randint(2, 4)].lower())
+                    tiempos["sugerir"].append(time.perf_counter() - inicio)
+
+                    # Prefijo de código con palabra: el prefijo abarca miles de productos
+                    partes = [producto["codigo"][:rng_mixta.randint(2, 7)], palabra[:rng_mixta.randint(2, 4)].lower()]
+                    rng_mixta.shuffle(partes)
+                    inicio = time.perf_counter()
+                    caja.sugerencias.sugerir(" ".join(partes))
+                    tiempos["sugerir_mixta"].append(time.perf_counter() - inicio)
+
+                    if producto["es_pesable"]:
+                        lectura = f"{rng.randint(100, 1500)}*{producto['codigo']}"
+                    else:
+                        lectura = producto["codigo"]
+                        if rng_nombre.random() < PROPORCION_NOMBRE and resuelve_por_nombre(caja, producto):
+                            lectura = producto["descripcion"]
+                    caja.search_input.setText(lectura)
+                    caja.buscar_producto()
+
+                # abrir_facturacion termina llamando a guardar_ticket
+                inicio = time.perf_counter()
+                caja.abrir_facturacion()
+                inicio_guardado = time.perf_counter() - envio[-1]
+                tiempos["facturar"].append(inicio_guardado - inicio)
+
+                esperar_guardado(caja)
+                tiempos["guardar_ticket"].append(time.perf_counter() - inicio_guardado)
+                tiempos["ciclo"].append(time.perf_counter() - inicio_ciclo)
+        finally:
+            FacturarDialog.exec_ = exec_original
+            cache = caja.cache.estadisticas()
+            caja.deleteLater()
+    finally:
+        os.chdir(cwd)
+        almacenamiento.cerrar_conexion()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    return {
+        "productos": escala,
+        "tickets_historial": escala,
+        "tickets_medidos": n_tickets,
+        "lineas_por_ticket": lineas,
+        "preparacion_s": round(preparacion, 3),
+        "construccion_caja_ms": round(construccion * 1000, 3),
+        "etapas": {etapa: resumir(valores) for etapa, valores in tiempos.items()},
+        "cache_productos": cache,
+    }
+
+
+def version_actual():
+    """Commit de git del árbol medido, si está disponible."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, anterior):
+    """Imprime la variación de p50/p95 de cada etapa respecto de resultados anteriores."""
+    print(f"\nComparación con {anterior.get('version') or 'resultados anteriores'}:")
+    for escala, datos in actual["escalas"].items():
+        previos = anterior.get("escalas", {}).get(escala)
+        if not previos:
+            continue
+        print(f"  {escala} productos")
+        for etapa, valores in datos["etapas"].items():
+            previo = previos["etapas"].get(etapa)
+            if not valores or not previo:
+                continue
+            for p in ("p50", "p95"):
+                if previo[p]:
+                    cambio = (valores[p] - previo[p]) / previo[p] * 100
+                    print(f"    {etapa:<17} {p}: {previo[p]:>9.3f} -> {valores[p]:>9.3f} ms ({cambio:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia del ciclo de venta de Caja.")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Cantidades de productos (y de tickets de historial) a medir.")
+    parser.add_argument("--tickets", type=int, default=50, help="Ventas a reproducir por escala.")
+    parser.add_argument("--lineas", type=int, default=5, help="Lecturas del escáner por venta.")
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_RESULTADOS, help="Archivo JSON de resultados.")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar.")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841 (debe existir)
+
+    resultados = {
+        "version": version_actual(),
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "escalas": {},
+    }
+    for escala in args.escalas:
+        print(f"Midiendo {escala} productos...", flush=True)
+        datos = medir_escala(escala, args.tickets, args.lineas, args.semilla)
+        resultados["escalas"][str(escala)] = datos
+        for etapa, valores in datos["etapas"].items():
+            excede = etapa.startswith("sugerir") and valores["p50"] > PRESUPUESTO_SUGERIR_MS
+            print(f"  {etapa:<17} p50 {valores['p50']:>9.3f}  p95 {valores['p95']:>9.3f}  "
+                  f"p99 {valores['p99']:>9.3f} ms" + (f"  (más de {PRESUPUESTO_SUGERIR_MS} ms)" if excede else ""))
+        print(f"  caché de productos: {datos['cache_productos']}")
+
+    escribir_json(args.salida, resultados)
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as file:
+            comparar(resultados, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,16 @@
 import sys
 import json
 import os
+import sqlite3
+
+from utils import arranque  # Primero, para medir también el tiempo de importación
+
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QStackedWidget, QDialog,
     QInputDialog, QMessageBox, QShortcut, QLineEdit
 )
 from PyQt5.QtGui import QFont, QKeySequence
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 
 from ui.login import Login
 from ui.header import Header
@@ -19,6 +23,16 @@ from ui.inventario import Inventario
 from ui.clientes import Clientes
 from ui.informes import Informes
 from ui.balance import Balance
+from ui.tareas import obtener_ejecutor
+from ui.diario_ticket import borrar_diario
+from utils import almacenamiento
+from utils.persistencia import escribir_json, limpiar_temporales
+
+arranque.marcar("módulos importados")
+
+# Construir las páginas no visitadas en los momentos libres después de mostrar la ventana
+PRECARGAR_PAGINAS = True
+PRECARGA_DEMORA_MS = 1000
 
 
 def cargar_sesion():
@@ -43,21 +57,31 @@ def verificar_admin(password):
         return False
 
 
-def reiniciar_base_datos():
-    """Reinicia todos los archivos de la base de datos excepto usuarios.json y session.json."""
+def reiniciar_base_datos(caja=None):
+    """
+    Reinicia la base de datos, los archivos JSON excepto usuarios.json,
+    session.json y balanza.json, y el diario del ticket en curso. caja es la página de Caja si
+    ya se construyó (tiene el diario abierto).
+    """
     db_dir = "./db"
-    archivos_excluidos = {"usuarios.json", "session.json"}
+    # balanza.json es configuración (formato de las etiquetas de la balanza), no datos de ventas
+    archivos_excluidos = {"usuarios.json", "session.json", "balanza.json"}
     try:
+        obtener_ejecutor().esperar()  # Que no quede un ticket a medio guardar
+        almacenamiento.reiniciar()
+
+        # Vaciar también los JSON anteriores a la base de datos, que quedaron como respaldo
         for archivo in os.listdir(db_dir):
             if archivo not in archivos_excluidos and archivo.endswith(".json"):
-                ruta_archivo = os.path.join(db_dir, archivo)
-                with open(ruta_archivo, "w") as file:
-                    json.dump([], file, indent=4)
+                escribir_json(os.path.join(db_dir, archivo), [])
         
+        # El ticket en curso no se ofrece recuperar: era de antes del reinicio
+        if caja is not None:
+            caja.diario.cerrar()
+        borrar_diario()
+
         # Reiniciar session.json
-        session_path = os.path.join(db_dir, "session.json")
-        with open(session_path, "w") as session_file:
-            json.dump({"logged_in": False, "current_user": None}, session_file, indent=4)
+        escribir_json(os.path.join(db_dir, "session.json"), {"logged_in": False, "current_user": None})
 
         QMessageBox.information(None, "Éxito", "Base de datos reiniciada con éxito. La aplicación se cerrará ahora.")
         return True
@@ -66,6 +90,23 @@ def reiniciar_base_datos():
         return False
 
 
+def recuperar_datos():
+    """
+    Deja los datos en un estado consistente después de un cierre inesperado:
+    descarta escrituras de JSON interrumpidas y verifica la base de datos.
+    """
+    for ruta in limpiar_temporales("./db"):
+        print(f"Escritura interrumpida descartada: {ruta}")
+    try:
+        problemas = almacenamiento.verificar_integridad()
+    except sqlite3.Error as e:
+        problemas = [str(e)]
+    if problemas:
+        QMessageBox.critical(
+            None, "Error", "La base de datos tiene errores:\n" + "\n".join(problemas[:10])
+        )
+
+
 class MainSection(QWidget):
     def __init__(self):
         super().__init__()
@@ -82,23 +123,63 @@ class MainSection(QWidget):
         self.content = QStackedWidget()
         layout.addWidget(self.content, stretch=1)
 
-        # Crear páginas de contenido
-        self.page_caja = Caja()
-        self.page_inventario = Inventario()
-        self.page_clientes = Clientes()
-        self.page_informes = Informes()
-        self.page_balance = Balance()
-
-        self.content.addWidget(self.page_caja)
-        self.content.addWidget(self.page_inventario)
-        self.content.addWidget(self.page_clientes)
-        self.content.addWidget(self.page_informes)       
-        self.content.addWidget(self.page_balance)
+        # Las páginas se crean la primera vez que se visitan (ver pagina())
+        self.paginas = {}
 
         # Footer
         self.footer = Footer()
         layout.addWidget(self.footer)
 
+    PAGINAS = {
+        "Caja": Caja,
+        "Inventario": Inventario,
+        "Clientes": Clientes,
+        "Informes": Informes,
+        "Balance": Balance,
+    }
+
+    def pagina(self, nombre):
+        """Retorna la página, construyéndola (y cargando sus datos) la primera vez."""
+        pagina = self.paginas.get(nombre)
+        if pagina is None:
+            with arranque.medir(f"construir página {nombre}"):
+                pagina = self.PAGINAS[nombre]()
+            self.paginas[nombre] = pagina
+            self.content.addWidget(pagina)
+        return pagina
+
+    def precargar(self, pendientes=None):
+        """
+        Construye de a una las páginas que todavía no se visitaron, cediendo el
+        control a la interfaz entre página y página.
+        """
+        if pendientes is None:
+            pendientes = list(self.PAGINAS)
+        pendientes = [nombre for nombre in pendientes if nombre not in self.paginas]
+        if pendientes:
+            self.pagina(pendientes[0])
+            QTimer.singleShot(0, lambda: self.precargar(pendientes[1:]))
+
+    @property
+    def page_caja(self):
+        return self.pagina("Caja")
+
+    @property
+    def page_inventario(self):
+        return self.pagina("Inventario")
+
+    @property
+    def page_clientes(self):
+        return self.pagina("Clientes")
+
+    @property
+    def page_informes(self):
+        return self.pagina("Informes")
+
+    @property
+    def page_balance(self):
+        return self.pagina("Balance")
+
     def focus_on_current_page(self):
         """Activa el foco en la parte específica de la página activa."""
         current_page = self.content.currentWidget()
@@ -152,7 +233,7 @@ class MainWindow(QMainWindow):
             return
 
         if verificar_admin(admin_clave.strip()):
-            if reiniciar_base_datos():
+            if reiniciar_base_datos(self.main_section.paginas.get("Caja")):
                 self.close()  # Cierra la aplicación tras el reinicio
         else:
             QMessageBox.critical(self, "Error", "Clave incorrecta.")
@@ -160,7 +241,7 @@ class MainWindow(QMainWindow):
     def cambiar_pagina(self, pagina):
         """Cambia la página activa y realiza acciones específicas."""
         shortcuts = {
-            "Caja": {"F5": "Ingreso", "F6": "Gasto", "F10": "Facturar"},
+            "Caja": {"F5": "Ingreso", "F6": "Gasto", "F8": "En espera", "F9": "Recuperar", "F10": "Facturar"},
             "Inventario": {},
             "Clientes": {},
             "Informes": {},
@@ -172,11 +253,14 @@ class MainWindow(QMainWindow):
             if hasattr(self.main_section.page_caja, "cargar_inventario"):
                 self.main_section.page_caja.cargar_inventario()
         elif pagina == "Inventario":
+            # Si hubo ventas u otros cambios mientras estaba oculta, se recarga al mostrarse
             self.main_section.content.setCurrentWidget(self.main_section.page_inventario)
-            if hasattr(self.main_section.page_inventario, "load_data"):
-                self.main_section.page_inventario.load_data()
         elif pagina == "Clientes":
+            ya_creada = "Clientes" in self.main_section.paginas
             self.main_section.content.setCurrentWidget(self.main_section.page_clientes)
+            # Las ventas a crédito cambian las deudas mientras la página está oculta
+            if ya_creada:
+                self.main_section.page_clientes.load_clientes()
         elif pagina == "Informes":
             self.main_section.content.setCurrentWidget(self.main_section.page_informes)
         elif pagina == "Balance":
@@ -195,18 +279,41 @@ class MainWindow(QMainWindow):
 def main():
     app = QApplication(sys.argv)
 
+    mostrar_tiempos = "--tiempos" in sys.argv
+
+    # Recuperar los datos si la aplicación se cerró de forma inesperada
+    with arranque.medir("recuperar datos"):
+        recuperar_datos()
+
     # Verificar estado de la sesión
     session = cargar_sesion()
     if not session.get("logged_in"):
         login_dialog = Login()
         login_dialog.setWindowTitle("Hola, bienvenido a mi querencia")
-        if login_dialog.exec_() != QDialog.Accepted:
+        with arranque.medir("login (incluye la espera al usuario)"):
+            aceptado = login_dialog.exec_() == QDialog.Accepted
+        if not aceptado:
             sys.exit(0)
 
     # Crear ventana principal
-    window = MainWindow()
+    with arranque.medir("crear ventana principal"):
+        window = MainWindow()
     window.showMaximized()  # Iniciar maximizado en lugar de pantalla completa
-    sys.exit(app.exec_())
+
+    def ventana_visible():
+        arranque.marcar("ventana visible")
+        if mostrar_tiempos:
+            print(arranque.informe())
+        if PRECARGAR_PAGINAS:
+            QTimer.singleShot(PRECARGA_DEMORA_MS, window.main_section.precargar)
+
+    # Se ejecuta en la primera vuelta del bucle de eventos, después del primer pintado
+    QTimer.singleShot(0, ventana_visible)
+    codigo = app.exec_()
+
+    # No cortar una escritura en curso (ticket, informe, PDF) al cerrar
+    obtener_ejecutor().esperar()
+    sys.exit(codigo)
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=['numpy', 'utils.analitica'],  # Se importan recién al abrir las pestañas de ventas
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -1,7 +1,6 @@
 # ui/balance.py
 
-import json
-import os
+import sqlite3
 from datetime import datetime
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
@@ -10,6 +9,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QFont, QDoubleValidator, QColor
 from PyQt5.QtCore import Qt
+from utils import almacenamiento
+from utils.dinero import a_centavos, a_pesos
 
 
 class Balance(QWidget):
@@ -184,7 +185,7 @@ class Balance(QWidget):
             
         efectivo = self.balance_data.get("efectivo", 0)
         dinero_cuenta = self.balance_data.get("dinero_cuenta", 0)
-        total = efectivo + dinero_cuenta
+        total = a_pesos(a_centavos(efectivo) + a_centavos(dinero_cuenta))
 
         # Actualizar labels
         self.efectivo_label.setText(f"${efectivo:.2f}")
@@ -263,15 +264,17 @@ class Balance(QWidget):
                     "nota": nota
                 }
                 
+                # Guardar en la base de datos
+                if not self.guardar_balance(registro):
+                    self.balance_data = self.cargar_balance()
+                    return
+
                 # Agregar al historial
                 if "historial" not in self.balance_data:
                     self.balance_data["historial"] = []
                 
                 self.balance_data["historial"].insert(0, registro)  # Insertar al inicio para mostrar más reciente primero
                 
-                # Guardar en archivo
-                self.guardar_balance()
-                
                 # Actualizar UI
                 self.actualizar_ui()
                 
@@ -287,59 +290,27 @@ class Balance(QWidget):
             QMessageBox.critical(self, "Error", f"Ocurrió un error: {str(e)}")
 
     def cargar_balance(self):
-        """Carga los datos de balance desde el archivo JSON."""
+        """Carga los datos de balance desde la base de datos."""
         try:
-            ruta_balance = "./db/balance.json"
-            if not os.path.exists(ruta_balance):
-                # Si no existe el archivo, crear uno con valores iniciales
-                balance_inicial = {
-                    "efectivo": 0.0,
-                    "dinero_cuenta": 0.0,
-                    "historial": []
-                }
-                with open(ruta_balance, "w", encoding="utf-8") as file:
-                    json.dump(balance_inicial, file, indent=4)
-                return balance_inicial
-            else:
-                with open(ruta_balance, "r", encoding="utf-8") as file:
-                    balance = json.load(file)
-                    
-                # Convertir de formato antiguo a nuevo si es necesario
-                if "mercadopago" in balance and "bbva" in balance:
-                    dinero_cuenta = balance.get("mercadopago", 0) + balance.get("bbva", 0)
-                    balance["dinero_cuenta"] = dinero_cuenta
-                    # Eliminar claves antiguas
-                    if "mercadopago" in balance:
-                        del balance["mercadopago"]
-                    if "bbva" in balance:
-                        del balance["bbva"]
-                    
-                    # Actualizar histórico si existe
-                    if "historial" in balance:
-                        for registro in balance["historial"]:
-                            if "mercadopago" in registro and "bbva" in registro:
-                                registro["dinero_cuenta"] = registro.get("mercadopago", 0) + registro.get("bbva", 0)
-                                if "mercadopago" in registro:
-                                    del registro["mercadopago"]
-                                if "bbva" in registro:
-                                    del registro["bbva"]
-                                    
-                    # Guardar cambios
-                    with open(ruta_balance, "w", encoding="utf-8") as file:
-                        json.dump(balance, file, indent=4)
-                        
-                return balance
-        except Exception as e:
+            return almacenamiento.cargar_balance()
+        except sqlite3.Error as e:
             QMessageBox.critical(self, "Error", f"Error al cargar balance: {str(e)}")
             return {"efectivo": 0.0, "dinero_cuenta": 0.0, "historial": []}
 
-    def guardar_balance(self):
-        """Guarda los datos de balance en el archivo JSON."""
+    def guardar_balance(self, registro):
+        """
+        Guarda los saldos actuales y el registro del ajuste en la base de datos.
+
+        :return: True si se guardó correctamente.
+        """
         try:
-            with open("./db/balance.json", "w", encoding="utf-8") as file:
-                json.dump(self.balance_data, file, indent=4)
-        except Exception as e:
+            almacenamiento.ajustar_balance(
+                self.balance_data["efectivo"], self.balance_data["dinero_cuenta"], registro
+            )
+            return True
+        except sqlite3.Error as e:
             QMessageBox.critical(self, "Error", f"Error al guardar balance: {str(e)}")
+            return False
 
     def focus_on_entry(self):
         """Establece el foco en el primer campo de entrada."""
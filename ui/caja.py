@@ -1,17 +1,55 @@
 # ui/caja.py
 
 import json
-import os
-import difflib
-from datetime import datetime
+import sqlite3
+from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QLineEdit,
-    QLabel, QHeaderView, QMessageBox, QDialog, QMenu, QAction
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QLineEdit,
+    QLabel, QHeaderView, QMessageBox, QDialog, QMenu, QAction, QInputDialog, QCompleter
 )
-from PyQt5.QtGui import QFont, QIntValidator, QDoubleValidator
-from PyQt5.QtCore import Qt, pyqtSignal, QTimer
+from PyQt5.QtGui import QFont, QIntValidator, QDoubleValidator, QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QTimer, QModelIndex
+from .diario_ticket import DiarioTicket, leer_diario
 from .facturar import FacturarDialog
+from .keypress import LectorEscaner
+from .modelo_ticket import LineaTicket, TicketModel
 from .registro_operacion import RegistrarOperacionDialog  # Asegúrate de tener este diálogo
+from .seleccion_producto import SeleccionProductoDialog
+from .tareas import obtener_ejecutor
+from utils.indice_clientes import obtener_indice_clientes
+from utils.indice_productos import obtener_indice
+from utils import almacenamiento
+from utils.busqueda import obtener_motor
+from utils.cache_productos import obtener_cache
+from utils.codigos_barras import cargar_formato, decodificar
+from utils.dinero import a_pesos, formatear
+from utils.persistencia import escribir_json
+from utils.precios import obtener_precios
+from utils.stock import descontar_venta, productos_vendidos
+from utils.sugerencias import DIAS_VENTAS, obtener_sugerencias
+
+MAX_COINCIDENCIAS = 50  # Máximo de productos a mostrar en la lista de selección
+FUSIONAR_LINEAS = True  # Las lecturas repetidas de un producto se suman a su línea
+RESALTADO_MS = 1200  # Tiempo que queda resaltada la última línea leída
+RUTA_EN_ESPERA = "./db/tickets_en_espera.json"  # Tickets en espera, para no perderlos al cerrar
+SUGERENCIAS_MS = 300  # Pausa al escribir antes de sugerir; el escáner teclea mucho más rápido
+
+
+def ticket_existe(numero_ticket):
+    try:
+        return almacenamiento.existe_ticket(numero_ticket)
+    except sqlite3.Error:
+        return False
+
+
+def cargar_tickets_en_espera(ruta=RUTA_EN_ESPERA):
+    """Retorna los tickets en espera guardados en disco ({"hora", "lineas"})."""
+    try:
+        with open(ruta, "r", encoding="utf-8") as file:
+            datos = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+    return datos if isinstance(datos, list) else []
 
 
 class CustomLineEdit(QLineEdit):
@@ -19,20 +57,33 @@ class CustomLineEdit(QLineEdit):
         super().__init__(parent)
 
     def focusInEvent(self, event):
-        self.clear()
+        # Al cerrarse la lista de sugerencias el foco vuelve sin que haya que borrar
+        if event.reason() != Qt.PopupFocusReason:
+            self.clear()
         super().focusInEvent(event)
 
 
 class Caja(QWidget):
-    inventario_actualizado = pyqtSignal()
-
     def __init__(self):
         super().__init__()
-        self.inventario = []
+        self.indice = obtener_indice()
+        self.precios = obtener_precios()
+        self.motor = obtener_motor()
+        self.sugerencias = obtener_sugerencias()
+        self.cache = obtener_cache()
+        self.indice_clientes = obtener_indice_clientes()
+        self.clientes_credito = []  # Clientes con deuda en el ticket que se está guardando
+        self.ejecutor = obtener_ejecutor()
+        self.guardando = False  # Hay un ticket guardándose en segundo plano
+        self.lecturas_pendientes = []  # Lecturas hechas mientras se guardaba el ticket
+        self.formato_balanza = cargar_formato()
+        self.tickets_en_espera = cargar_tickets_en_espera()
         self.ticket_numero = "N/A"
         self.current_user = "cajero_1"
         self.num_session = "N/A"  # Inicializar num_session
         self.init_ui()
+        # Junta las lecturas del escáner hechas con un diálogo abierto
+        self.lector = LectorEscaner(self)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -84,18 +135,25 @@ class Caja(QWidget):
         self.message_label.setFixedHeight(44)
         layout.addWidget(self.message_label)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["Código", "Descripción", "Cantidad", "Precio", "Subtotal"])
+        self.modelo = TicketModel(self, fusionar=FUSIONAR_LINEAS)
+        self.table = QTableView()
+        self.table.setModel(self.modelo)
+        # Ticket que quedó sin terminar si la aplicación se cerró de golpe
+        recuperables, numero_guardado = leer_diario()
+        self.diario = DiarioTicket(self.modelo, parent=self)
+        if numero_guardado is not None and ticket_existe(numero_guardado):
+            self.diario.reescribir()  # Se cerró justo después de guardarlo: no hay nada que recuperar
+        elif recuperables:
+            QTimer.singleShot(0, lambda: self.ofrecer_recuperacion(recuperables))
         self.table.setFont(QFont("Arial", 12))
-        self.table.setRowCount(0)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
 
         self.table.horizontalHeader().setFont(QFont("Arial", 14, QFont.Bold))
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.verticalHeader().setVisible(False)
 
         self.table.setStyleSheet("""
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #b3d9ff;
                 color: black;
             }
@@ -132,10 +190,58 @@ class Caja(QWidget):
         self.determinar_numero_ticket()
 
         self.search_input.returnPressed.connect(self.buscar_producto)
-        self.table.cellChanged.connect(self.validar_cambio_celda)
+
+        # Sugerencias al escribir: se buscan cuando se deja de teclear, así las
+        # lecturas del escáner (teclas muy seguidas y Enter) no las disparan
+        self.modelo_sugerencias = QStandardItemModel(self)
+        self.completer = QCompleter(self.modelo_sugerencias, self)
+        self.completer.setWidget(self.search_input)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.popup().setFont(QFont("Arial", 18))
+        self.completer.activated[QModelIndex].connect(self.elegir_sugerencia)
+        self.sugerencias_timer = QTimer(self)
+        self.sugerencias_timer.setSingleShot(True)
+        self.sugerencias_timer.setInterval(SUGERENCIAS_MS)
+        self.sugerencias_timer.timeout.connect(self.mostrar_sugerencias)
+        self.search_input.textEdited.connect(self.texto_editado)
+        desde = datetime.now() - timedelta(days=DIAS_VENTAS)
+        tarea = self.ejecutor.enviar(almacenamiento.contar_ventas, desde)
+        tarea.al_terminar(self.ventas_cargadas)
+
+        # Se conectan métodos y no lambdas: PyQt guarda los métodos con una referencia
+        # débil, pero una lambda que usa self forma un ciclo que mantiene viva a Caja
+        # y el recolector de basura la destruye en cualquier momento
+        self.resaltado_timer = QTimer(self)
+        self.resaltado_timer.setSingleShot(True)
+        self.resaltado_timer.timeout.connect(self.quitar_resaltado)
+        self.modelo.total_cambiado.connect(self.actualizar_total)
+        self.modelo.error.connect(self.mostrar_error)
 
         self.actualizar_total()
 
+    def ventas_cargadas(self, ventas):
+        """Ordena las sugerencias y llena el caché con las ventas recientes."""
+        self.sugerencias.cargar_ventas(ventas)
+        self.cache.sembrar(ventas)
+
+    def ofrecer_recuperacion(self, lineas):
+        """Pregunta si se recupera el ticket que quedó en el diario."""
+        total = sum(linea.subtotal_centavos for linea in lineas)
+        r = QMessageBox.question(
+            self,
+            "Recuperar Ticket",
+            f"Se encontró un ticket sin terminar con {len(lineas)} artículos (${formatear(total)}).\n"
+            "¿Desea recuperarlo?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+        if r == QMessageBox.Yes:
+            self.modelo.cargar(lineas)
+            self.mostrar_mensaje("TICKET RECUPERADO.", "success")
+        else:
+            self.diario.reescribir()  # El modelo está vacío: se borra el diario
+        self.search_input.setFocus()
+
     def show_context_menu(self, pos):
         row = self.table.rowAt(pos.y())
         if row < 0:
@@ -148,9 +254,9 @@ class Caja(QWidget):
         menu.exec_(self.table.mapToGlobal(pos))
 
     def eliminar_item(self, row):
-        if row < 0 or row >= self.table.rowCount():
+        if row < 0 or row >= self.modelo.rowCount():
             return
-        desc = self.table.item(row, 1).text()
+        desc = self.modelo.linea(row).descripcion
         r = QMessageBox.question(
             self,
             "Eliminar",
@@ -159,8 +265,7 @@ class Caja(QWidget):
             QMessageBox.No
         )
         if r == QMessageBox.Yes:
-            self.table.removeRow(row)
-            self.actualizar_total()
+            self.modelo.quitar(row)
             self.mostrar_mensaje("PRODUCTO ELIMINADO.", "success")
             self.search_input.setFocus()
 
@@ -180,49 +285,163 @@ class Caja(QWidget):
             self.num_session = "N/A"  # Añadido
 
     def cargar_inventario(self):
+        """
+        Incorpora al índice compartido los productos que cambiaron desde la última
+        vez; las demás pantallas se enteran por la señal productos_cambiados.
+        """
         try:
-            with open("./db/inventario.json", "r", encoding='utf-8') as file:
-                self.inventario = json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.inventario = []
+            self.indice.refrescar()
+        except sqlite3.Error:
             self.mostrar_mensaje("ERROR AL CARGAR INVENTARIO.", "error")
 
     def determinar_numero_ticket(self):
         hoy = datetime.now().strftime("%d-%m-%Y")
-        ruta_tickets = "./db/tickets.json"
+        try:
+            nuevo_num = almacenamiento.siguiente_numero_ticket(hoy)
+        except sqlite3.Error:
+            nuevo_num = 1
 
-        if not os.path.exists(ruta_tickets):
-            registro_tickets = []
-            with open(ruta_tickets, "w", encoding='utf-8') as file:
-                json.dump(registro_tickets, file, indent=4)
-        else:
-            try:
-                with open(ruta_tickets, "r", encoding='utf-8') as file:
-                    registro_tickets = json.load(file)
-            except (json.JSONDecodeError, FileNotFoundError):
-                registro_tickets = []
+        self.ticket_numero = f"{hoy}-{nuevo_num}"
+        self.actualizar_ticket_label()
 
-        tickets_hoy = [t for t in registro_tickets if t.get("dia") == hoy]
+    def actualizar_ticket_label(self):
+        texto = f"Ticket N°: {self.ticket_numero}"
+        if self.tickets_en_espera:
+            texto += f" ({len(self.tickets_en_espera)} en espera)"
+        self.ticket_label.setText(texto)
 
-        if not tickets_hoy:
-            nuevo_num = 1
+    # ------------------ TICKETS EN ESPERA ------------------
+
+    def poner_en_espera(self):
+        """Guarda el ticket actual en espera y deja la caja libre para otro cliente."""
+        if self.guardando:
+            self.mostrar_mensaje("ESPERE, GUARDANDO TICKET.", "info")
+            return
+        if self.modelo.rowCount() == 0:
+            self.mostrar_mensaje("NO HAY PRODUCTOS PARA PONER EN ESPERA.", "error")
+            return
+        self.tickets_en_espera.append(self.ticket_actual_en_espera())
+        self.modelo.limpiar()
+        self.guardar_tickets_en_espera()
+        self.mostrar_mensaje(
+            f"TICKET EN ESPERA. {len(self.tickets_en_espera)} EN ESPERA (F9 PARA RECUPERAR).", "info"
+        )
+        self.search_input.setFocus()
+
+    def recuperar_ticket(self):
+        """
+        Elige un ticket en espera y lo carga en la caja. Si había un ticket en
+        curso, pasa a la lista de espera en su lugar.
+        """
+        if self.guardando:
+            self.mostrar_mensaje("ESPERE, GUARDANDO TICKET.", "info")
+            return
+        if not self.tickets_en_espera:
+            self.mostrar_mensaje("NO HAY TICKETS EN ESPERA.", "error")
+            return
+
+        opciones = []
+        for i, en_espera in enumerate(self.tickets_en_espera, start=1):
+            lineas = [LineaTicket.desde_dict(d) for d in en_espera["lineas"]]
+            total = sum(linea.subtotal_centavos for linea in lineas)
+            opciones.append(f"{i}. {en_espera['hora']} - {len(lineas)} artículos - ${formatear(total)}")
+        opcion, ok = QInputDialog.getItem(
+            self, "Tickets en Espera", "Seleccione el ticket a recuperar:", opciones, 0, False
+        )
+        self.search_input.setFocus()
+        if not ok:
+            return
+
+        en_espera = self.tickets_en_espera.pop(opciones.index(opcion))
+        if self.modelo.rowCount() > 0:
+            self.tickets_en_espera.append(self.ticket_actual_en_espera())
+        self.modelo.cargar([LineaTicket.desde_dict(d) for d in en_espera["lineas"]])
+        self.guardar_tickets_en_espera()
+        self.mostrar_mensaje(f"TICKET DE LAS {en_espera['hora']} RECUPERADO.", "success")
+
+    def ticket_actual_en_espera(self):
+        return {
+            "hora": datetime.now().strftime("%H:%M:%S"),
+            "lineas": [linea.a_dict() for linea in self.modelo.lineas],
+        }
+
+    def guardar_tickets_en_espera(self):
+        """Actualiza la lista en pantalla y la escribe en disco en segundo plano."""
+        self.actualizar_ticket_label()
+        tarea = self.ejecutor.enviar(escribir_json, RUTA_EN_ESPERA, list(self.tickets_en_espera))
+        tarea.al_fallar(lambda _: self.mostrar_mensaje("ERROR AL GUARDAR TICKETS EN ESPERA.", "error"))
+
+    @staticmethod
+    def partes_busqueda(texto):
+        """Separa el "cantidad*" o "subtotal+" inicial del texto a buscar."""
+        for separador in ("+", "*"):
+            if separador in texto:
+                prefijo, resto = texto.split(separador, 1)
+                return prefijo + separador, resto
+        return "", texto
+
+    def texto_editado(self, _texto):
+        self.sugerencias_timer.start()  # Se reinicia con cada tecla
+
+    def mostrar_sugerencias(self):
+        """Muestra debajo de la búsqueda los productos que empiezan con lo escrito."""
+        _, buscado = self.partes_busqueda(self.search_input.text())
+        productos = self.sugerencias.sugerir(buscado)
+        self.modelo_sugerencias.clear()
+        for producto in productos:
+            item = QStandardItem(
+                f"{producto['descripcion'].upper()}  ·  {producto['codigo']}  ·  "
+                f"${self.precios.precio(producto):.2f}"
+            )
+            item.setData(producto["codigo"], Qt.UserRole)
+            self.modelo_sugerencias.appendRow(item)
+        if productos and self.search_input.hasFocus():
+            self.completer.complete()
         else:
-            ultimo_ticket = tickets_hoy[-1]
-            ultimo_num_str = ultimo_ticket.get("numero_ticket", "").split("-")[-1]
-            try:
-                ultimo_num = int(ultimo_num_str)
-                nuevo_num = ultimo_num + 1
-            except ValueError:
-                nuevo_num = 1
+            self.completer.popup().hide()
 
-        self.ticket_numero = f"{hoy}-{nuevo_num}"
-        self.ticket_label.setText(f"Ticket N°: {self.ticket_numero}")
+    def elegir_sugerencia(self, index):
+        """Agrega el producto sugerido, con la cantidad o el subtotal ya escritos."""
+        prefijo, _ = self.partes_busqueda(self.search_input.text())
+        self.search_input.setText(f"{prefijo}{index.data(Qt.UserRole)}")
+        self.buscar_producto()
 
     def buscar_producto(self):
-        texto = self.search_input.text().strip().lower()
+        popup = self.completer.popup()
+        if popup.isVisible() and popup.currentIndex().isValid():
+            return  # El Enter elige la sugerencia marcada (elegir_sugerencia)
+        self.sugerencias_timer.stop()
+        popup.hide()
+
+        texto = self.search_input.text()
         self.search_input.clear()
+        self.ingresar_lectura(texto)
+
+    def ingresar_lectura(self, texto):
+        """
+        Procesa una lectura de la búsqueda o del escáner (las que llegaron con un
+        diálogo abierto las entrega LectorEscaner al cerrarse).
+        """
+        texto = texto.strip().lower()
         if not texto:
             return
+        if self.guardando:
+            # Pertenecen al próximo ticket: se agregan cuando termine de guardarse el actual
+            self.lecturas_pendientes.append(texto)
+            self.mostrar_mensaje(f"GUARDANDO TICKET... {len(self.lecturas_pendientes)} EN ESPERA.", "info")
+            return
+        self.procesar_lectura(texto)
+
+    def procesar_lectura(self, texto):
+        """
+        Interpreta el texto ingresado (código, cantidad*código, subtotal+código o
+        etiqueta de la balanza).
+        """
+        # Etiqueta de balanza: se resuelve por PLU, sin pasar por la búsqueda
+        etiqueta = decodificar(texto, self.formato_balanza)
+        if etiqueta is not None and texto.strip() not in self.indice:
+            self.procesar_etiqueta(etiqueta)
+            return
 
         # Dividir el texto de búsqueda en tokens
         tokens = texto.split()
@@ -248,20 +467,15 @@ class Caja(QWidget):
             return
 
         # Primero, buscar si identificador coincide exactamente con algún código
-        producto_exacto = next((p for p in self.inventario if p["codigo"].lower() == identificador.lower()), None)
+        producto_exacto = self.indice.obtener(identificador)
         if producto_exacto:
-            if subtotal is not None:
-                if producto_exacto.get("es_pesable", False):
-                    cantidad = int((subtotal / producto_exacto["precio"]) * 1000)  # Convertir Kg a g
-                else:
-                    self.mostrar_mensaje("NO SE PUEDE SUBTOTAL EN PRODUCTOS NO PESABLES.", "error")
-                    return
-            if (cantidad is not None
-                and not producto_exacto.get("es_pesable", False)
-                and not float(cantidad).is_integer()):
-                self.mostrar_mensaje("CANTIDAD INVÁLIDA (DECIMAL) PARA NO PESABLE.", "error")
-                return
-            self.agregar_producto_a_tabla(producto_exacto, cantidad)
+            self.procesar_producto(producto_exacto, cantidad, subtotal)
+            return
+
+        # Las búsquedas por nombre ya resueltas salen del caché sin volver a buscar
+        producto = self.cache.obtener(identificador)
+        if producto is not None:
+            self.procesar_producto(producto, cantidad, subtotal)
             return
 
         # Si no hay coincidencia exacta, proceder con la búsqueda aproximada
@@ -270,98 +484,84 @@ class Caja(QWidget):
             tokens = identificador.split()
 
         # Buscar productos que coincidan con todos los tokens
-        productos_matches = []
-        for producto in self.inventario:
-            # Combinar código y descripción en una sola cadena
-            descripcion = f"{producto.get('codigo', '')} {producto.get('descripcion', '')}".lower()
-            descripcion_tokens = descripcion.split()
-
-            # Verificar si cada token de búsqueda tiene una coincidencia aproximada en los tokens de la descripción
-            all_tokens_match = True
-            for token in tokens:
-                # Obtener coincidencias aproximadas para el token
-                matches = difflib.get_close_matches(token, descripcion_tokens, n=1, cutoff=0.8)
-                if not matches:
-                    all_tokens_match = False
-                    break
-            if all_tokens_match:
-                productos_matches.append(producto)
+        productos_matches = self.motor.buscar(" ".join(tokens))
 
         if len(productos_matches) == 1:
-            producto = productos_matches[0]
-            if subtotal is not None:
-                if producto.get("es_pesable", False):
-                    cantidad = int((subtotal / producto["precio"]) * 1000)  # Convertir Kg a g
-                else:
-                    self.mostrar_mensaje("NO SE PUEDE SUBTOTAL EN PRODUCTOS NO PESABLES.", "error")
-                    return
-            if (cantidad is not None
-                and not producto.get("es_pesable", False)
-                and not float(cantidad).is_integer()):
-                self.mostrar_mensaje("CANTIDAD INVÁLIDA (DECIMAL) PARA NO PESABLE.", "error")
-                return
-            self.agregar_producto_a_tabla(producto, cantidad)
+            # Solo se guardan las búsquedas sin ambigüedad: las otras siguen mostrando la lista
+            self.cache.recordar(" ".join(tokens), productos_matches[0][0])
+            self.procesar_producto(productos_matches[0][0], cantidad, subtotal)
         elif len(productos_matches) == 0:
             self.mostrar_mensaje("PRODUCTO NO ENCONTRADO.", "error")
         else:
-            self.mostrar_mensaje("MÚLTIPLES COINCIDENCIAS, SE MÁS ESPECÍFICO.", "error")
-
-    def agregar_producto_a_tabla(self, producto, cantidad):
-        row_pos = self.table.rowCount()
-        self.table.insertRow(row_pos)
-
-        # Código
-        cod_item = QTableWidgetItem(producto["codigo"])
-        cod_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-        self.table.setItem(row_pos, 0, cod_item)
-
-        # Descripción
-        desc_item = QTableWidgetItem(producto["descripcion"].upper())
-        desc_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-        self.table.setItem(row_pos, 1, desc_item)
-
-        # Oferta y Precio
-        oferta = float(producto.get("oferta", 0))
-        precio_original = float(producto["precio"])
-        if oferta > 0:
-            precio = precio_original * (1 - oferta / 100)
-        else:
-            precio = precio_original
-
-        # Cantidad
-        if producto.get("es_pesable", False):
-            cant_item = QTableWidgetItem(f"{int(cantidad)} g")
-            cant_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable)
-            # Validar que la cantidad sea positiva
-            cant_item.setData(Qt.UserRole, "g")
-        else:
-            cant_item = QTableWidgetItem(f"{int(cantidad)} und")
-            cant_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable)
-            # Validar que la cantidad sea positiva
-            cant_item.setData(Qt.UserRole, "und")
-        self.table.setItem(row_pos, 2, cant_item)
-
-        # Precio
-        pre_item = QTableWidgetItem(f"{precio:.2f}")
-        pre_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-        self.table.setItem(row_pos, 3, pre_item)
-
-        # Subtotal
-        if producto.get("es_pesable", False):
-            subtotal = (cantidad / 1000) * precio  # Convertir g a Kg para el subtotal
+            dialog = SeleccionProductoDialog(
+                [producto for producto, _ in productos_matches[:MAX_COINCIDENCIAS]], self
+            )
+            if dialog.exec_() == QDialog.Accepted and dialog.producto_seleccionado:
+                self.procesar_producto(dialog.producto_seleccionado, cantidad, subtotal)
+            else:
+                self.mostrar_mensaje("MÚLTIPLES COINCIDENCIAS, SE MÁS ESPECÍFICO.", "error")
+            self.search_input.setFocus()
+
+    def procesar_etiqueta(self, etiqueta):
+        """Agrega el producto pesable de una etiqueta de balanza con su peso o precio."""
+        producto = self.indice.obtener_por_plu(etiqueta["plu"])
+        if producto is None:
+            self.mostrar_mensaje(f"PLU {etiqueta['plu']} NO ENCONTRADO.", "error")
+            return
+        if not producto.get("es_pesable", False):
+            self.mostrar_mensaje("ETIQUETA DE BALANZA PARA PRODUCTO NO PESABLE.", "error")
+            return
+        if etiqueta["gramos"] is not None:
+            self.procesar_producto(producto, etiqueta["gramos"], None)
         else:
-            subtotal = cantidad * precio
-        sub_item = QTableWidgetItem(f"{subtotal:.2f}")
-        sub_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable)
-        self.table.setItem(row_pos, 4, sub_item)
+            self.procesar_producto(producto, None, a_pesos(etiqueta["importe"]))
 
+    def procesar_producto(self, producto, cantidad, subtotal):
+        """
+        Valida la cantidad o el subtotal ingresados para el producto y lo agrega al ticket.
+        """
+        precio = self.precios.precio(producto)  # Con la oferta vigente
+        if subtotal is not None:
+            if producto.get("es_pesable", False):
+                if precio <= 0:
+                    self.mostrar_mensaje("PRODUCTO SIN PRECIO, NO SE PUEDE SUBTOTAL.", "error")
+                    return
+                cantidad = int((subtotal / precio) * 1000)  # Convertir Kg a g
+            else:
+                self.mostrar_mensaje("NO SE PUEDE SUBTOTAL EN PRODUCTOS NO PESABLES.", "error")
+                return
+        if (cantidad is not None
+            and not producto.get("es_pesable", False)
+            and not float(cantidad).is_integer()):
+            self.mostrar_mensaje("CANTIDAD INVÁLIDA (DECIMAL) PARA NO PESABLE.", "error")
+            return
+        self.agregar_producto_a_tabla(producto, cantidad, precio)
+
+    def agregar_producto_a_tabla(self, producto, cantidad, precio=None):
+        linea = LineaTicket.desde_producto(producto, cantidad, precio)
+        fila, sumada = self.modelo.agregar_o_sumar(linea)
+
+        # Resaltar la línea afectada y llevarla a la vista
+        self.modelo.resaltar(fila)
+        self.table.scrollTo(self.modelo.index(fila, 0))
+        self.resaltado_timer.start(RESALTADO_MS)
+
+        if sumada:
+            total = int(self.modelo.linea(fila).cantidad)
+            self.mostrar_mensaje(
+                f"SUMADO: {linea.descripcion} (+{int(cantidad)} {linea.unidad}, {total} {linea.unidad} EN TOTAL)",
+                "success"
+            )
+            return
         self.mostrar_mensaje(
             f"AGREGADO: {producto['descripcion'].upper()} ({cantidad} g)" 
             if producto.get("es_pesable", False) 
             else f"AGREGADO: {producto['descripcion'].upper()} ({cantidad} und)", 
             "success"
         )
-        self.actualizar_total()
+
+    def quitar_resaltado(self):
+        self.modelo.resaltar(None)
 
     def mostrar_mensaje(self, mensaje, tipo):
         if tipo == "success":
@@ -390,6 +590,9 @@ class Caja(QWidget):
             """)
         self.message_label.setText(mensaje.upper())
 
+    def mostrar_error(self, mensaje):
+        self.mostrar_mensaje(mensaje, "error")
+
     def keyPressEvent(self, event):
         key = event.key()
         if self.search_input.hasFocus():
@@ -397,12 +600,16 @@ class Caja(QWidget):
                 self.abrir_ingresos()
             elif key == Qt.Key_F6:
                 self.abrir_gastos()
+            elif key == Qt.Key_F8:
+                self.poner_en_espera()
+            elif key == Qt.Key_F9:
+                self.recuperar_ticket()
             elif key == Qt.Key_F10:
                 self.abrir_facturacion()
             elif key in (Qt.Key_Down, Qt.Key_Tab):
-                if self.table.rowCount() > 0:
+                if self.modelo.rowCount() > 0:
                     self.table.setFocus()
-                    self.table.setCurrentCell(0, 0)
+                    self.table.setCurrentIndex(self.modelo.index(0, 0))
             else:
                 super().keyPressEvent(event)
         elif self.table.hasFocus():
@@ -410,13 +617,17 @@ class Caja(QWidget):
                 self.abrir_ingresos()
             elif key == Qt.Key_F6:
                 self.abrir_gastos()
+            elif key == Qt.Key_F8:
+                self.poner_en_espera()
+            elif key == Qt.Key_F9:
+                self.recuperar_ticket()
             elif key == Qt.Key_F10:
                 self.abrir_facturacion()
-            elif key == Qt.Key_Up and self.table.currentRow() == 0:
+            elif key == Qt.Key_Up and self.table.currentIndex().row() == 0:
                 self.table.clearSelection()
                 self.search_input.setFocus()
             elif key == Qt.Key_Delete:
-                current_row = self.table.currentRow()
+                current_row = self.table.currentIndex().row()
                 if current_row >= 0:
                     self.eliminar_item(current_row)
             else:
@@ -425,14 +636,10 @@ class Caja(QWidget):
             super().keyPressEvent(event)
 
     def abrir_facturacion(self):
-        total = 0.0
-        for row in range(self.table.rowCount()):
-            sub_text = self.table.item(row, 4).text()
-            try:
-                subtotal = float(sub_text)
-                total += subtotal
-            except ValueError:
-                pass
+        if self.guardando:
+            self.mostrar_mensaje("ESPERE, GUARDANDO TICKET.", "info")
+            return
+        total = self.modelo.total()
         if total == 0:
             QMessageBox.warning(self, "Error", "No hay productos en el ticket para facturar.")
             return
@@ -440,7 +647,7 @@ class Caja(QWidget):
         dialog = FacturarDialog(total, self)
         if dialog.exec_() == QDialog.Accepted:
             pagos, cambio = dialog.get_pago_data()
-            self.guardar_ticket(pagos, cambio)
+            self.guardar_ticket(pagos, cambio, dialog.creditos)
 
     def abrir_ingresos(self):
         dialog = RegistrarOperacionDialog(tipo_operacion="ingreso", parent=self)
@@ -461,16 +668,6 @@ class Caja(QWidget):
         monto = operacion.get("monto")
         nota = operacion.get("nota", "")
 
-        ruta_op = "./db/registro_operaciones.json"
-        try:
-            if os.path.exists(ruta_op):
-                with open(ruta_op, "r", encoding="utf-8") as f:
-                    registros = json.load(f)
-            else:
-                registros = []
-        except (json.JSONDecodeError, IOError):
-            registros = []
-
         nueva_operacion = {
             "num_session": self.num_session,
             "tipo": tipo,
@@ -480,82 +677,21 @@ class Caja(QWidget):
             "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
-        registros.append(nueva_operacion)
-
-        try:
-            with open(ruta_op, "w", encoding="utf-8") as f:
-                json.dump(registros, f, indent=4, ensure_ascii=False)
-            self.mostrar_mensaje(f"OPERACIÓN DE {tipo.upper()} REGISTRADA EN {cuenta.upper()}.", "success")
-        except IOError:
-            self.mostrar_mensaje("ERROR AL REGISTRAR OPERACIÓN.", "error")
-
-    def validar_cambio_celda(self, row, column):
-        if column not in (2, 4):
-            return
-        try:
-            cant_item = self.table.item(row, 2)
-            precio_item = self.table.item(row, 3)
-            sub_item = self.table.item(row, 4)
-
-            cant_text = cant_item.text().replace(" g", "").replace(" und", "").strip()
-            unidad = cant_item.data(Qt.UserRole)
-            cantidad = int(cant_text)
-
-            precio = float(precio_item.text())
-            subtotal = float(sub_item.text()) if sub_item.text() else 0.0
-
-            if cantidad <= 0 and column == 2:
-                raise ValueError("Cantidad inválida.")
-            if subtotal <= 0 and column == 4:
-                raise ValueError("Subtotal inválido.")
-
-            codigo = self.table.item(row, 0).text()
-            producto = next((p for p in self.inventario if p["codigo"] == codigo), None)
-
-            if producto:
-                oferta = float(producto.get("oferta", 0))
-                precio_original = float(producto["precio"])
-                if oferta > 0:
-                    precio_calculado = precio_original * (1 - oferta / 100)
-                else:
-                    precio_calculado = precio_original
-
-                if producto.get("es_pesable", False):
-                    if unidad == "g":
-                        # Convertir gramos a kilogramos para el subtotal
-                        calculated_sub = (cantidad / 1000) * precio_calculado
-                        sub_item.setText(f"{calculated_sub:.2f}")
-                    else:
-                        raise ValueError("Unidad inconsistente para producto pesable.")
-                else:
-                    if unidad == "und":
-                        calculated_sub = cantidad * precio_calculado
-                        sub_item.setText(f"{calculated_sub:.2f}")
-                    else:
-                        raise ValueError("Unidad inconsistente para producto no pesable.")
-            else:
-                raise ValueError("Producto no encontrado.")
-
-            self.actualizar_total()
-
-        except (ValueError, AttributeError):
-            self.mostrar_mensaje("VALOR INVÁLIDO, REVISE CAMPOS.", "error")
+        tarea = self.ejecutor.enviar(almacenamiento.guardar_operacion, nueva_operacion)
+        tarea.al_terminar(lambda _: self.mostrar_mensaje(
+            f"OPERACIÓN DE {tipo.upper()} REGISTRADA EN {cuenta.upper()}.", "success"))
+        tarea.al_fallar(lambda _: self.mostrar_mensaje("ERROR AL REGISTRAR OPERACIÓN.", "error"))
 
     def actualizar_total(self):
-        total = 0.0
-        for row in range(self.table.rowCount()):
-            try:
-                sub = float(self.table.item(row, 4).text())
-                total += sub
-            except ValueError:
-                pass
-        self.total_label.setText(f"TOTAL: {total:.2f}")
+        self.total_label.setText(f"TOTAL: {formatear(self.modelo.total_centavos)}")
 
-    def guardar_ticket(self, pagos, cambio):
+    def guardar_ticket(self, pagos, cambio, creditos=()):
+        # El número se asigna recién al confirmar: los tickets en espera no consumen números
+        self.determinar_numero_ticket()
         if self.ticket_numero == "N/A":
             self.mostrar_mensaje("TICKET NO DETERMINADO.", "error")
             return
-        if self.table.rowCount() == 0:
+        if self.modelo.rowCount() == 0:
             self.mostrar_mensaje("NO HAY PRODUCTOS.", "error")
             return
 
@@ -566,28 +702,8 @@ class Caja(QWidget):
         except (FileNotFoundError, json.JSONDecodeError):
             num_sess = "N/A"
 
-        productos = []
-        for row in range(self.table.rowCount()):
-            codigo = self.table.item(row, 0).text()
-            desc = self.table.item(row, 1).text()
-            c_text = self.table.item(row, 2).text().replace(" g", "").replace(" und", "").strip()
-            unidad = self.table.item(row, 2).data(Qt.UserRole)
-            if unidad == "g":
-                c_val = int(c_text)
-            else:
-                c_val = int(c_text)
-            pr_unit = float(self.table.item(row, 3).text())
-            sub = float(self.table.item(row, 4).text())
-
-            productos.append({
-                "codigo": codigo,
-                "descripcion": desc,
-                "cantidad": c_val,
-                "precio_unitario": pr_unit,
-                "subtotal": sub
-            })
-
-        monto = sum(p["subtotal"] for p in productos)
+        productos = self.modelo.articulos()
+        monto = self.modelo.total()
 
         reg_ticket = {
             "dia": datetime.now().strftime("%d-%m-%Y"),
@@ -600,78 +716,91 @@ class Caja(QWidget):
             "num_session": num_sess  # Usar num_session de session.json
         }
 
-        ruta_tickets = "./db/tickets.json"
-        if not os.path.exists(ruta_tickets):
-            reg_t = []
-        else:
+        # Se guarda en segundo plano; mientras tanto el ticket queda bloqueado y
+        # las lecturas del escáner se guardan para el ticket siguiente
+        self.guardando = True
+        self.table.setEnabled(False)
+        self.mostrar_mensaje(f"GUARDANDO TICKET {self.ticket_numero}...", "info")
+        self.diario.guardando(self.ticket_numero)
+        self.clientes_credito = [credito["cliente_id"] for credito in creditos]
+        # Los productos se copian aquí: el hilo de fondo no lee el índice compartido
+        productos_ticket = productos_vendidos(productos, self.indice)
+        tarea = self.ejecutor.enviar(self.persistir_ticket, reg_ticket, list(creditos), productos_ticket)
+        tarea.al_terminar(self.ticket_guardado)
+        tarea.al_fallar(self.ticket_no_guardado)
+
+    def persistir_ticket(self, reg_ticket, creditos, productos):
+        """
+        Guarda el ticket, descuenta el stock y carga la deuda de los clientes en
+        una sola transacción: se guarda todo o nada. Corre en el hilo de fondo,
+        así que no toca widgets ni el índice (productos es la copia de
+        productos_vendidos()).
+
+        :return: Número del ticket guardado.
+        """
+        numero = reg_ticket["numero_ticket"]
+        with almacenamiento.transaccion():
+            almacenamiento.guardar_ticket(reg_ticket)
+            self.actualizar_inventario(reg_ticket["articulos"], numero, productos)
+            for credito in creditos:
+                almacenamiento.cargar_deuda_ticket(credito["cliente_id"], credito["monto"], numero,
+                                                   credito.get("descuento", 0.0))
+        return numero
+
+    def ticket_guardado(self, numero):
+        self.guardando = False
+        self.table.setEnabled(True)
+        self.mostrar_mensaje(f"TICKET {numero} GUARDADO.", "success")
+        vendidos = [linea.codigo for linea in self.modelo.lineas]
+        self.sugerencias.registrar_venta(vendidos)
+        self.cache.registrar_venta(vendidos)
+        self.cargar_inventario()
+        self.resetear_caja()
+        for cliente_id in self.clientes_credito:
             try:
-                with open(ruta_tickets, "r", encoding='utf-8') as file:
-                    reg_t = json.load(file)
-            except (json.JSONDecodeError, FileNotFoundError):
-                reg_t = []
+                self.indice_clientes.refrescar(cliente_id)  # Cambió su deuda
+            except sqlite3.Error as e:
+                print(f"No se pudo refrescar el cliente {cliente_id}: {e}")
 
-        reg_t.append(reg_ticket)
+        pendientes, self.lecturas_pendientes = self.lecturas_pendientes, []
+        for texto in pendientes:
+            self.procesar_lectura(texto)
+        self.search_input.setFocus()
 
-        try:
-            with open(ruta_tickets, "w", encoding='utf-8') as file:
-                json.dump(reg_t, file, indent=4)
-            self.mostrar_mensaje(f"TICKET {self.ticket_numero} GUARDADO.", "success")
-            self.actualizar_inventario(productos)
-            self.resetear_caja()
-        except IOError:
+    def ticket_no_guardado(self, error):
+        self.guardando = False
+        self.table.setEnabled(True)
+        # El ticket sigue en pantalla; las lecturas en espera eran del ticket siguiente
+        descartadas = len(self.lecturas_pendientes)
+        self.lecturas_pendientes = []
+        if descartadas:
+            self.mostrar_mensaje(f"ERROR AL GUARDAR TICKET. {descartadas} LECTURAS DESCARTADAS.", "error")
+        else:
             self.mostrar_mensaje("ERROR AL GUARDAR TICKET.", "error")
+        self.search_input.setFocus()
 
-    def actualizar_inventario(self, productos_vendidos):
+    def actualizar_inventario(self, articulos, numero_ticket, productos):
         """
-        Actualiza el inventario restando las cantidades vendidas.
+        Resta del stock las cantidades vendidas, escribiendo solo las filas de
+        los productos del ticket.
         """
-        ruta_invent = "./db/inventario.json"
-        try:
-            with open(ruta_invent, "r", encoding='utf-8') as f:
-                inv = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.mostrar_mensaje("ERROR AL CARGAR INVENTARIO PARA ACT.", "error")
-            return
-
-        inv_dict = {p["codigo"]: p for p in inv}
-        for vendido in productos_vendidos:
+        for vendido in descontar_venta(articulos, numero_ticket, productos):
+            # Si no existe, agregarlo con cantidad negativa
             c_vendida = vendido["cantidad"]
-            cod = vendido["codigo"]
-            producto_vendido = next((p for p in self.inventario if p["codigo"] == cod), None)
-            if producto_vendido:
-                if producto_vendido.get("es_pesable", False):
-                    # Convertir gramos a kilogramos antes de restar
-                    inv_dict[cod]["cantidad"] -= c_vendida / 1000
-                else:
-                    inv_dict[cod]["cantidad"] -= c_vendida
-            else:
-                # Si no existe, agregarlo con cantidad negativa
-                inv.append({
-                    "codigo": cod,
-                    "descripcion": vendido["descripcion"],
-                    "cantidad": -c_vendida / 1000 if vendido.get("es_pesable", False) else -c_vendida,
-                    "costo": 0.0,
-                    "precio": vendido["precio_unitario"],
-                    "es_pesable": vendido.get("es_pesable", False),
-                    "fecha_ingreso": datetime.now().strftime("%d-%m-%Y"),
-                    "fecha_vencimiento": "01-01-9999",
-                    "oferta": 0
-                })
-
-        inv_actual = list(inv_dict.values())
-        for p in inv:
-            if p["codigo"] not in inv_dict:
-                inv_actual.append(p)
-
-        try:
-            with open(ruta_invent, "w", encoding='utf-8') as f:
-                json.dump(inv_actual, f, indent=4)
-        except IOError:
-            self.mostrar_mensaje("ERROR AL ACT INVENTARIO.", "error")
+            almacenamiento.guardar_producto({
+                "codigo": vendido["codigo"],
+                "descripcion": vendido["descripcion"],
+                "cantidad": -c_vendida / 1000 if vendido.get("es_pesable", False) else -c_vendida,
+                "costo": 0.0,
+                "precio": vendido["precio_unitario"],
+                "es_pesable": vendido.get("es_pesable", False),
+                "fecha_ingreso": datetime.now().strftime("%d-%m-%Y"),
+                "fecha_vencimiento": "01-01-9999",
+                "oferta": 0
+            })
 
     def resetear_caja(self):
-        self.table.setRowCount(0)
-        self.actualizar_total()
+        self.modelo.limpiar()
         self.determinar_numero_ticket()
 
     def focus_on_entry(self):
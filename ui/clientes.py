@@ -1,15 +1,18 @@
 # clientes.py
 
-import os
-import json
+import sqlite3
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+    QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QTableView,
     QPushButton, QMessageBox, QDialog, QLineEdit, QHBoxLayout, QCheckBox, QFormLayout,
     QMenu, QAction
 )
-from PyQt5.QtGui import QFont, QColor
+from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt, QModelIndex
 from PyQt5.QtWidgets import QHeaderView
+from .modelo_clientes import ClientesModel, ClientesProxy
+from utils import almacenamiento
+from utils.indice_clientes import obtener_indice_clientes
+from utils.dinero import a_centavos, a_pesos, formatear, porcentaje
 
 
 class AgregarClienteDialog(QDialog):
@@ -104,19 +107,16 @@ class AgregarClienteDialog(QDialog):
             "nombre": self.nombre,
             "documento": self.documento,
             "vip": self.vip,
-            "deuda": 0.0,
-            "ticketsdeuda": []
+            "deuda": 0.0
         }
 
 
 class PagarDeudaModal(QDialog):
     """Modal para pagar deuda existente."""
 
-    def __init__(self, cliente, save_callback, update_table_callback, parent=None):
+    def __init__(self, cliente, parent=None):
         super().__init__(parent)
         self.cliente = cliente
-        self.save_callback = save_callback
-        self.update_table_callback = update_table_callback
         self.setWindowTitle("Pagar Deuda")
         self.init_ui()
 
@@ -204,27 +204,29 @@ class PagarDeudaModal(QDialog):
         """Registra el pago y actualiza la tabla."""
         try:
             monto_text = self.monto_input.text().strip()
-            monto = float(monto_text)
+            monto = a_centavos(monto_text)
             if monto <= 0:
                 raise ValueError("El monto debe ser positivo.")
-            if monto > self.cliente["deuda"]:
+            if monto > a_centavos(self.cliente["deuda"]):
                 raise ValueError("El monto excede la deuda actual.")
         except ValueError as e:
             QMessageBox.warning(self, "Error", f"Ingrese un monto válido:\n{e}")
             self.monto_input.setFocus()
             return
 
-        # Actualizar la deuda del cliente
-        self.cliente["deuda"] -= monto
-
-        # Registrar el pago en "ticketsdeuda"
-        self.cliente["ticketsdeuda"].append({
-            "monto": monto,
-            "tipo": "pago_deuda"
-        })
+        # Registrar el pago en la cuenta del cliente
+        try:
+            self.cliente["deuda"] = almacenamiento.registrar_movimiento_deuda(
+                self.cliente["id"], "pago_deuda", a_pesos(monto)
+            )
+            obtener_indice_clientes().refrescar(self.cliente["id"])
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"No se pudo registrar el pago: {e}")
+            return
 
-        self.save_callback()          # Guardar cambios en clientes.json
-        self.update_table_callback()  # Refrescar tabla
         QMessageBox.information(self, "Éxito", "El pago se registró exitosamente.")
         self.accept()
 
@@ -232,11 +234,9 @@ class PagarDeudaModal(QDialog):
 class AgregarDeudaDialog(QDialog):
     """Diálogo para agregar deuda existente."""
 
-    def __init__(self, cliente, save_callback, update_table_callback, parent=None):
+    def __init__(self, cliente, parent=None):
         super().__init__(parent)
         self.cliente = cliente
-        self.save_callback = save_callback
-        self.update_table_callback = update_table_callback
         self.setWindowTitle("Agregar Deuda")
         self.init_ui()
 
@@ -324,7 +324,7 @@ class AgregarDeudaDialog(QDialog):
         """Agrega deuda manualmente con un descuento del 10% si el cliente es VIP."""
         try:
             monto_text = self.monto_input.text().strip()
-            monto = float(monto_text)
+            monto = a_centavos(monto_text)
             if monto <= 0:
                 raise ValueError("El monto debe ser mayor a 0.")
         except ValueError as e:
@@ -333,36 +333,26 @@ class AgregarDeudaDialog(QDialog):
             return
 
         if self.cliente["vip"]:
-            descuento = monto * 0.1
+            descuento = porcentaje(monto, 10)
             monto_descuento = monto - descuento
-            self.cliente["deuda"] += monto_descuento
-
-            # Registrar la deuda agregada con el descuento aplicado
-            self.cliente["ticketsdeuda"].append({
-                "monto": monto_descuento,
-                "tipo": "agregar_deuda",
-                "descuento_aplicado": descuento
-            })
-
             mensaje = (
-                f"Se ha agregado una deuda de ${monto_descuento:.2f} "
-                f"con un descuento del 10% (${descuento:.2f})."
+                f"Se ha agregado una deuda de ${formatear(monto_descuento)} "
+                f"con un descuento del 10% (${formatear(descuento)})."
             )
         else:
+            descuento = 0
             monto_descuento = monto
-            self.cliente["deuda"] += monto_descuento
-
-            # Registrar la deuda agregada sin descuento
-            self.cliente["ticketsdeuda"].append({
-                "monto": monto_descuento,
-                "tipo": "agregar_deuda",
-                "descuento_aplicado": 0.0
-            })
-
-            mensaje = f"Se ha agregado una deuda de ${monto_descuento:.2f}."
+            mensaje = f"Se ha agregado una deuda de ${formatear(monto_descuento)}."
 
-        self.save_callback()
-        self.update_table_callback()
+        # Registrar la deuda en la cuenta del cliente, con el descuento aplicado
+        try:
+            self.cliente["deuda"] = almacenamiento.registrar_movimiento_deuda(
+                self.cliente["id"], "agregar_deuda", a_pesos(monto_descuento), descuento=a_pesos(descuento)
+            )
+            obtener_indice_clientes().refrescar(self.cliente["id"])
+        except (ValueError, sqlite3.Error) as e:
+            QMessageBox.critical(self, "Error", f"No se pudo agregar la deuda: {e}")
+            return
 
         QMessageBox.information(
             self, "Deuda Agregada", mensaje
@@ -370,14 +360,77 @@ class AgregarDeudaDialog(QDialog):
         self.accept()
 
 
+class EstadoCuentaDialog(QDialog):
+    """Estado de cuenta: los movimientos de deuda de un cliente con el saldo de cada uno."""
+
+    NOMBRES_TIPO = {
+        "ticket": "Venta a crédito",
+        "agregar_deuda": "Deuda agregada",
+        "pago_deuda": "Pago",
+    }
+
+    def __init__(self, cliente, parent=None):
+        super().__init__(parent)
+        self.cliente = cliente
+        self.setWindowTitle(f"Movimientos - {cliente['nombre']}")
+        self.setMinimumSize(900, 500)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(20, 20, 20, 20)  # Margen de 20px
+        layout.setSpacing(20)  # Espacio entre elementos
+        self.setLayout(layout)
+
+        deuda_label = QLabel(f"Deuda Actual: ${self.cliente['deuda']:.2f}")
+        deuda_label.setFont(QFont("Arial", 27, QFont.Bold))
+        deuda_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(deuda_label)
+
+        try:
+            movimientos = almacenamiento.cargar_movimientos_deuda(self.cliente["id"])
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"No se pudieron cargar los movimientos: {e}")
+            movimientos = []
+
+        tabla = QTableWidget(len(movimientos), 6)
+        tabla.setHorizontalHeaderLabels(["Fecha", "Movimiento", "Ticket", "Monto", "Descuento", "Saldo"])
+        tabla.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        tabla.setEditTriggers(QTableWidget.NoEditTriggers)
+        tabla.setSelectionBehavior(QTableWidget.SelectRows)
+        tabla.verticalHeader().setVisible(False)
+        for row, movimiento in enumerate(movimientos):
+            signo = "-" if movimiento["tipo"] == "pago_deuda" else ""
+            valores = [
+                movimiento["fecha"] or "",
+                self.NOMBRES_TIPO.get(movimiento["tipo"], movimiento["tipo"]),
+                movimiento["numero_ticket"] or "",
+                "" if movimiento["monto"] is None else f"{signo}${movimiento['monto']:.2f}",
+                f"${movimiento['descuento_aplicado']:.2f}" if movimiento["descuento_aplicado"] else "",
+                "" if movimiento["saldo"] is None else f"${movimiento['saldo']:.2f}",
+            ]
+            for col, valor in enumerate(valores):
+                item = QTableWidgetItem(valor)
+                item.setTextAlignment((Qt.AlignRight if col >= 3 else Qt.AlignCenter) | Qt.AlignVCenter)
+                tabla.setItem(row, col, item)
+        tabla.scrollToBottom()  # Lo más reciente, abajo
+        layout.addWidget(tabla)
+
+        cerrar_button = QPushButton("Cerrar")
+        cerrar_button.setFont(QFont("Arial", 22, QFont.Bold))
+        cerrar_button.setFixedHeight(60)
+        cerrar_button.setFixedWidth(180)
+        cerrar_button.clicked.connect(self.accept)
+        layout.addWidget(cerrar_button, alignment=Qt.AlignCenter)
+
+
 class ClienteModal(QDialog):
     """Diálogo para editar un cliente existente."""
 
-    def __init__(self, cliente, save_callback, update_table_callback, parent=None):
+    def __init__(self, cliente, save_callback, parent=None):
         super().__init__(parent)
         self.cliente = cliente
         self.save_callback = save_callback
-        self.update_table_callback = update_table_callback
         self.setWindowTitle(f"Editar Cliente - {cliente['nombre']}")
         self.init_ui()
 
@@ -443,6 +496,12 @@ class ClienteModal(QDialog):
 
         layout.addLayout(botones_deuda_layout)
 
+        self.movimientos_button = QPushButton("Ver Movimientos")
+        self.movimientos_button.setFont(QFont("Arial", 22))
+        self.movimientos_button.setFixedHeight(60)
+        self.movimientos_button.clicked.connect(self.ver_movimientos)
+        layout.addWidget(self.movimientos_button)
+
         # Botones para aceptar y cancelar
         botones_layout = QHBoxLayout()
         botones_layout.setSpacing(30)  # Espacio entre botones
@@ -472,6 +531,7 @@ class ClienteModal(QDialog):
             self.vip_checkbox,
             self.pagar_button,
             self.agregar_deuda_button,
+            self.movimientos_button,
             aceptar_button,
             cancelar_button
         ]
@@ -509,8 +569,6 @@ class ClienteModal(QDialog):
 
         modal = PagarDeudaModal(
             self.cliente,
-            self.save_callback,
-            self.update_table_callback,
             self
         )
         modal.exec_()
@@ -519,12 +577,14 @@ class ClienteModal(QDialog):
         """Abre un modal para agregar deuda manualmente con un descuento del 10% si el cliente es VIP."""
         modal = AgregarDeudaDialog(
             self.cliente,
-            self.save_callback,
-            self.update_table_callback,
             self
         )
         modal.exec_()
 
+    def ver_movimientos(self):
+        """Abre el estado de cuenta del cliente."""
+        EstadoCuentaDialog(self.cliente, self).exec_()
+
     def aceptar(self):
         """Guarda los cambios realizados al cliente."""
         nuevo_nombre = self.nombre_input.text().strip()
@@ -540,32 +600,30 @@ class ClienteModal(QDialog):
 
         # Verificar si el nuevo documento ya existe en otro cliente (si no está vacío)
         if nuevo_documento:
-            for c in self.parent().clientes:
-                if c["documento"] == nuevo_documento and c != self.cliente:
-                    QMessageBox.warning(self, "Error", "El documento ya está en uso.")
-                    self.documento_input.setFocus()
-                    return
-
-        self.cliente["nombre"] = nuevo_nombre
-        self.cliente["documento"] = nuevo_documento
-        self.cliente["vip"] = vip
-
-        self.save_callback()
-        self.update_table_callback()
+            otro = obtener_indice_clientes().obtener_por_documento(nuevo_documento)
+            if otro is not None and otro["id"] != self.cliente["id"]:
+                QMessageBox.warning(self, "Error", "El documento ya está en uso.")
+                self.documento_input.setFocus()
+                return
+
+        datos = {**self.cliente, "nombre": nuevo_nombre, "documento": nuevo_documento, "vip": vip}
+        if not self.save_callback(datos):
+            return
+        self.cliente.update(datos)
         self.accept()
 
 
 class Clientes(QWidget):
     """Clase principal para gestionar los clientes."""
 
-    CLIENTES_FILE = "./db/clientes.json"
-
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Clientes")
         self.setMinimumSize(800, 500)  # Tamaño original: 800x500
+        self.indice = obtener_indice_clientes()
         self.init_ui()
-        self.load_clientes()  # Carga de clientes al iniciar
+        if self.load_clientes():  # Carga de clientes al iniciar
+            self.modelo.recargar()
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -579,21 +637,39 @@ class Clientes(QWidget):
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
 
-        # Tabla de clientes
-        self.clientes_table = QTableWidget()
-        self.clientes_table.setColumnCount(3)  # 3 columnas: Nombre, Documento, Deuda
-        self.clientes_table.setHorizontalHeaderLabels(["Nombre", "Documento", "Deuda"])
-        self.clientes_table.horizontalHeader().setStretchLastSection(True)
-        self.clientes_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
-        self.clientes_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.clientes_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        self.clientes_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.clientes_table.setSelectionMode(QTableWidget.SingleSelection)
-        self.clientes_table.setSelectionBehavior(QTableWidget.SelectRows)
+        # Filtro por nombre o documento
+        self.filtro_input = QLineEdit()
+        self.filtro_input.setFont(QFont("Arial", 15))
+        self.filtro_input.setPlaceholderText("Buscar por nombre o documento...")
+        self.filtro_input.setMinimumHeight(40)
+        self.filtro_input.textChanged.connect(self.filtrar)
+        layout.addWidget(self.filtro_input)
+
+        # Tabla de clientes: el modelo sigue al índice y el proxy filtra y ordena
+        self.modelo = ClientesModel(self.indice, self)
+        self.proxy = ClientesProxy(self.indice, self)
+        self.proxy.setSourceModel(self.modelo)
+
+        self.clientes_table = QTableView()
+        self.clientes_table.setModel(self.proxy)
+        header = self.clientes_table.horizontalHeader()
+        header.setStretchLastSection(True)
+        header.setSectionResizeMode(QHeaderView.Stretch)
+        header.setSectionResizeMode(ClientesModel.COL_VIP, QHeaderView.Fixed)
+        header.resizeSection(ClientesModel.COL_VIP, 80)
+        # Filas de altura fija: la vista no mide cada fila para ubicarlas
+        self.clientes_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.clientes_table.verticalHeader().setDefaultSectionSize(45)  # Altura original
+        self.clientes_table.verticalHeader().setVisible(False)
+        self.clientes_table.setSortingEnabled(True)
+        self.clientes_table.sortByColumn(ClientesModel.COL_NOMBRE, Qt.AscendingOrder)
+        self.clientes_table.setEditTriggers(QTableView.NoEditTriggers)
+        self.clientes_table.setSelectionMode(QTableView.SingleSelection)
+        self.clientes_table.setSelectionBehavior(QTableView.SelectRows)
         self.clientes_table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.clientes_table.customContextMenuRequested.connect(self.show_context_menu)
         self.clientes_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 font-size: 15px;  /* Tamaño de fuente original */
                 background-color: #f9f9f9;
                 alternate-background-color: #e1e1e1;
@@ -610,7 +686,7 @@ class Clientes(QWidget):
             }
         """)
         self.clientes_table.setAlternatingRowColors(True)
-        self.clientes_table.itemDoubleClicked.connect(self.abrir_modal_cliente)
+        self.clientes_table.doubleClicked.connect(self.abrir_modal_cliente)
         layout.addWidget(self.clientes_table)
 
         # Botón para agregar cliente
@@ -621,73 +697,31 @@ class Clientes(QWidget):
         layout.addWidget(self.agregar_button, alignment=Qt.AlignCenter)
 
     def load_clientes(self):
-        """Carga los clientes desde el archivo JSON y actualiza la tabla."""
-        if not os.path.exists(self.CLIENTES_FILE):
-            self.create_clientes_file()
-
+        """
+        Incorpora los cambios de los clientes hechos desde otras pantallas; la
+        tabla actualiza solo las filas que cambiaron. Retorna False si falló.
+        """
         try:
-            with open(self.CLIENTES_FILE, "r", encoding="utf-8") as file:
-                self.clientes = json.load(file)
-        except (json.JSONDecodeError, IOError) as e:
-            QMessageBox.critical(self, "Error", f"No se pudo cargar el archivo de clientes: {e}")
-            self.clientes = []
-
-        # Asegurarnos de que cada cliente tenga las claves "ticketsdeuda", "documento" y "vip"
-        for cliente in self.clientes:
-            if "ticketsdeuda" not in cliente:
-                cliente["ticketsdeuda"] = []
-            if "documento" not in cliente:
-                cliente["documento"] = ""
-            if "vip" not in cliente:
-                cliente["vip"] = False
-
-        self.save_clientes()  # Guarda cualquier cambio en la estructura
-
-        # Actualizar la interfaz
-        self.actualizar_tabla()
-
-    def actualizar_tabla(self):
-        """Actualiza la tabla de clientes."""
-        self.clientes_table.blockSignals(True)  # Bloquear señales para evitar recursiones
-        self.clientes_table.setRowCount(len(self.clientes))
-        for row, cliente in enumerate(self.clientes):
-            nombre_item = QTableWidgetItem(cliente["nombre"])
-            nombre_item.setTextAlignment(Qt.AlignCenter)
-            nombre_item.setFont(QFont("Arial", 15))  # Tamaño de fuente original
-
-            documento_item = QTableWidgetItem(cliente["documento"])
-            documento_item.setTextAlignment(Qt.AlignCenter)
-            documento_item.setFont(QFont("Arial", 15))  # Tamaño de fuente original
-
-            deuda_item = QTableWidgetItem(f"${cliente['deuda']:.2f}")
-            deuda_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            deuda_item.setFont(QFont("Arial", 15))  # Tamaño de fuente original
-
-            # Resaltar fila si es VIP
-            if cliente["vip"]:
-                nombre_item.setBackground(QColor(255, 255, 200))  # Amarillo claro
-                documento_item.setBackground(QColor(255, 255, 200))
-                deuda_item.setBackground(QColor(255, 255, 200))
-
-            self.clientes_table.setItem(row, 0, nombre_item)
-            self.clientes_table.setItem(row, 1, documento_item)
-            self.clientes_table.setItem(row, 2, deuda_item)
-
-            # Establecer una altura fija para todas las filas
-            self.clientes_table.setRowHeight(row, 45)  # Altura original
-
-        self.clientes_table.clearSelection()  # Limpiar selección para evitar señales
-        self.clientes_table.blockSignals(False)  # Desbloquear señales
-        self.clientes_table.repaint()
-
-    def abrir_modal_cliente(self, item):
+            self.indice.refrescar()
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"No se pudieron cargar los clientes: {e}")
+            return False
+        return True
+
+    def filtrar(self, texto):
+        self.proxy.filtrar(texto)
+
+    def cliente_en(self, indice_vista):
+        """Cliente de la fila de la vista (el proxy la traduce a la del modelo)."""
+        return self.modelo.cliente(self.proxy.mapToSource(indice_vista).row())
+
+    def abrir_modal_cliente(self, indice_vista):
         """Abre un modal para editar información del cliente seleccionado."""
-        row = item.row()
-        cliente = self.clientes[row]
+        # Los diálogos trabajan sobre una copia: el índice se actualiza al guardar
+        cliente = dict(self.cliente_en(indice_vista))
         modal = ClienteModal(
             cliente,
-            self.save_clientes,
-            self.actualizar_tabla,
+            self.guardar_cliente,
             self
         )
         modal.exec_()
@@ -699,62 +733,53 @@ class Clientes(QWidget):
             datos = dialog.get_datos()
 
             # Verificar si el documento ya existe (si no está vacío)
-            if datos["documento"]:
-                for cliente in self.clientes:
-                    if cliente["documento"] == datos["documento"]:
-                        QMessageBox.warning(
-                            self,
-                            "Error",
-                            f"Ya existe un cliente con el documento '{datos['documento']}'."
-                        )
-                        return
-
-            self.clientes.append(datos)
-            self.save_clientes()
-            self.load_clientes()
+            if datos["documento"] and self.indice.obtener_por_documento(datos["documento"]) is not None:
+                QMessageBox.warning(
+                    self,
+                    "Error",
+                    f"Ya existe un cliente con el documento '{datos['documento']}'."
+                )
+                return
+
+            self.guardar_cliente(datos)
         # Enfocar el botón después de agregar un cliente
         self.agregar_button.setFocus()
 
-    def eliminar_cliente(self, row):
+    def eliminar_cliente(self, indice_vista):
         """Elimina un cliente seleccionado."""
-        cliente = self.clientes[row]
+        cliente = self.cliente_en(indice_vista)
         respuesta = QMessageBox.question(
             self, "Eliminar Cliente", f"¿Está seguro de eliminar al cliente '{cliente['nombre']}'?",
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No
         )
         if respuesta == QMessageBox.Yes:
-            del self.clientes[row]
-            self.save_clientes()
-            self.load_clientes()
-
-    def save_clientes(self):
-        """Guarda la lista de clientes en el archivo JSON."""
-        try:
-            with open(self.CLIENTES_FILE, "w", encoding="utf-8") as file:
-                json.dump(self.clientes, file, indent=4, ensure_ascii=False)
-        except IOError as e:
-            QMessageBox.critical(self, "Error", f"No se pudo guardar el archivo de clientes: {e}")
-
-    def create_clientes_file(self):
-        """Crea un archivo JSON de clientes si no existe."""
+            try:
+                almacenamiento.eliminar_cliente(cliente["id"])
+                self.indice.refrescar(cliente["id"])
+            except sqlite3.Error as e:
+                QMessageBox.critical(self, "Error", f"No se pudo eliminar el cliente: {e}")
+
+    def guardar_cliente(self, cliente):
+        """Guarda los datos de un cliente en la base de datos. Retorna True si se guardó."""
         try:
-            os.makedirs(os.path.dirname(self.CLIENTES_FILE), exist_ok=True)
-            with open(self.CLIENTES_FILE, "w", encoding="utf-8") as file:
-                json.dump([], file, indent=4, ensure_ascii=False)
-        except IOError as e:
-            QMessageBox.critical(self, "Error", f"No se pudo crear el archivo de clientes: {e}")
+            almacenamiento.guardar_cliente(cliente)
+            self.indice.refrescar(cliente["id"])
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"No se pudo guardar el cliente: {e}")
+            return False
+        return True
 
     def show_context_menu(self, pos):
         """Muestra un menú contextual para editar o eliminar clientes."""
         context_menu = QMenu(self)
-        selected_row = self.clientes_table.rowAt(pos.y())
-        if selected_row >= 0:
+        indice_vista = self.clientes_table.indexAt(pos)
+        if indice_vista.isValid():
             editar_action = QAction("Editar Cliente", self)
-            editar_action.triggered.connect(lambda: self.abrir_modal_cliente(self.clientes_table.item(selected_row, 0)))
+            editar_action.triggered.connect(lambda: self.abrir_modal_cliente(indice_vista))
             context_menu.addAction(editar_action)
 
             eliminar_action = QAction("Eliminar Cliente", self)
-            eliminar_action.triggered.connect(lambda: self.eliminar_cliente(selected_row))
+            eliminar_action.triggered.connect(lambda: self.eliminar_cliente(indice_vista))
             context_menu.addAction(eliminar_action)
 
         context_menu.exec_(self.clientes_table.viewport().mapToGlobal(pos))
@@ -762,9 +787,9 @@ class Clientes(QWidget):
     def keyPressEvent(self, event):
         """Elimina un cliente seleccionado con la tecla Supr."""
         if event.key() == Qt.Key_Delete:
-            selected_row = self.clientes_table.currentRow()
-            if selected_row >= 0:
-                self.eliminar_cliente(selected_row)
+            indice_vista = self.clientes_table.currentIndex()
+            if indice_vista.isValid():
+                self.eliminar_cliente(indice_vista)
         else:
             super().keyPressEvent(event)
 
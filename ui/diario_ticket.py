@@ -0,0 +1,124 @@
+# ui/diario_ticket.py
+
+import json
+import os
+
+from PyQt5.QtCore import QObject, Qt
+
+from .modelo_ticket import LineaTicket
+from utils.persistencia import sincronizar_directorio
+
+RUTA_DIARIO = "./db/ticket_en_curso.jsonl"
+
+
+def leer_diario(ruta=RUTA_DIARIO):
+    """
+    Reconstruye las líneas del ticket en curso a partir del diario. Una última
+    línea incompleta (corte en medio de una escritura) se ignora.
+
+    :return: Tupla (lineas, numero_ticket): las LineaTicket (vacía si no hay
+             diario) y, si lo último que pasó fue empezar a guardar el ticket,
+             su número (el ticket pudo quedar guardado antes del cierre).
+    """
+    lineas, numero_ticket = [], None
+    try:
+        with open(ruta, "r", encoding="utf-8") as file:
+            for texto in file:
+                try:
+                    evento = json.loads(texto)
+                except json.JSONDecodeError:
+                    break
+                operacion = evento.get("op")
+                numero_ticket = evento.get("numero_ticket") if operacion == "guardando" else None
+                if operacion == "cargar":
+                    lineas = [LineaTicket.desde_dict(d) for d in evento["lineas"]]
+                elif operacion == "agregar":
+                    lineas.append(LineaTicket.desde_dict(evento["linea"]))
+                elif operacion == "cambiar":
+                    lineas[evento["fila"]] = LineaTicket.desde_dict(evento["linea"])
+                elif operacion == "quitar":
+                    del lineas[evento["fila"]]
+    except FileNotFoundError:
+        return [], None
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        print(f"Diario del ticket dañado, se recupera hasta el último evento válido: {e}")
+    return lineas, numero_ticket
+
+
+def borrar_diario(ruta=RUTA_DIARIO):
+    """Borra el diario (por ejemplo, al reiniciar la base de datos) para no ofrecer recuperar ese ticket."""
+    if os.path.exists(ruta):
+        os.remove(ruta)
+        sincronizar_directorio(os.path.dirname(os.path.abspath(ruta)))
+
+
+class DiarioTicket(QObject):
+    """
+    Diario de solo agregado del ticket en curso, para recuperarlo si la
+    aplicación se cierra de golpe o se corta la luz en medio de una venta.
+
+    Escucha las señales del TicketModel: cada línea agregada, cambiada o quitada
+    se escribe como un evento JSON de una línea y se sincroniza al disco (una
+    escritura de unos cientos de bytes). Cuando el modelo se vacía o se recarga
+    (ticket guardado, en espera o recuperado), el diario se reemplaza por una
+    foto del ticket, así nunca crece más allá de un ticket.
+    """
+
+    def __init__(self, modelo, ruta=RUTA_DIARIO, parent=None):
+        super().__init__(parent)
+        self.modelo = modelo
+        self.ruta = ruta
+        self._archivo = None
+        modelo.rowsInserted.connect(self._filas_agregadas)
+        modelo.rowsRemoved.connect(self._filas_quitadas)
+        modelo.dataChanged.connect(self._filas_cambiadas)
+        modelo.modelReset.connect(self.reescribir)
+
+    def _escribir(self, evento):
+        if self._archivo is None:
+            os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+            self._archivo = open(self.ruta, "a", encoding="utf-8")
+        self._archivo.write(json.dumps(evento, ensure_ascii=False) + "\n")
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+
+    def guardando(self, numero_ticket):
+        """Anota que el ticket se empezó a guardar con ese número."""
+        self._escribir({"op": "guardando", "numero_ticket": numero_ticket})
+
+    def _filas_agregadas(self, _parent, primera, ultima):
+        for fila in range(primera, ultima + 1):
+            self._escribir({"op": "agregar", "linea": self.modelo.linea(fila).a_dict()})
+
+    def _filas_quitadas(self, _parent, primera, ultima):
+        for fila in range(ultima, primera - 1, -1):
+            self._escribir({"op": "quitar", "fila": fila})
+
+    def _filas_cambiadas(self, arriba, abajo, roles=()):
+        if list(roles) == [Qt.BackgroundRole]:
+            return  # Solo cambió el resaltado
+        for fila in range(arriba.row(), abajo.row() + 1):
+            self._escribir({"op": "cambiar", "fila": fila, "linea": self.modelo.linea(fila).a_dict()})
+
+    def reescribir(self):
+        """Reemplaza el diario por una foto de las líneas actuales (o lo vacía)."""
+        self.cerrar()
+        lineas = [linea.a_dict() for linea in self.modelo.lineas]
+        if lineas:
+            # Se escribe como un único evento "cargar" para que leer_diario lo lea igual
+            temporal = self.ruta + ".foto"
+            with open(temporal, "w", encoding="utf-8") as file:
+                file.write(json.dumps({"op": "cargar", "lineas": lineas}, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporal, self.ruta)
+        elif os.path.exists(self.ruta):
+            os.remove(self.ruta)
+        else:
+            return
+        sincronizar_directorio(os.path.dirname(os.path.abspath(self.ruta)))
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
@@ -7,7 +7,10 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QFont, QIntValidator, QDoubleValidator
 from PyQt5.QtCore import Qt, QDate
 from datetime import datetime, timedelta
-import json
+import sqlite3
+
+from utils.indice_productos import obtener_indice
+from utils.precios import leer_fecha
 
 class Editar(QDialog):
     def __init__(self, parent=None, modo="agregar", producto=None, guardar_callback=None):
@@ -32,7 +35,7 @@ class Editar(QDialog):
 
     def init_ui(self):
         self.setWindowTitle("Editar Producto" if self.modo == "editar" else "Agregar Producto")
-        self.setFixedSize(600, 600)
+        self.setFixedSize(600, 760)
         self.setWindowModality(Qt.ApplicationModal)
 
         main_layout = QVBoxLayout()
@@ -60,6 +63,9 @@ class Editar(QDialog):
             ("Precio", "precio"),
             ("Fecha de Ingreso", "fecha_ingreso"),
             ("Fecha de Vencimiento", "fecha_vencimiento"),
+            ("Oferta (%)", "oferta"),
+            ("Oferta Desde (dd-mm-aaaa)", "oferta_desde"),  # Vacío: desde siempre
+            ("Oferta Hasta (dd-mm-aaaa)", "oferta_hasta"),  # Vacío: sin fin
         ]
         self.entries = {}
         self.labels = {}
@@ -287,12 +293,10 @@ class Editar(QDialog):
             self.mostrar_mensaje("El campo 'Código' no puede estar vacío.", "error", self.entries["codigo"])
             return
 
-        inventario = self.parent.inventario_data  # Acceder al inventario_data del padre
-
-        for producto in inventario:
-            if producto["codigo"].lower() == codigo:
-                self.mostrar_mensaje("Ya existe un producto con ese CÓDIGO.", "error", self.entries["codigo"])
-                return
+        # Consultar el índice compartido de productos
+        if codigo in obtener_indice():
+            self.mostrar_mensaje("Ya existe un producto con ese CÓDIGO.", "error", self.entries["codigo"])
+            return
 
         # Si el código es único, limpiar el mensaje de error
         self.message_label.clear()
@@ -332,13 +336,14 @@ class Editar(QDialog):
 
     def cargar_inventario(self):
         """
-        Carga el inventario desde el archivo JSON.
+        Carga el inventario desde el índice compartido de productos.
         """
+        indice = obtener_indice()
         try:
-            with open("./db/inventario.json", "r", encoding="utf-8") as file:
-                return json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
+            indice.refrescar()
+        except sqlite3.Error:
             return []
+        return [dict(p) for p in indice.productos()]
 
     def normalizar_fecha(self, fecha_str):
         """
@@ -423,11 +428,11 @@ class Editar(QDialog):
 
         # Validar unicidad de código y descripción si es agregar
         if self.modo == "agregar":
+            if cod_nuevo in obtener_indice():
+                self.mostrar_mensaje("Ya existe un producto con ese CÓDIGO.", "error", self.entries["codigo"])
+                return
             inventario = self.parent.inventario_data
             for prod in inventario:
-                if prod["codigo"].lower() == cod_nuevo:
-                    self.mostrar_mensaje("Ya existe un producto con ese CÓDIGO.", "error", self.entries["codigo"])
-                    return
                 if prod["descripcion"].upper() == desc_nuevo:
                     self.mostrar_mensaje("Ya existe un producto con esa DESCRIPCIÓN.", "error", self.entries["descripcion"])
                     return
@@ -469,6 +474,32 @@ class Editar(QDialog):
             else:
                 datos["precio"] = 0.0  # Asignar valor predeterminado
 
+            # Procesar la oferta (opcional) y sus fechas
+            if datos["oferta"]:
+                try:
+                    datos["oferta"] = float(datos["oferta"])
+                except ValueError:
+                    self.mostrar_mensaje("La 'Oferta' debe ser un número válido.", "error", self.entries["oferta"])
+                    return
+                if not 0 <= datos["oferta"] <= 100:
+                    self.mostrar_mensaje("La 'Oferta' debe estar entre 0 y 100.", "error", self.entries["oferta"])
+                    return
+            else:
+                datos["oferta"] = 0
+            fechas_oferta = {}
+            for key in ("oferta_desde", "oferta_hasta"):
+                try:
+                    fechas_oferta[key] = leer_fecha(datos[key])
+                except ValueError:
+                    self.mostrar_mensaje("La fecha de la oferta debe tener el formato dd-mm-aaaa.",
+                                         "error", self.entries[key])
+                    return
+            if (fechas_oferta["oferta_desde"] and fechas_oferta["oferta_hasta"]
+                    and fechas_oferta["oferta_desde"] > fechas_oferta["oferta_hasta"]):
+                self.mostrar_mensaje("La oferta no puede terminar antes de empezar.",
+                                     "error", self.entries["oferta_hasta"])
+                return
+
 
         except ValueError as ve:
             self.mostrar_mensaje(str(ve), "error")
@@ -481,9 +512,16 @@ class Editar(QDialog):
                 self.entries["cantidad"].setFocus()
             return
 
-        # Si es editar, asegurarse de que el código no cambie
+        # Si es editar, asegurarse de que el código no cambie y conservar las
+        # claves del producto que no están en el formulario
         if self.modo == "editar":
             datos["codigo"] = self.producto["codigo"]
+            datos = {**self.producto, **datos}
+
+        # Las fechas de oferta vacías no se guardan
+        for key in ("oferta_desde", "oferta_hasta"):
+            if not datos[key]:
+                datos.pop(key)
 
         # Enviar los datos al callback para ser guardados en el inventario principal
         if self.guardar_callback:
@@ -533,7 +571,7 @@ class Editar(QDialog):
                     widget.clear()
                     widget.setValidator(QDoubleValidator(0.0, 1000000.0, 2))  # Solo valores positivos
                     widget.setPlaceholderText("Ingrese el precio")
-                elif key in ["codigo", "descripcion"]:
+                elif key in ["codigo", "descripcion", "oferta", "oferta_desde", "oferta_hasta"]:
                     widget.clear()
             else:
                 if key in ["codigo", "descripcion", "costo", "precio"]:
@@ -6,6 +6,8 @@ from PyQt5.QtCore import Qt
 import json
 import shutil
 
+from utils.persistencia import escribir_json
+
 
 class EditarPerfil(QDialog):
     def __init__(self, parent=None, update_sidebar_callback=None):
@@ -145,10 +147,8 @@ class EditarPerfil(QDialog):
 
             # Guardar los cambios en los archivos si hubo modificaciones
             if updated_fields:
-                with open("./db/usuarios.json", "w") as users_file:
-                    json.dump(users, users_file, indent=4)
-                with open("./db/session.json", "w") as session_file:
-                    json.dump(session_data, session_file, indent=4)
+                escribir_json("./db/usuarios.json", users)
+                escribir_json("./db/session.json", session_data)
 
                 # Llamar al callback para actualizar el Sidebar
                 if self.update_sidebar_callback:
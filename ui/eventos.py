@@ -0,0 +1,36 @@
+# ui/eventos.py
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from utils.indice_productos import obtener_indice
+
+
+class BusEventos(QObject):
+    """
+    Señales compartidas entre las pantallas abiertas.
+
+    productos_cambiados se emite con (cambiados, eliminados) cada vez que el
+    índice de productos incorpora cambios de la base de datos, venga de donde
+    venga la modificación (una venta en Caja, una reposición, un informe...).
+    """
+
+    productos_cambiados = pyqtSignal(list, list)
+
+    def __init__(self, indice=None):
+        super().__init__()
+        self.indice = indice or obtener_indice()
+        self.indice.agregar_observador(self._al_cambiar_indice)
+
+    def _al_cambiar_indice(self, cambiados, eliminados):
+        self.productos_cambiados.emit(list(cambiados), list(eliminados))
+
+
+_bus = None
+
+
+def obtener_bus():
+    """Retorna la instancia compartida del bus de eventos."""
+    global _bus
+    if _bus is None:
+        _bus = BusEventos()
+    return _bus
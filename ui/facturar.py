@@ -1,35 +1,15 @@
 # ui/facturar.py
 
-import json
-import os
+import sqlite3
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QWidget, QButtonGroup, QInputDialog
+    QTableWidget, QTableWidgetItem, QMessageBox, QWidget, QButtonGroup
 )
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
-
-CLIENTES_FILE = "./db/clientes.json"
-
-
-def cargar_clientes():
-    """Carga los clientes desde el archivo JSON."""
-    if not os.path.exists(CLIENTES_FILE):
-        return []
-    try:
-        with open(CLIENTES_FILE, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
-
-
-def guardar_clientes(clientes):
-    """Guarda los clientes en el archivo JSON."""
-    try:
-        with open(CLIENTES_FILE, "w", encoding="utf-8") as file:
-            json.dump(clientes, file, indent=4, ensure_ascii=False)
-    except IOError:
-        QMessageBox.critical(None, "Error", "No se pudo guardar el archivo de clientes.")
+from .seleccion_cliente import SeleccionClienteDialog
+from utils.dinero import a_centavos, a_pesos, formatear, porcentaje
+from utils.indice_clientes import obtener_indice_clientes
 
 
 class FacturarDialog(QDialog):
@@ -37,12 +17,22 @@ class FacturarDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle("Facturación")
         self.setModal(True)
-        self.total = total
-        self.pagado = 0
+        # Los importes se llevan en centavos; pagado se acumula con cada pago
+        self.total_centavos = a_centavos(total)
+        self.pagado_centavos = 0
         self.pagos = []  # Lista de dicts: {"metodo": "Efectivo", "monto": 1000}
+        self.creditos = []  # Deudas a cargar al confirmar la venta: {"cliente_id": 1, "monto": 900, "descuento": 100}
         self.cambio = 0
         self.init_ui()
 
+    @property
+    def total(self):
+        return a_pesos(self.total_centavos)
+
+    @property
+    def pagado(self):
+        return a_pesos(self.pagado_centavos)
+
     def init_ui(self):
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -309,7 +299,7 @@ class FacturarDialog(QDialog):
         """Agrega un pago con el método seleccionado."""
         texto = self.pago_input.text().strip()
         try:
-            monto = float(texto)
+            monto = a_centavos(texto)
         except ValueError:
             QMessageBox.warning(self, "Error", "Monto inválido.")
             self.pago_input.setFocus()
@@ -319,7 +309,7 @@ class FacturarDialog(QDialog):
             self.pago_input.setFocus()
             return
 
-        restante = self.total - sum(p["monto"] for p in self.pagos)
+        restante = self.total_centavos - self.pagado_centavos
         # **Modificar la condición para permitir sobrepago solo en "Efectivo"**
         if metodo != "Efectivo" and monto > restante:
             QMessageBox.warning(self, "Error", f"El monto no puede exceder total.")
@@ -329,72 +319,70 @@ class FacturarDialog(QDialog):
         if metodo == "Crédito":
             self.gestionar_credito(monto)
         else:
-            self.pagos.append({"metodo": metodo, "monto": monto})
-            self.actualizar_tabla()
-            self.actualizar_resumen()
+            self.agregar_pago(metodo, monto)
 
         self.pago_input.clear()
         self.metodos_pago_placeholder.hide()
         for b in self.grupo_botones_pago.buttons():
             b.hide()
 
-        if self.pagado >= self.total:
+        if self.pagado_centavos >= self.total_centavos:
             self.confirmar_button.setFocus()
         else:
             self.pago_input.setFocus()
 
+    def agregar_pago(self, metodo, monto):
+        """Agrega un pago (monto en centavos) y actualiza la tabla y el resumen."""
+        self.pagos.append({"metodo": metodo, "monto": a_pesos(monto)})
+        self.pagado_centavos += monto
+        self.actualizar_tabla()
+        self.actualizar_resumen()
+
     def gestionar_credito(self, monto):
-        """Selecciona el cliente y añade la deuda, aplicando descuento si es VIP."""
-        clientes = cargar_clientes()
-        if not clientes:
+        """
+        Selecciona el cliente y prepara la deuda (monto en centavos), aplicando
+        descuento si es VIP. La deuda se guarda junto con el ticket, en la misma
+        transacción.
+        """
+        indice = obtener_indice_clientes()
+        try:
+            hay_clientes = len(indice) > 0
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"No se pudieron cargar los clientes: {e}")
+            return
+        if not hay_clientes:
             QMessageBox.warning(self, "Sin Clientes", "No hay clientes registrados.")
             return
 
-        nombres = [c["nombre"] for c in clientes]
-        cliente_sel, ok = QInputDialog.getItem(
-            self, "Seleccionar Cliente", "Seleccione el cliente:", nombres, editable=False
-        )
-        if ok and cliente_sel:
-            for c in clientes:
-                if c["nombre"] == cliente_sel:
-                    # Verificar si el cliente es VIP
-                    es_vip = c.get("vip", False)
-                    monto_original = monto
-                    if es_vip:
-                        monto *= 0.90  # Aplicar el 10% de descuento
-                        QMessageBox.information(
-                            self, "Descuento VIP",
-                            f"El cliente {cliente_sel} es VIP. Se aplicó un 10% de descuento: "
-                            f"De ${monto_original:.2f} a ${monto:.2f}."
-                        )
-                        # Ajustar el total del ticket
-                        self.total *= 0.90
-                        self.total_display.setText(f"${self.total:.2f}")
-                        self.actualizar_resumen()
-
-                    # Guardar el monto descontado en la deuda
-                    c["deuda"] += monto
-                    if "ticketsdeuda" not in c:
-                        c["ticketsdeuda"] = []
-
-                    # Tomar número de ticket del parent (Caja)
-                    caja_parent = self.parent()
-                    if hasattr(caja_parent, "ticket_numero"):
-                        c["ticketsdeuda"].append(caja_parent.ticket_numero)
-                    else:
-                        c["ticketsdeuda"].append("Desconocido")
-                    break
-
-            guardar_clientes(clientes)
+        dialogo = SeleccionClienteDialog(self, indice)
+        if dialogo.exec_() == QDialog.Accepted:
+            cliente = indice.obtener(dialogo.cliente_id)
+            cliente_sel = cliente["nombre"]
+            # Verificar si el cliente es VIP
+            es_vip = cliente.get("vip", False)
+            monto_original = monto
+            if es_vip:
+                monto -= porcentaje(monto, 10)  # Aplicar el 10% de descuento
+                QMessageBox.information(
+                    self, "Descuento VIP",
+                    f"El cliente {cliente_sel} es VIP. Se aplicó un 10% de descuento: "
+                    f"De ${formatear(monto_original)} a ${formatear(monto)}."
+                )
+                # Ajustar el total del ticket
+                self.total_centavos -= porcentaje(self.total_centavos, 10)
+                self.total_display.setText(f"${formatear(self.total_centavos)}")
+                self.actualizar_resumen()
+
+            # Cargar el monto descontado en la deuda al guardar el ticket
+            self.creditos.append({"cliente_id": cliente["id"], "monto": a_pesos(monto),
+                                  "descuento": a_pesos(monto_original - monto)})
 
             # Registrar el monto descontado en el ticket
-            self.pagos.append({"metodo": "Crédito", "monto": monto})  # Guardar monto con descuento
-            self.actualizar_tabla()
-            self.actualizar_resumen()
+            self.agregar_pago("Crédito", monto)  # Guardar monto con descuento
 
             QMessageBox.information(
                 self, "Crédito Registrado",
-                f"El monto ${monto:.2f} ha sido cargado al cliente {cliente_sel}."
+                f"El monto ${formatear(monto)} se cargará al cliente {cliente_sel} al confirmar la venta."
             )
 
     def actualizar_tabla(self):
@@ -410,10 +398,9 @@ class FacturarDialog(QDialog):
 
     def actualizar_resumen(self):
         """Calcula pagado vs total => restante/cambio => habilitar botón Confirmar."""
-        self.pagado = sum(p["monto"] for p in self.pagos)
-        restante = self.total - self.pagado
+        restante = self.total_centavos - self.pagado_centavos
         if restante > 0:
-            self.resumen_label.setText(f"Restante: ${restante:.2f}")
+            self.resumen_label.setText(f"Restante: ${formatear(restante)}")
             self.resumen_label.setStyleSheet("""
                 QLabel {
                     background-color: orange;
@@ -426,7 +413,7 @@ class FacturarDialog(QDialog):
             self.confirmar_button.setEnabled(False)
         else:
             cambio = abs(restante)
-            self.resumen_label.setText(f"Cambio: ${cambio:.2f}")
+            self.resumen_label.setText(f"Cambio: ${formatear(cambio)}")
             self.resumen_label.setStyleSheet("""
                 QLabel {
                     background-color: green;
@@ -440,11 +427,11 @@ class FacturarDialog(QDialog):
             self.confirmar_button.setFocus()
 
     def confirmar_factura(self):
-        if self.pagado < self.total and not any(p["metodo"] == "Efectivo" for p in self.pagos):
+        if self.pagado_centavos < self.total_centavos and not any(p["metodo"] == "Efectivo" for p in self.pagos):
             QMessageBox.warning(self, "Error", "El monto pagado es menor al total.")
             return
         self.metodos_pago = self.pagos.copy()
-        self.cambio = abs(self.total - self.pagado)
+        self.cambio = a_pesos(abs(self.total_centavos - self.pagado_centavos))
         self.accept()
 
     def get_pago_data(self):
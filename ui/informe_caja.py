@@ -1,7 +1,7 @@
 # ui/informe_caja.py
 
-import json
 import os
+import sqlite3
 from datetime import datetime
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
@@ -10,15 +10,71 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
 from fpdf import FPDF
+from .tareas import obtener_ejecutor
+from utils import almacenamiento
+from utils.dinero import a_centavos, a_pesos
+
+
+def calcular_resumen(tickets, operaciones, num_session):
+    """
+    Calcula los totales por método de pago y los ingresos/egresos de la sesión.
+    Se suman en centavos, así el cierre da exacto aunque haya miles de tickets.
+    """
+    centavos = dict.fromkeys(
+        ("total", "efectivo", "transferencia", "posnet", "crédito", "ingresos", "egresos"), 0
+    )
+    ingresos_detalle, egresos_detalle = [], []
+    metodos_validos = {"efectivo", "transferencia", "posnet", "crédito"}
+
+    for t in tickets:
+        centavos["total"] += a_centavos(t.get("monto", 0.0))
+        for p in t.get("pagos", []):
+            metodo = p.get("metodo", "").strip().lower()
+            if metodo in metodos_validos:
+                if metodo == "efectivo":
+                    centavos["efectivo"] += a_centavos(p.get("monto", 0.0)) - a_centavos(t.get("cambio", 0.0))
+                else:
+                    centavos[metodo] += a_centavos(p.get("monto", 0.0))
+
+    for r in operaciones:
+        if r.get("num_session", "").strip() == num_session:
+            tipo = r.get("tipo", "").lower().strip()
+            if tipo == "ingreso":
+                centavos["ingresos"] += a_centavos(r.get("monto", 0.0))
+                ingresos_detalle.append(r)
+            elif tipo == "gasto":
+                centavos["egresos"] += a_centavos(r.get("monto", 0.0))
+                egresos_detalle.append(r)
+
+    resumen = {clave: a_pesos(valor) for clave, valor in centavos.items()}
+    resumen["ingresos_detalle"] = ingresos_detalle
+    resumen["egresos_detalle"] = egresos_detalle
+    return resumen
+
+
+def preparar_cierre(num_session):
+    """
+    Lee los tickets y operaciones de la sesión y calcula el resumen del cierre.
+    Pensada para correr en el hilo de fondo.
+
+    :return: Tupla (tickets, resumen).
+    """
+    num_session = num_session.strip()
+    tickets = almacenamiento.cargar_tickets(num_session=num_session)
+    operaciones = almacenamiento.cargar_operaciones(num_session)
+    return tickets, calcular_resumen(tickets, operaciones, num_session)
+
 
 class InformeDeCaja(QDialog):
-    def __init__(self, num_session, cajero, tickets, notas, parent=None):
+    def __init__(self, num_session, cajero, tickets, notas, parent=None, resumen=None):
         super().__init__(parent)
         self.num_session = num_session.strip()
         self.cajero = cajero
         self.tickets = tickets
         self.notas = notas
-        self.ruta_json = "./db/cajas_rendidas.json"
+        self.resumen = resumen  # Si ya se calculó en segundo plano
+        self.ejecutor = obtener_ejecutor()
+        self.tareas_en_curso = 0
 
         # Quitar botones de cerrar, minimizar y maximizar
         self.setWindowFlags(Qt.Window | Qt.WindowTitleHint | Qt.CustomizeWindowHint)
@@ -53,7 +109,7 @@ class InformeDeCaja(QDialog):
         main_layout.addLayout(fecha_layout)
 
         # ------------------ RESUMEN POR MÉTODOS DE PAGO ------------------
-        resumen = self.calcular_resumen()
+        resumen = self.resumen if self.resumen is not None else self.calcular_resumen()
         resumen_table = QTableWidget()
         resumen_table.setRowCount(1)
         resumen_table.setColumnCount(4)  # Solo métodos de pago
@@ -182,72 +238,31 @@ class InformeDeCaja(QDialog):
         """)
         close_button.clicked.connect(self.accept)
         main_layout.addWidget(close_button)
+        self.close_button = close_button
 
         # ------------------ GUARDAR INFORME ------------------
         self.guardar_informe(resumen)
 
     def calcular_resumen(self):
         """Calcula los totales y detalles de métodos de pago."""
-        resumen = {
-            "total": 0.0,
-            "efectivo": 0.0,
-            "transferencia": 0.0,
-            "posnet": 0.0,
-            "crédito": 0.0,
-            "ingresos": 0.0,
-            "egresos": 0.0,
-            "ingresos_detalle": [],
-            "egresos_detalle": [],
-        }
-        metodos_validos = {"efectivo", "transferencia", "posnet", "crédito"}
-
-        for t in self.tickets:
-            monto_ticket = t.get("monto", 0.0)
-            resumen["total"] += monto_ticket
-            for p in t.get("pagos", []):
-                metodo = p.get("metodo", "").strip().lower()
-                if metodo in metodos_validos:
-                    if metodo == "efectivo":
-                        monto_real = p.get("monto", 0.0) - t.get("cambio", 0.0)
-                        resumen["efectivo"] += monto_real
-                    else:
-                        resumen[metodo] += p.get("monto", 0.0)
-
-        # Leer registro_operaciones
         registros = self.cargar_registro_operaciones()
         print(f"Operaciones Cargadas: {registros}")  # Mostrar en consola
-
-        for r in registros:
-            if r.get("num_session", "").strip() == self.num_session:
-                tipo = r.get("tipo", "").lower().strip()
-                if tipo == "ingreso":
-                    resumen["ingresos"] += r.get("monto", 0.0)
-                    resumen["ingresos_detalle"].append(r)
-                elif tipo == "gasto":
-                    resumen["egresos"] += r.get("monto", 0.0)
-                    resumen["egresos_detalle"].append(r)
-
+        resumen = calcular_resumen(self.tickets, registros, self.num_session)
         print(f"Resumen Calculado: {resumen}")  # Mostrar en consola
-
         return resumen
 
     def cargar_registro_operaciones(self):
-        ruta_op = "./db/registro_operaciones.json"
-        if os.path.exists(ruta_op):
-            try:
-                with open(ruta_op, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Error al leer registro_operaciones.json: {e}")
-                return []
-        print("registro_operaciones.json no existe.")
-        return []
+        try:
+            return almacenamiento.cargar_operaciones(self.num_session)
+        except sqlite3.Error as e:
+            print(f"Error al leer las operaciones: {e}")
+            return []
 
     def guardar_informe(self, resumen):
-        self.guardar_json(resumen)
-        self.generar_pdf(resumen)
-
-    def guardar_json(self, resumen):
+        """
+        Guarda el cierre en la base de datos y genera el PDF en segundo plano. El
+        botón Cerrar se habilita cuando ambas tareas terminan.
+        """
         caja_data = {
             "num_session": self.num_session,
             "cajero": self.cajero,
@@ -255,20 +270,33 @@ class InformeDeCaja(QDialog):
             "notas": self.notas,
             **resumen,
         }
-        try:
-            if os.path.exists(self.ruta_json):
-                with open(self.ruta_json, "r", encoding="utf-8") as file:
-                    cajas = json.load(file)
-            else:
-                cajas = []
-
-            cajas.append(caja_data)
-            with open(self.ruta_json, "w", encoding="utf-8") as file:
-                json.dump(cajas, file, indent=4)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo guardar el informe: {e}")
+        self.close_button.setEnabled(False)
+        self.close_button.setText("Guardando informe...")
+
+        self.tareas_en_curso = 2
+        tarea = self.ejecutor.enviar(almacenamiento.guardar_caja_rendida, caja_data)
+        tarea.al_terminar(self.tarea_terminada)
+        tarea.al_fallar(lambda e: self.tarea_terminada(error=f"No se pudo guardar el informe: {e}"))
+
+        tarea = self.ejecutor.enviar(self.generar_pdf, resumen)
+        tarea.al_terminar(self.tarea_terminada)
+        tarea.al_fallar(lambda e: self.tarea_terminada(error=f"No se pudo generar el PDF: {e}"))
+
+    def tarea_terminada(self, resultado=None, error=None):
+        if error:
+            QMessageBox.critical(self, "Error", error)
+        self.tareas_en_curso -= 1
+        if self.tareas_en_curso == 0:
+            self.close_button.setEnabled(True)
+            self.close_button.setText("Cerrar")
 
     def generar_pdf(self, resumen):
+        """
+        Escribe el PDF del cierre en ./rendiciones. Corre en el hilo de fondo: no
+        toca widgets y los errores se informan como excepciones.
+
+        :return: Ruta del PDF generado.
+        """
         carpeta = f"./rendiciones/{datetime.now().strftime('%Y%m%d')}-{self.cajero}"
         os.makedirs(carpeta, exist_ok=True)
         ruta_pdf = os.path.join(carpeta, f"cierre_caja_{self.num_session}.pdf")
@@ -346,7 +374,5 @@ class InformeDeCaja(QDialog):
         pdf.ln(10)
 
         # Guardar PDF
-        try:
-            pdf.output(ruta_pdf)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo generar el PDF: {e}")
+        pdf.output(ruta_pdf)
+        return ruta_pdf
@@ -0,0 +1,214 @@
+# ui/informe_ventas.py
+
+from datetime import date, timedelta
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QTableWidget,
+    QTableWidgetItem, QHeaderView, QMessageBox
+)
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt
+from .tareas import obtener_ejecutor
+from utils.dinero import a_centavos, formatear
+
+# Nombre y días hacia atrás de cada período (None: todo el historial)
+PERIODOS = [
+    ("Hoy", 0),
+    ("Últimos 7 días", 6),
+    ("Últimos 30 días", 29),
+    ("Últimos 90 días", 89),
+    ("Último año", 364),
+    ("Todo", None),
+]
+PERIODO_INICIAL = 2  # Últimos 30 días
+
+DERECHA = Qt.AlignRight | Qt.AlignVCenter
+
+
+class PestanaVentas(QWidget):
+    """
+    Base de las pestañas de ventas de Informes: un selector de período, un
+    resumen y una tabla. Las subclases definen COLUMNAS y filas(desde, hasta).
+
+    actualizar() incorpora las ventas nuevas en el hilo de fondo y después
+    muestra la tabla; cambiar el período solo vuelve a agrupar lo que ya está
+    en memoria.
+    """
+
+    COLUMNAS = []
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # NumPy se importa recién aquí: sin él, Informes abre igual y estas
+        # pestañas solo muestran el aviso
+        try:
+            from utils.analitica import obtener_analisis
+            self.analisis = obtener_analisis()
+        except ImportError as e:
+            self.analisis = None
+            self.error_importacion = e
+        self.ejecutor = obtener_ejecutor()
+        self.cargando = False
+        self.init_ui()
+        if self.analisis is None:
+            for combo in self.findChildren(QComboBox):
+                combo.setEnabled(False)
+            self.resumen_label.setText(f"El análisis de ventas necesita NumPy (pip install numpy): "
+                                       f"{self.error_importacion}")
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.opciones_layout = QHBoxLayout()
+        periodo_label = QLabel("Período:")
+        periodo_label.setFont(QFont("Arial", 14))
+        self.periodo_combo = QComboBox()
+        self.periodo_combo.setFont(QFont("Arial", 14))
+        for nombre, _dias in PERIODOS:
+            self.periodo_combo.addItem(nombre)
+        self.periodo_combo.setCurrentIndex(PERIODO_INICIAL)
+        self.periodo_combo.currentIndexChanged.connect(self.mostrar)
+        self.opciones_layout.addWidget(periodo_label)
+        self.opciones_layout.addWidget(self.periodo_combo)
+        self.opciones_layout.addStretch()
+        layout.addLayout(self.opciones_layout)
+
+        self.resumen_label = QLabel()
+        self.resumen_label.setFont(QFont("Arial", 14))
+        layout.addWidget(self.resumen_label)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNAS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNAS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setFont(QFont("Arial", 14))
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.setStyleSheet("""
+            QTableWidget::item:selected {
+                background-color: #b3ecff; /* Celeste claro */
+                color: black;
+            }
+            QHeaderView::section {
+                background-color: #d3d3d3;
+                font-weight: bold;
+                border: 1px solid black;
+                padding: 4px;
+            }
+        """)
+        layout.addWidget(self.table)
+
+    def rango(self):
+        """Días desde y hasta del período elegido (desde None: sin límite)."""
+        dias = PERIODOS[self.periodo_combo.currentIndex()][1]
+        hoy = date.today()
+        return (hoy - timedelta(days=dias) if dias is not None else None), hoy
+
+    def actualizar(self):
+        """Lee las ventas nuevas en segundo plano y vuelve a mostrar la tabla."""
+        if self.cargando or self.analisis is None:
+            return
+        self.cargando = True
+        self.resumen_label.setText("Cargando ventas...")
+        tarea = self.ejecutor.enviar(self.analisis.actualizar)
+        tarea.al_terminar(self.ventas_actualizadas)
+        tarea.al_fallar(self.error_actualizar)
+
+    def ventas_actualizadas(self, _nuevas):
+        self.cargando = False
+        self.mostrar()
+
+    def error_actualizar(self, error):
+        self.cargando = False
+        QMessageBox.critical(self, "Error", f"No se pudieron cargar las ventas: {error}")
+        self.mostrar()  # Con lo que ya estaba cargado
+
+    def mostrar(self, *args):
+        if self.analisis is None:
+            return
+        desde, hasta = self.rango()
+        filas, resumen = self.filas(desde, hasta)
+        self.table.setRowCount(len(filas))
+        for row, valores in enumerate(filas):
+            for col, (texto, alineacion) in enumerate(valores):
+                item = QTableWidgetItem(texto)
+                item.setTextAlignment(alineacion)
+                self.table.setItem(row, col, item)
+        self.resumen_label.setText(resumen)
+
+    def filas(self, desde, hasta):
+        """
+        :return: Tupla (filas, resumen): cada fila es una lista de (texto,
+                 alineación) por columna y el resumen va sobre la tabla.
+        """
+        raise NotImplementedError
+
+
+class MasVendidosTab(PestanaVentas):
+    """Los productos que más recaudaron (o que más veces se vendieron) en el período."""
+
+    COLUMNAS = ["Código", "Descripción", "Veces Vendido", "Cantidad", "Recaudado"]
+    LIMITE = 100
+    ORDENES = [("Recaudado", "subtotal"), ("Veces vendido", "lineas")]
+
+    def init_ui(self):
+        super().init_ui()
+        orden_label = QLabel("Ordenar por:")
+        orden_label.setFont(QFont("Arial", 14))
+        self.orden_combo = QComboBox()
+        self.orden_combo.setFont(QFont("Arial", 14))
+        for nombre, _clave in self.ORDENES:
+            self.orden_combo.addItem(nombre)
+        self.orden_combo.currentIndexChanged.connect(self.mostrar)
+        self.opciones_layout.insertWidget(2, orden_label)
+        self.opciones_layout.insertWidget(3, self.orden_combo)
+
+    def filas(self, desde, hasta):
+        por = self.ORDENES[self.orden_combo.currentIndex()][1]
+        productos = self.analisis.mas_vendidos(desde, hasta, limite=self.LIMITE, por=por)
+        filas = [[
+            (p["codigo"], Qt.AlignCenter),
+            (p["descripcion"], Qt.AlignLeft | Qt.AlignVCenter),
+            (str(p["lineas"]), DERECHA),
+            (f"{p['cantidad']:g}", DERECHA),
+            (f"${p['subtotal']:.2f}", DERECHA),
+        ] for p in productos]
+        return filas, f"Los {len(productos)} productos más vendidos del período."
+
+
+class VentasPorDiaTab(PestanaVentas):
+    """Tickets, líneas y recaudado de cada día del período, del más reciente al más antiguo."""
+
+    COLUMNAS = ["Día", "Tickets", "Líneas", "Recaudado", "Ticket Promedio"]
+
+    def filas(self, desde, hasta):
+        dias = self.analisis.por_dia(desde, hasta)[::-1]
+        filas = [[
+            (d["dia"].strftime("%d-%m-%Y"), Qt.AlignCenter),
+            (str(d["tickets"]), DERECHA),
+            (str(d["lineas"]), DERECHA),
+            (f"${d['subtotal']:.2f}", DERECHA),
+            (f"${d['subtotal'] / d['tickets']:.2f}" if d["tickets"] else "", DERECHA),
+        ] for d in dias]
+        total = sum(a_centavos(d["subtotal"]) for d in dias)
+        return filas, f"{len(dias)} días con ventas por ${formatear(total)} en total."
+
+
+class VentasPorCajeroTab(PestanaVentas):
+    """Tickets, líneas y recaudado de cada cajero en el período, del que más vendió al que menos."""
+
+    COLUMNAS = ["Cajero", "Tickets", "Líneas", "Recaudado", "Ticket Promedio"]
+
+    def filas(self, desde, hasta):
+        cajeros = self.analisis.por_cajero(desde, hasta)
+        filas = [[
+            (c["nombre"] or "(sin cajero)", Qt.AlignCenter),
+            (str(c["tickets"]), DERECHA),
+            (str(c["lineas"]), DERECHA),
+            (f"${c['subtotal']:.2f}", DERECHA),
+            (f"${c['subtotal'] / c['tickets']:.2f}" if c["tickets"] else "", DERECHA),
+        ] for c in cajeros]
+        total = sum(a_centavos(c["subtotal"]) for c in cajeros)
+        return filas, f"{len(cajeros)} cajeros vendieron ${formatear(total)} en total."
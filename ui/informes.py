@@ -1,6 +1,6 @@
 # ui/informes.py
 
-import json
+import sqlite3
 from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
@@ -10,6 +10,12 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QFont, QColor
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QTabWidget
+from .clientes import EstadoCuentaDialog
+from .informe_ventas import MasVendidosTab, VentasPorDiaTab, VentasPorCajeroTab
+from .eventos import obtener_bus
+from utils.indice_productos import obtener_indice
+from utils import almacenamiento
+from utils.dinero import a_centavos, formatear
 
 
 class EditarDescuentoDialog(QDialog):
@@ -129,6 +135,7 @@ class OfertarLoteDialog(QDialog):
 class Informes(QWidget):
     def __init__(self):
         super().__init__()
+        self.indice = obtener_indice()
 
         self.layout_principal = QVBoxLayout()
         self.setLayout(self.layout_principal)
@@ -162,6 +169,42 @@ class Informes(QWidget):
         self.tabs.addTab(self.tab_vencimientos, "Vencimientos")
         self.init_tab_vencimientos()
 
+        # Pestaña de Deudas por antigüedad
+        self.tab_deudas = QWidget()
+        self.tabs.addTab(self.tab_deudas, "Deudas")
+        self.init_tab_deudas()
+
+        # Pestañas de análisis de ventas: incorporan las ventas nuevas al abrirse
+        self.tabs_ventas = [MasVendidosTab(), VentasPorDiaTab(), VentasPorCajeroTab()]
+        for tab, nombre in zip(self.tabs_ventas, ["Más Vendidos", "Ventas por Día", "Ventas por Cajero"]):
+            self.tabs.addTab(tab, nombre)
+
+        # Las deudas y las ventas cambian con cada ticket: se recargan al abrir su pestaña
+        self.tabs.currentChanged.connect(self.al_cambiar_pestana)
+
+        # Los cambios de productos hechos en otras pantallas se cargan al volver a mostrar el informe
+        self.desactualizado = False
+        obtener_bus().productos_cambiados.connect(self.al_cambiar_productos)
+
+    def al_cambiar_productos(self, cambiados, eliminados):
+        if self.isVisible():
+            return  # Las acciones de esta página ya recargan el informe
+        self.desactualizado = True
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.desactualizado:
+            self.desactualizado = False
+            self.load_informe_vencimientos()
+        self.al_cambiar_pestana(self.tabs.currentIndex())
+
+    def al_cambiar_pestana(self, indice):
+        tab = self.tabs.widget(indice)
+        if tab is self.tab_deudas:
+            self.load_informe_deudas()
+        elif tab in self.tabs_ventas:
+            tab.actualizar()
+
     def init_tab_vencimientos(self):
         layout = QVBoxLayout()
         self.tab_vencimientos.setLayout(layout)
@@ -268,6 +311,8 @@ class Informes(QWidget):
             # Descripción
             desc_item = QTableWidgetItem(prod["descripcion"].upper())
             desc_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
+            # Guardar el código para ubicar el producto en el índice
+            desc_item.setData(Qt.UserRole, prod["codigo"])
             self.table_venc.setItem(row, 0, desc_item)
 
             # Precio
@@ -325,15 +370,17 @@ class Informes(QWidget):
 
             # Recorremos la tabla
             rows_cambiados = []
+            por_codigo = {p["codigo"]: p for p in inventario}
             for row in range(self.table_venc.rowCount()):
                 desc = self.table_venc.item(row, 0).text()
+                codigo = self.table_venc.item(row, 0).data(Qt.UserRole)
                 venc_str = self.table_venc.item(row, 3).text()
                 fecha_dt = self.parse_fecha(venc_str)
                 if fecha_dt:
                     dias = (fecha_dt - datetime.now()).days
                     if dias < 30:
                         # Obtener el producto desde inventario
-                        prod = next((p for p in inventario if p["descripcion"].upper() == desc), None)
+                        prod = por_codigo.get(codigo)
                         if prod:
                             precio_original = float(prod.get("precio", 0.0))
                             # Aplicar descuento
@@ -368,6 +415,7 @@ class Informes(QWidget):
         """
         descripciones_upper = set(d.upper() for d in descripciones)
 
+        cambiados = []
         for prod in inventario:
             if prod.get("descripcion", "").upper() in descripciones_upper:
                 # Aplicar descuento y redondear
@@ -375,11 +423,12 @@ class Informes(QWidget):
                 precio_descuento = precio_original * (1 - nuevo_descuento / 100)
                 precio_redondeado = self.round_up_price(precio_descuento)
                 prod["precio"] = precio_redondeado
+                cambiados.append(prod)
 
         try:
-            with open("./db/inventario.json", "w", encoding="utf-8") as file:
-                json.dump(inventario, file, indent=4)
-        except Exception as e:
+            almacenamiento.guardar_productos(cambiados)
+            self.indice.refrescar()
+        except sqlite3.Error as e:
             QMessageBox.critical(self, "Error", f"No se pudo guardar inventario: {e}")
 
     def on_table_doubleclick(self, item):
@@ -390,6 +439,7 @@ class Informes(QWidget):
             return  # Permitir doble clic en todas las columnas existentes
 
         desc = self.table_venc.item(row, 0).text()
+        codigo = self.table_venc.item(row, 0).data(Qt.UserRole)
         precio_actual_text = self.table_venc.item(row, 1).text()
         try:
             precio_actual = float(precio_actual_text)
@@ -416,7 +466,7 @@ class Informes(QWidget):
 
             # Obtener el inventario
             inventario = self.cargar_inventario()
-            prod = next((p for p in inventario if p["descripcion"].upper() == desc), None)
+            prod = next((p for p in inventario if p["codigo"] == codigo), None)
             if not prod:
                 QMessageBox.warning(self, "Aviso", "Producto no encontrado en inventario.")
                 return
@@ -427,11 +477,11 @@ class Informes(QWidget):
             # Actualizar en la tabla
             self.table_venc.item(row, 1).setText(f"{precio_redondeado:.2f}")
 
-            # Guardar en JSON
+            # Guardar en la base de datos
             try:
-                with open("./db/inventario.json", "w", encoding="utf-8") as file:
-                    json.dump(inventario, file, indent=4)
-            except Exception as e:
+                almacenamiento.guardar_producto(prod)
+                self.indice.refrescar()
+            except sqlite3.Error as e:
                 QMessageBox.critical(self, "Error", f"No se pudo guardar inventario: {e}")
                 return
 
@@ -492,11 +542,89 @@ class Informes(QWidget):
                 item.setBackground(QColor(color))
                 item.setForeground(texto_color)
 
+    # ------------------ DEUDAS POR ANTIGÜEDAD ------------------
+
+    def init_tab_deudas(self):
+        layout = QVBoxLayout()
+        self.tab_deudas.setLayout(layout)
+
+        self.resumen_deudas = QLabel()
+        self.resumen_deudas.setFont(QFont("Arial", 14))
+        self.resumen_deudas.setWordWrap(True)
+        layout.addWidget(self.resumen_deudas)
+
+        tramos = [f"{nombre} días" for nombre, _hasta in almacenamiento.TRAMOS_ANTIGUEDAD]
+        self.table_deudas = QTableWidget()
+        self.table_deudas.setColumnCount(len(tramos) + 4)
+        self.table_deudas.setHorizontalHeaderLabels(["Cliente"] + tramos + ["Sin Fecha", "Total", "Cargo Más Antiguo"])
+        self.table_deudas.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table_deudas.verticalHeader().setVisible(False)
+        self.table_deudas.setFont(QFont("Arial", 14))
+        self.table_deudas.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table_deudas.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table_deudas.setSelectionMode(QTableWidget.SingleSelection)
+        self.table_deudas.setStyleSheet("""
+            QTableWidget::item:selected {
+                background-color: #b3ecff; /* Celeste claro */
+                color: black;
+            }
+            QHeaderView::section {
+                background-color: #d3d3d3;
+                font-weight: bold;
+                border: 1px solid black;
+                padding: 4px;
+            }
+        """)
+        # Doble click para ver los movimientos del cliente
+        self.table_deudas.itemDoubleClicked.connect(self.ver_movimientos_cliente)
+        layout.addWidget(self.table_deudas)
+
+    def load_informe_deudas(self):
+        """
+        Muestra la deuda de cada cliente repartida por antigüedad (0-30, 31-60,
+        61-90 y más de 90 días), de la mayor a la menor.
+        """
+        try:
+            deudas = almacenamiento.antiguedad_deudas()
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"No se pudo cargar el informe de deudas: {e}")
+            return
+
+        tramos = [nombre for nombre, _hasta in almacenamiento.TRAMOS_ANTIGUEDAD]
+        columnas = tramos + ["sin_fecha", "deuda"]
+        totales = dict.fromkeys(columnas, 0)  # En centavos, como el resto de los totales
+        self.table_deudas.setRowCount(len(deudas))
+        for row, deuda in enumerate(deudas):
+            nombre_item = QTableWidgetItem(deuda["nombre"])
+            nombre_item.setData(Qt.UserRole, deuda)
+            self.table_deudas.setItem(row, 0, nombre_item)
+            for col, clave in enumerate(columnas, start=1):
+                totales[clave] += a_centavos(deuda[clave])
+                monto_item = QTableWidgetItem(f"${deuda[clave]:.2f}" if deuda[clave] else "")
+                monto_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                if clave == tramos[-1] and deuda[clave]:
+                    monto_item.setBackground(QColor("#FFA07A"))  # Naranja pastel: más de 90 días
+                self.table_deudas.setItem(row, col, monto_item)
+            fecha_item = QTableWidgetItem((deuda["mas_antigua"] or "")[:10])
+            fecha_item.setTextAlignment(Qt.AlignCenter)
+            self.table_deudas.setItem(row, len(columnas) + 1, fecha_item)
+
+        detalle = "   ".join(f"{nombre} días: ${formatear(totales[nombre])}" for nombre in tramos)
+        if totales["sin_fecha"]:
+            detalle += f"   Sin fecha: ${formatear(totales['sin_fecha'])}"
+        self.resumen_deudas.setText(
+            f"{len(deudas)} clientes deben ${formatear(totales['deuda'])} en total.   {detalle}"
+        )
+
+    def ver_movimientos_cliente(self, item):
+        deuda = self.table_deudas.item(item.row(), 0).data(Qt.UserRole)
+        EstadoCuentaDialog(deuda, self).exec_()
+
     def cargar_inventario(self):
-        """Retorna la lista del inventario."""
+        """Retorna una copia de la lista del inventario tomada del índice compartido."""
         try:
-            with open("./db/inventario.json", "r", encoding="utf-8") as file:
-                return json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
+            self.indice.refrescar()
+        except sqlite3.Error:
             QMessageBox.critical(self, "Error", "No se pudo cargar el inventario.")
             return []
+        return [dict(p) for p in self.indice.productos()]
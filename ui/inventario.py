@@ -1,63 +1,197 @@
 # ui/inventario.py
 
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QTableWidget, QPushButton,
-    QHeaderView, QMenu, QAction, QTableWidgetItem, QMessageBox, QFormLayout
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QTableView, QPushButton,
+    QHeaderView, QMenu, QAction, QMessageBox
 )
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt, QDate
-import json
+from PyQt5.QtCore import (
+    Qt, QTimer, QAbstractTableModel, QSortFilterProxyModel, QModelIndex
+)
+import sqlite3
 from datetime import datetime
 
 from .editar import Editar
 from .inventario_manual import InventarioManual
 from .reposicion import Reposicion
 from .inventario_automatico import InventarioAutomatico  # Importación agregada
+from .eventos import obtener_bus
+from utils.indice_productos import obtener_indice
+from utils import almacenamiento
 
 
-class NumericTableWidgetItem(QTableWidgetItem):
-    def __init__(self, value, is_float=False):
-        super().__init__(str(value))
-        self.is_float = is_float
-        try:
-            self.numeric_value = float(value) if is_float else int(value)
-        except ValueError:
-            self.numeric_value = 0.0 if is_float else 0
+# Rol con la clave de orden tipada de cada celda (números como números, fechas como fechas)
+ROL_ORDEN = Qt.UserRole + 1
 
-    def __lt__(self, other):
-        if isinstance(other, NumericTableWidgetItem):
-            return self.numeric_value < other.numeric_value
-        return super().__lt__(other)
+FILTRO_DEMORA_MS = 250  # Espera desde la última tecla antes de filtrar la tabla
 
 
-class DateTableWidgetItem(QTableWidgetItem):
-    def __init__(self, date_str):
-        super().__init__(date_str)
+def fecha_para_ordenar(fecha_str):
+    """
+    Convierte una fecha "dd-mm-aaaa" (o "aaaa-mm-dd") en un número de día para
+    ordenar. Las fechas vacías o inválidas quedan al final.
+    """
+    for formato in ("%d-%m-%Y", "%Y-%m-%d"):
         try:
-            self.date_value = datetime.strptime(date_str, "%d-%m-%Y")
-        except ValueError:
-            try:
-                self.date_value = datetime.strptime(date_str, "%Y-%m-%d")
-            except ValueError:
-                self.date_value = None
-
-    def __lt__(self, other):
-        if isinstance(other, DateTableWidgetItem):
-            if self.date_value is None:
-                return False
-            if other.date_value is None:
-                return True
-            return self.date_value < other.date_value
-        return super().__lt__(other)
+            return datetime.strptime(fecha_str, formato).toordinal()
+        except (TypeError, ValueError):
+            pass
+    return datetime.max.toordinal()
+
+
+class ModeloInventario(QAbstractTableModel):
+    """
+    Productos del inventario para un QTableView. La vista solo pide los datos de
+    las filas visibles, y los cambios se aplican fila por fila.
+    """
+
+    COLUMNAS = ["Código", "Descripción", "Cantidad", "Precio", "Fecha de Vencimiento"]
+    ALINEACIONES = [
+        Qt.AlignCenter,
+        Qt.AlignLeft | Qt.AlignVCenter,
+        Qt.AlignRight | Qt.AlignVCenter,
+        Qt.AlignRight | Qt.AlignVCenter,
+        Qt.AlignCenter,
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.productos = []
+        self._fechas = []  # Clave de orden de la fecha de vencimiento de cada fila
+        self._textos = []  # "codigo\ndescripcion" en minúsculas, para el filtro
+        self._fila_por_clave = {}
+
+    def cargar(self, productos):
+        """Reemplaza todos los productos del modelo."""
+        self.beginResetModel()
+        self.productos = list(productos)
+        self._fechas = [fecha_para_ordenar(p.get("fecha_vencimiento", "")) for p in self.productos]
+        self._textos = [self._texto(p) for p in self.productos]
+        self._reindexar()
+        self.endResetModel()
+
+    def actualizar(self, cambiados, eliminados):
+        """Aplica productos agregados o modificados y claves eliminadas."""
+        for producto in cambiados:
+            clave = producto["codigo"].lower()
+            fila = self._fila_por_clave.get(clave)
+            if fila is None:
+                fila = len(self.productos)
+                self.beginInsertRows(QModelIndex(), fila, fila)
+                self.productos.append(producto)
+                self._fechas.append(fecha_para_ordenar(producto.get("fecha_vencimiento", "")))
+                self._textos.append(self._texto(producto))
+                self._fila_por_clave[clave] = fila
+                self.endInsertRows()
+            else:
+                self.productos[fila] = producto
+                self._fechas[fila] = fecha_para_ordenar(producto.get("fecha_vencimiento", ""))
+                self._textos[fila] = self._texto(producto)
+                self.dataChanged.emit(self.index(fila, 0), self.index(fila, len(self.COLUMNAS) - 1))
+
+        filas = sorted((self._fila_por_clave[c] for c in eliminados if c in self._fila_por_clave),
+                       reverse=True)
+        for fila in filas:
+            self.beginRemoveRows(QModelIndex(), fila, fila)
+            del self.productos[fila]
+            del self._fechas[fila]
+            del self._textos[fila]
+            self.endRemoveRows()
+        if filas:
+            self._reindexar()
+
+    def producto(self, fila):
+        return self.productos[fila]
+
+    def coincide(self, fila, filtro):
+        """True si el código o la descripción de la fila contienen filtro (en minúsculas)."""
+        return filtro in self._textos[fila]
+
+    def _texto(self, producto):
+        return f"{producto['codigo']}\n{producto['descripcion']}".lower()
+
+    def _reindexar(self):
+        self._fila_por_clave = {p["codigo"].lower(): i for i, p in enumerate(self.productos)}
+
+    # ------------------ INTERFAZ DE QAbstractTableModel ------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.productos)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNAS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNAS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        producto = self.productos[index.row()]
+        col = index.column()
+
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return producto["codigo"]
+            if col == 1:
+                return producto["descripcion"]
+            if col == 2:
+                return str(int(producto["cantidad"]))  # Siempre entero
+            if col == 3:
+                return str(float(producto["precio"]))
+            return producto.get("fecha_vencimiento", "")
+        if role == ROL_ORDEN:
+            if col == 0:
+                return producto["codigo"]
+            if col == 1:
+                return producto["descripcion"]
+            if col == 2:
+                return int(producto["cantidad"])
+            if col == 3:
+                return float(producto["precio"])
+            return self._fechas[index.row()]
+        if role == Qt.TextAlignmentRole:
+            return int(self.ALINEACIONES[col])
+        if role == Qt.FontRole and col == 1 and producto.get("es_pesable", False):
+            # Los productos pesables se muestran en negrita
+            font = QFont("Arial", 14)
+            font.setBold(True)
+            return font
+        if role == Qt.UserRole:
+            return producto["codigo"]
+        return None
+
+
+class FiltroInventario(QSortFilterProxyModel):
+    """Filtra por código o descripción y ordena con las claves tipadas de ROL_ORDEN."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.filtro = ""
+        self.setSortRole(ROL_ORDEN)
+
+    def set_filtro(self, texto):
+        filtro = texto.strip().lower()
+        if filtro != self.filtro:
+            self.filtro = filtro
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self.filtro:
+            return True
+        return self.sourceModel().coincide(source_row, self.filtro)
 
 
 class Inventario(QWidget):
     def __init__(self):
         super().__init__()
-        self.inventario_data = []
+        self.indice = obtener_indice()
         self.init_ui()
         self.setFocusPolicy(Qt.StrongFocus)
         self.ventana_inventario_automatico = None
+        obtener_bus().productos_cambiados.connect(self.al_cambiar_productos)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -89,12 +223,19 @@ class Inventario(QWidget):
         top_layout.addWidget(self.search_input)
         top_layout.addStretch()
 
+        # Filtrar recién cuando se deja de escribir
+        self.filtro_timer = QTimer(self)
+        self.filtro_timer.setSingleShot(True)
+        self.filtro_timer.setInterval(FILTRO_DEMORA_MS)
+        self.filtro_timer.timeout.connect(self.aplicar_filtro)
+
         # Crear tabla
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)  # Número de columnas
-        self.table.setHorizontalHeaderLabels([
-            "Código", "Descripción", "Cantidad", "Precio", "Fecha de Vencimiento"
-        ])
+        self.modelo = ModeloInventario(self)
+        self.proxy = FiltroInventario(self)
+        self.proxy.setSourceModel(self.modelo)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
         self.table.setFont(QFont("Arial", 14))
 
         header_font = QFont("Arial", 16, QFont.Bold)
@@ -115,11 +256,13 @@ class Inventario(QWidget):
         self.table.setColumnWidth(4, 250)  # Fecha de Vencimiento
 
         self.table.verticalHeader().setVisible(False)
-        self.table.setStyleSheet("QTableWidget::item { padding: 10px; }")
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setStyleSheet("QTableView::item { padding: 10px; }")
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
         self.table.setSortingEnabled(True)
 
+        # Alto fijo: la vista no necesita medir cada fila
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table.verticalHeader().setDefaultSectionSize(40)
 
         layout.addWidget(self.table)
@@ -127,7 +270,7 @@ class Inventario(QWidget):
         # Menú contextual + doble clic
         self.table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.show_context_menu)
-        self.table.itemDoubleClicked.connect(self.on_double_click_item)
+        self.table.doubleClicked.connect(self.on_double_click_item)
 
         # Cargar datos
         self.load_data()
@@ -157,106 +300,72 @@ class Inventario(QWidget):
         darkened_rgb = tuple(max(0, min(255, int(c * factor))) for c in rgb)
         return f"#{darkened_rgb[0]:02x}{darkened_rgb[1]:02x}{darkened_rgb[2]:02x}"
 
+    @property
+    def inventario_data(self):
+        """Productos cargados en la tabla (sin filtrar)."""
+        return self.modelo.productos
+
     def load_data(self):
         """
-        Carga los datos desde inventario.json a self.inventario_data y actualiza la tabla.
+        Carga los datos desde la base de datos al modelo de la tabla.
         """
-        self.inventario_data = self.cargar_inventario()
-        self.populate_table()
+        self.modelo.cargar(self.cargar_inventario())
         self.focus_on_entry()
 
-    def on_search_text_changed(self, text):
+    def al_cambiar_productos(self, cambiados, eliminados):
         """
-        Actualiza la tabla en tiempo real según el texto de búsqueda.
+        Incorpora al modelo los productos modificados desde cualquier pantalla
+        (ventas, reposición, informes...). Solo se tocan esas filas.
         """
-        self.populate_table(filter_str=text)
+        try:
+            cambiados = [self.normalizar_producto(p) for p in cambiados]
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"Error en los datos del inventario: {e}")
+            return
+        self.modelo.actualizar(cambiados, eliminados)
 
-    def populate_table(self, filter_str=""):
+    def on_search_text_changed(self, text):
         """
-        Popula la tabla con los datos filtrados o completos.
+        Reinicia la espera para filtrar la tabla con el texto de búsqueda.
         """
-        self.table.setSortingEnabled(False)
+        self.filtro_timer.start()
 
-        filtro_l = filter_str.strip().lower()
-        if filtro_l:
-            data_filtrada = []
-            for p in self.inventario_data:
-                cod_l = p["codigo"].lower()
-                desc_l = p["descripcion"].lower()
-                if filtro_l in cod_l or filtro_l in desc_l:
-                    data_filtrada.append(p)
-        else:
-            data_filtrada = self.inventario_data[:]
-
-        self.table.setRowCount(len(data_filtrada))
-
-        for row, producto in enumerate(data_filtrada):
-            # Código
-            codigo = producto["codigo"]
-            codigo_item = QTableWidgetItem(codigo)
-            codigo_item.setTextAlignment(Qt.AlignCenter)
-            # Almacenar 'codigo' en Qt.UserRole para referencia futura
-            codigo_item.setData(Qt.UserRole, codigo)
-            self.table.setItem(row, 0, codigo_item)
-
-            # Descripción
-            desc_item = QTableWidgetItem(producto["descripcion"])
-            desc_item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-            # Verificar si el producto es pesable para aplicar negrita
-            if producto.get("es_pesable", False):
-                font = desc_item.font()
-                font.setBold(True)
-                desc_item.setFont(font)
-            self.table.setItem(row, 1, desc_item)
-
-            # Cantidad (Siempre entero)
-            cantidad_valor = producto["cantidad"]
-            cant_str = str(int(cantidad_valor))
-            cant_item = NumericTableWidgetItem(cant_str, is_float=False)
-            cant_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.table.setItem(row, 2, cant_item)
-
-            # Precio
-            precio_valor = float(producto["precio"])  # Convertir a float
-            precio_item = NumericTableWidgetItem(precio_valor, is_float=True)  # Indicar que es float
-
-            precio_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.table.setItem(row, 3, precio_item)
-
-            # Fecha de Vencimiento
-            fecha_venc = DateTableWidgetItem(producto.get("fecha_vencimiento", ""))
-            fecha_venc.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 4, fecha_venc)
-
-            # Debug: Mostrar los valores de cada producto
-            print(f"[DEBUG] Producto en fila {row}: {producto}")  # Debug
+    def aplicar_filtro(self):
+        self.proxy.set_filtro(self.search_input.text())
 
-        self.table.setSortingEnabled(True)
+    def codigo_en_fila(self, row):
+        """Código del producto en una fila de la vista (ordenada y filtrada)."""
+        index = self.proxy.index(row, 0)
+        if not index.isValid():
+            return None
+        return self.proxy.data(index, Qt.UserRole)
 
     def cargar_inventario(self):
         """
-        Carga el inventario desde el archivo JSON.
+        Carga el inventario desde el índice compartido de productos.
         """
         try:
-            with open("./db/inventario.json", "r", encoding="utf-8") as file:
-                inv = json.load(file)
-            for p in inv:
-                # Manejar 'cantidad' como int siempre
-                p['cantidad'] = int(p.get('cantidad', 0))
-                # 'costo' puede ser None
-                p['costo'] = float(p['costo']) if 'costo' in p and p['costo'] is not None else None
-                p['precio'] = float(p.get('precio', 0))  # Convertir siempre a float
-            return inv
-        except FileNotFoundError:
-            # Si el archivo no existe, retorna una lista vacía
-            return []
-        except json.JSONDecodeError as e:
-            QMessageBox.critical(self, "Error", f"Error al decodificar JSON: {e}")
+            self.indice.refrescar()
+            return [self.normalizar_producto(p) for p in self.indice.productos()]
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Error al leer la base de datos: {e}")
             return []
         except ValueError as e:
             QMessageBox.critical(self, "Error", f"Error en los datos del inventario: {e}")
             return []
 
+    def normalizar_producto(self, producto):
+        """
+        Retorna una copia del producto con los tipos que usa esta pantalla.
+        """
+        p = dict(producto)
+        # Manejar 'cantidad' como int siempre
+        p['cantidad'] = int(p.get('cantidad', 0))
+        # 'costo' puede ser None
+        p['costo'] = float(p['costo']) if 'costo' in p and p['costo'] is not None else None
+        p['precio'] = float(p.get('precio', 0))  # Convertir siempre a float
+        return p
+
     def show_context_menu(self, pos):
         """
         Muestra el menú contextual al hacer clic derecho en una fila.
@@ -277,29 +386,28 @@ class Inventario(QWidget):
 
         menu.exec_(self.table.mapToGlobal(pos))
 
-    def on_double_click_item(self, item):
+    def on_double_click_item(self, index):
         """
-        Maneja el doble clic en un ítem para editar el producto.
+        Maneja el doble clic en una celda para editar el producto.
         """
-        row = item.row()
-        self.editar_producto(row)
+        self.editar_producto(index.row())
 
     def editar_producto(self, row):
         """
         Abre el diálogo de edición para el producto seleccionado.
         """
         # Obtener el 'codigo' del producto en la fila seleccionada
-        codigo_item = self.table.item(row, 0)
-        if not codigo_item:
+        codigo = self.codigo_en_fila(row)
+        if codigo is None:
             QMessageBox.warning(self, "Advertencia", "No se pudo obtener el código del producto.")
             return
-        codigo = codigo_item.text()
 
-        # Buscar el producto en self.inventario_data por 'codigo'
-        producto = next((p for p in self.inventario_data if p["codigo"] == codigo), None)
+        # Buscar el producto en el índice por 'codigo'
+        producto = self.indice.obtener(codigo)
         if not producto:
             QMessageBox.warning(self, "Advertencia", f"No se encontró el producto con código '{codigo}'.")
             return
+        producto = self.normalizar_producto(producto)
 
         # Abrir el diálogo de edición con el producto encontrado
         dialog = Editar(
@@ -315,11 +423,10 @@ class Inventario(QWidget):
         Elimina el producto seleccionado del inventario.
         """
         # Obtener el 'codigo' del producto en la fila seleccionada
-        codigo_item = self.table.item(row, 0)
-        if not codigo_item:
+        codigo = self.codigo_en_fila(row)
+        if codigo is None:
             QMessageBox.warning(self, "Advertencia", "No se pudo obtener el código del producto.")
             return
-        codigo = codigo_item.text()
 
         resp = QMessageBox.question(
             self,
@@ -331,75 +438,60 @@ class Inventario(QWidget):
         if resp != QMessageBox.Yes:
             return
 
-        # Buscar el índice del producto en self.inventario_data por 'codigo'
-        index_to_delete = next((i for i, p in enumerate(self.inventario_data) if p["codigo"] == codigo), None)
-        if index_to_delete is None:
-            QMessageBox.warning(self, "Advertencia", f"No se encontró el producto con código '{codigo}'.")
+        # La tabla se actualiza con la señal productos_cambiados al refrescar el índice
+        try:
+            if not almacenamiento.eliminar_producto(codigo):
+                QMessageBox.warning(self, "Advertencia", f"No se encontró el producto con código '{codigo}'.")
+                return
+            self.indice.refrescar()
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"No se pudo eliminar el producto: {e}")
             return
 
-        # Eliminar el producto de self.inventario_data
-        del self.inventario_data[index_to_delete]
-
-        # Guardar en JSON
-        self.guardar_producto_en_json()
-
-        # Actualizar la tabla
-        self.populate_table()
-
-    def guardar_producto_en_json(self):
+    def guardar_producto_en_db(self, producto):
         """
-        Guarda los datos del inventario en el archivo JSON.
+        Guarda un producto en la base de datos.
+
+        :return: True si se guardó correctamente.
         """
+        # Convertir 'cantidad' a int siempre y manejar 'costo' como opcional
+        p_save = producto.copy()
+        p_save['cantidad'] = int(p_save['cantidad'])
+        p_save['precio'] = float(p_save['precio'])  # Asegurarse de que sea float
+        # Manejar 'costo': si es None, omitirlo
+        if p_save.get('costo') is not None:
+            p_save['costo'] = float(p_save['costo'])
+        else:
+            p_save.pop('costo', None)  # Eliminar si no existe
+        print(f"[DEBUG] Guardando Producto: {p_save}")  # Debug
+
         try:
-            with open("./db/inventario.json", "w", encoding="utf-8") as file:
-                # Convertir 'cantidad' a int siempre y manejar 'costo' como opcional
-                inv_to_save = []
-                for p in self.inventario_data:
-                    p_save = p.copy()
-                    p_save['cantidad'] = int(p_save['cantidad'])
-                    p_save['precio'] = float(p_save['precio'])  # Asegurarse de que sea float
-                    # Manejar 'costo': si es None, omitirlo
-                    if p_save.get('costo') is not None:
-                        p_save['costo'] = float(p_save['costo'])
-                    else:
-                        p_save.pop('costo', None)  # Eliminar si no existe
-                    inv_to_save.append(p_save)
-                    print(f"[DEBUG] Guardando Producto: {p_save}")  # Debug
-
-                json.dump(inv_to_save, file, indent=4, ensure_ascii=False)
-                print(f"[DEBUG] Inventario guardado exitosamente en 'inventario.json'")  # Debug
-        except Exception as e:
+            almacenamiento.guardar_producto(p_save)
+            self.indice.refrescar()
+        except sqlite3.Error as e:
             QMessageBox.critical(self, "Error", f"No se pudo guardar el inventario: {e}")
+            return False
+        return True
 
     def guardar_producto_callback(self, producto, modo):
         """
-        Callback para guardar un producto (agregar o editar) en self.inventario_data y sincronizar con JSON.
+        Callback para guardar un producto (agregar o editar) en la base de datos. La
+        tabla se actualiza con la señal productos_cambiados al refrescar el índice.
 
         :param producto: Diccionario con los datos del producto.
         :param modo: "agregar" o "editar".
         """
         if modo == "agregar":
             # Verificar si el código ya existe
-            for p in self.inventario_data:
-                if p["codigo"].lower() == producto["codigo"].lower():
-                    QMessageBox.warning(self, "Advertencia", f"El código '{producto['codigo']}' ya existe.")
-                    return
-            self.inventario_data.append(producto)
+            if producto["codigo"] in self.indice:
+                QMessageBox.warning(self, "Advertencia", f"El código '{producto['codigo']}' ya existe.")
+                return
+            self.guardar_producto_en_db(producto)
         elif modo == "editar":
-            # Buscar y actualizar el producto
-            for i, p in enumerate(self.inventario_data):
-                if p["codigo"].lower() == producto["codigo"].lower():
-                    self.inventario_data[i] = producto
-                    break
-            else:
+            if producto["codigo"] not in self.indice:
                 QMessageBox.warning(self, "Advertencia", "No se encontró el producto para editar.")
                 return
-
-        # Guardar los cambios en el JSON
-        self.guardar_producto_en_json()
-
-        # Actualizar la tabla
-        self.populate_table()
+            self.guardar_producto_en_db(producto)
 
     # -------- Métodos para abrir los formularios externos --------
     def abrir_formulario_agregar(self):
@@ -448,13 +540,13 @@ class Inventario(QWidget):
         if hasattr(self, 'search_input') and self.search_input.hasFocus():
             # Si estamos en el input y se presiona Down o Tab
             if event.key() in (Qt.Key_Down, Qt.Key_Tab):
-                if self.table.rowCount() > 0:
+                if self.proxy.rowCount() > 0:
                     self.table.setFocus()
-                    self.table.setCurrentCell(0, 0)
+                    self.table.setCurrentIndex(self.proxy.index(0, 0))
             else:
                 super().keyPressEvent(event)
         elif self.table.hasFocus():
-            current_row = self.table.currentRow()
+            current_row = self.table.currentIndex().row()
             if event.key() == Qt.Key_Up and current_row == 0:
                 # Regresar foco a search
                 self.table.clearSelection()
@@ -1,6 +1,6 @@
 # ui/inventario_automatico.py
 
-import json
+import sqlite3
 from datetime import datetime
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont, QIntValidator, QDoubleValidator
@@ -8,6 +8,8 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit, QPushButton,
     QMessageBox, QDateEdit, QSizePolicy  # Asegúrate de importar QSizePolicy
 )
+from utils.indice_productos import obtener_indice
+from utils import almacenamiento
 
 
 class InventarioAutomatico(QDialog):
@@ -162,12 +164,13 @@ class InventarioAutomatico(QDialog):
     # ---------- LÓGICA DE INVENTARIO / COMPLETER ----------
 
     def cargar_inventario(self):
-        """Carga el inventario desde inventario.json."""
+        """Carga una copia del inventario desde el índice compartido de productos."""
+        indice = obtener_indice()
         try:
-            with open("./db/inventario.json", "r", encoding="utf-8") as file:
-                return json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
+            indice.refrescar()
+        except sqlite3.Error:
             return []
+        return [dict(p) for p in indice.productos()]
 
     def build_lista_completa(self):
         """Construye la lista "CÓDIGO - DESCRIPCIÓN" para todas las entradas del inventario."""
@@ -225,7 +228,7 @@ class InventarioAutomatico(QDialog):
         self.precio_edit.clear()
 
     def guardar_cantidad(self):
-        """Establece la nueva cantidad y guarda en inventario.json."""
+        """Establece la nueva cantidad y guarda el producto."""
         if not self.producto_actual:
             QMessageBox.warning(self, "Advertencia", "No se ha seleccionado ningún producto.")
             return
@@ -284,11 +287,10 @@ class InventarioAutomatico(QDialog):
                 p["precio"] = nuevo_precio
                 break
 
-        # Guardar JSON
+        # Guardar en la base de datos
         try:
-            with open("./db/inventario.json", "w", encoding="utf-8") as file:
-                json.dump(self.inventario, file, indent=4)
-        except Exception as e:
+            almacenamiento.guardar_producto(p)
+        except sqlite3.Error as e:
             QMessageBox.critical(self, "Error", f"No se pudo guardar la información: {e}")
             return
 
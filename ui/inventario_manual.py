@@ -1,6 +1,6 @@
 # ui/inventario_manual.py
 
-import json
+import sqlite3
 from datetime import datetime, timedelta  # Importación correcta de datetime
 from PyQt5.QtCore import Qt, QStringListModel, QDate
 from PyQt5.QtGui import QFont, QIntValidator, QDoubleValidator
@@ -8,6 +8,8 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit, QPushButton,
     QMessageBox, QSpacerItem, QSizePolicy, QCompleter, QDateEdit
 )
+from utils.indice_productos import obtener_indice
+from utils import almacenamiento
 
 
 class InventarioManual(QDialog):
@@ -178,12 +180,13 @@ class InventarioManual(QDialog):
     # ---------- LÓGICA DE INVENTARIO / COMPLETER ----------
 
     def cargar_inventario(self):
-        """Carga el inventario desde inventario.json."""
+        """Carga una copia del inventario desde el índice compartido de productos."""
+        indice = obtener_indice()
         try:
-            with open("./db/inventario.json", "r", encoding="utf-8") as file:
-                return json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
+            indice.refrescar()
+        except sqlite3.Error:
             return []
+        return [dict(p) for p in indice.productos()]
 
     def build_lista_completa(self):
         """Construye la lista "CÓDIGO - DESCRIPCIÓN" para todas las entradas del inventario."""
@@ -200,7 +203,7 @@ class InventarioManual(QDialog):
         self.search_line.setReadOnly(True)
         # Localizar el producto real
         codigo = text.split(" - ")[0].strip()
-        producto = next((p for p in self.inventario if p["codigo"] == codigo), None)
+        producto = obtener_indice().obtener(codigo)
         if producto:
             self.asignar_producto(producto)
             # Enfocar el campo de cantidad
@@ -264,7 +267,7 @@ class InventarioManual(QDialog):
         self.precio_edit.clear()
 
     def guardar_cantidad(self):
-        """Establece la nueva cantidad y guarda en inventario.json."""
+        """Establece la nueva cantidad y guarda el producto."""
         if not self.producto_actual:
             QMessageBox.warning(self, "Advertencia", "No se ha seleccionado ningún producto.")
             return
@@ -323,11 +326,10 @@ class InventarioManual(QDialog):
                 p["precio"] = nuevo_precio
                 break
 
-        # Guardar JSON
+        # Guardar en la base de datos
         try:
-            with open("./db/inventario.json", "w", encoding="utf-8") as file:
-                json.dump(self.inventario, file, indent=4)
-        except Exception as e:
+            almacenamiento.guardar_producto(p)
+        except sqlite3.Error as e:
             QMessageBox.critical(self, "Error", f"No se pudo guardar la información: {e}")
             return
 
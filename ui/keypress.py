@@ -1,7 +1,11 @@
 # ui/keypress.py
 
-from PyQt5.QtCore import QObject, Qt
-from PyQt5.QtWidgets import QMainWindow
+import time
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, Qt, QEvent, QTimer
+from PyQt5.QtGui import QKeyEvent
+from PyQt5.QtWidgets import QMainWindow, QApplication
 
 class KeyPressHandler(QObject):
     def __init__(self, main_window: QMainWindow):
@@ -34,3 +38,99 @@ class KeyPressHandler(QObject):
                 return True
 
         return super().eventFilter(obj, event)
+
+
+class LectorEscaner(QObject):
+    """
+    Filtro de eventos de toda la aplicación que separa las lecturas del
+    escáner de lo que se escribe a mano.
+
+    El escáner "teclea" el código con menos de INTERVALO_MS entre tecla y tecla
+    y termina con Enter; una persona nunca escribe tan rápido. Mientras Caja
+    está en pantalla pero hay un diálogo abierto (cobro, ingresos, mensajes),
+    cada tecla se retiene un instante: si
+    llega la siguiente enseguida se sigue juntando, si no se le entrega al
+    widget que la iba a recibir. Un Enter rápido al final de MIN_LARGO teclas
+    o más es una lectura: se encola en lugar de llegar al diálogo, y la cola
+    se entrega a Caja cuando vuelve a tener el foco.
+    """
+
+    INTERVALO_MS = 40
+    MIN_LARGO = 4
+
+    def __init__(self, caja):
+        super().__init__(caja)
+        self.caja = caja
+        self.cola = []  # Lecturas que esperan a que Caja se libere
+        self._teclas = []  # (widget, QKeyEvent) retenidas de la posible lectura en curso
+        self._ultima = 0.0
+        self._reenviando = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.INTERVALO_MS)
+        self._timer.timeout.connect(self._soltar)
+        app = QApplication.instance()
+        app.installEventFilter(self)
+        app.focusChanged.connect(self._foco_cambiado)
+
+    def _capturando(self):
+        """Indica si las lecturas tienen que pasar por la cola: solo con un diálogo abierto sobre Caja."""
+        return self.caja.isVisible() and QApplication.activeModalWidget() is not None
+
+    def eventFilter(self, obj, event):
+        if (event.type() != QEvent.KeyPress or self._reenviando
+                or not obj.isWidgetType() or not self._capturando()):
+            return False
+
+        if event.isAutoRepeat():
+            # Una tecla sostenida repite tan rápido como el escáner, pero no es una lectura
+            self._soltar()
+            return False
+
+        ahora = time.monotonic()
+        rapida = self._teclas and (ahora - self._ultima) * 1000 <= self.INTERVALO_MS
+        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            if rapida and len(self._teclas) >= self.MIN_LARGO:
+                codigo = "".join(tecla.text() for _, tecla in self._teclas)
+                self._teclas = []
+                self._timer.stop()
+                self.cola.append(codigo)
+                QTimer.singleShot(0, self.drenar)
+                return True  # El Enter del escáner no acepta ni cierra el diálogo
+            self._soltar()
+            return False
+
+        texto = event.text()
+        if (texto and texto.isprintable()
+                and not event.modifiers() & (Qt.ControlModifier | Qt.AltModifier)):
+            if self._teclas and not rapida:
+                self._soltar()  # Hubo una pausa: lo anterior se escribió a mano
+            self._teclas.append((obj, QKeyEvent(event.type(), event.key(), event.modifiers(),
+                                                texto, False, event.count())))
+            self._ultima = ahora
+            self._timer.start()
+            return True
+
+        self._soltar()
+        return False
+
+    def _soltar(self):
+        """Entrega las teclas retenidas a los widgets que las iban a recibir."""
+        self._timer.stop()
+        teclas, self._teclas = self._teclas, []
+        self._reenviando = True
+        try:
+            for widget, tecla in teclas:
+                if not sip.isdeleted(widget):
+                    QApplication.sendEvent(widget, tecla)
+        finally:
+            self._reenviando = False
+
+    def _foco_cambiado(self, _anterior, _actual):
+        if self.cola:
+            QTimer.singleShot(0, self.drenar)
+
+    def drenar(self):
+        """Entrega a Caja las lecturas encoladas, mientras no haya un diálogo abierto."""
+        while self.cola and QApplication.activeModalWidget() is None:
+            self.caja.ingresar_lectura(self.cola.pop(0))
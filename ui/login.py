@@ -5,9 +5,12 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
 import json
-import os
+import sqlite3
 from datetime import datetime
 
+from utils import almacenamiento
+from utils.persistencia import escribir_json
+
 
 class Login(QDialog):
     def __init__(self, parent=None):
@@ -121,31 +124,16 @@ class Login(QDialog):
 
         # Guardar la sesión activa en session.json
         try:
-            with open("./db/session.json", "w", encoding="utf-8") as file:
-                json.dump({"logged_in": True, "current_user": usuario, "num_session": num_session}, file, indent=4)
+            escribir_json("./db/session.json", {"logged_in": True, "current_user": usuario, "num_session": num_session})
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudo guardar la sesión activa en session.json: {e}")
             return
 
-        # Registrar la sesión en sesiones.json
+        # Registrar la sesión en la base de datos
         try:
-            ruta_sesiones = "./db/sesiones.json"
-
-            # Cargar sesiones existentes o crear una lista nueva
-            if not os.path.exists(ruta_sesiones):
-                sesiones = []
-            else:
-                with open(ruta_sesiones, "r", encoding="utf-8") as file:
-                    sesiones = json.load(file)
-
-            # Agregar la nueva sesión
-            sesiones.append(sesion_data)
-
-            # Guardar el registro actualizado
-            with open(ruta_sesiones, "w", encoding="utf-8") as file:
-                json.dump(sesiones, file, indent=4)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo registrar la sesión en sesiones.json: {e}")
+            almacenamiento.registrar_sesion(sesion_data)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"No se pudo registrar la sesión: {e}")
 
     def enfocar_password(self):
         """
@@ -0,0 +1,237 @@
+# ui/modelo_clientes.py
+
+from bisect import bisect_left
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt5.QtGui import QFont, QColor
+
+from utils.indice_clientes import obtener_indice_clientes
+
+ROL_ID = Qt.UserRole  # Id del cliente de la fila
+MAX_CAMBIOS_FILA = 100  # Con más cambios juntos se recarga la tabla en lugar de ir fila por fila
+
+
+class _Invertida:
+    """Clave de orden invertida, para ubicar filas con bisect en orden descendente."""
+
+    __slots__ = ("clave",)
+
+    def __init__(self, clave):
+        self.clave = clave
+
+    def __lt__(self, otra):
+        return otra.clave < self.clave
+
+
+class ClientesModel(QAbstractTableModel):
+    """
+    Clientes del IndiceClientes para la tabla de la pantalla Clientes.
+
+    Observa el índice: cuando cambia un cliente (sus datos o su deuda) se avisa
+    solo su fila con dataChanged, y los clientes nuevos o eliminados agregan o
+    quitan su fila, sin rearmar la tabla. La vista solo pide los datos de las
+    filas visibles.
+
+    El orden lo resuelve el modelo con un sort de Python sobre las claves de
+    cada cliente (ordenar en el proxy consulta data() en cada comparación). Un
+    cliente que cambia se mueve a su lugar con una búsqueda binaria.
+    """
+
+    COLUMNAS = ["Nombre", "Documento", "VIP", "Deuda", "Último Movimiento"]
+    COL_NOMBRE, COL_DOCUMENTO, COL_VIP, COL_DEUDA, COL_ULTIMO = range(5)
+
+    COLOR_VIP = QColor(255, 255, 200)  # Amarillo claro
+
+    def __init__(self, indice=None, parent=None):
+        super().__init__(parent)
+        self.indice = indice or obtener_indice_clientes()
+        self.clientes = []
+        self._fila_por_id = {}
+        self._orden = None  # (columna, Qt.SortOrder) o None sin ordenar
+        self._fuente = QFont("Arial", 15)
+        self.indice.agregar_observador(self._al_cambiar_indice)
+
+    def cliente(self, fila):
+        return self.clientes[fila]
+
+    def recargar(self):
+        """Toma todos los clientes del índice, en el orden elegido."""
+        self.beginResetModel()
+        self.clientes = list(self.indice.clientes())
+        if self._orden is not None:
+            self.clientes.sort(key=self._clave_fila, reverse=self._orden[1] == Qt.DescendingOrder)
+        self._indexar()
+        self.endResetModel()
+
+    # ------------------ ORDEN ------------------
+
+    def valor_orden(self, cliente, col):
+        """Valor por el que se ordena la columna."""
+        if col == self.COL_NOMBRE:
+            return cliente.get("nombre", "").lower()
+        if col == self.COL_DOCUMENTO:
+            return cliente.get("documento", "")
+        if col == self.COL_VIP:
+            return 1 if cliente.get("vip", False) else 0
+        if col == self.COL_DEUDA:
+            return float(cliente.get("deuda", 0))
+        # Sin fecha ordena como el más antiguo
+        return cliente.get("ultimo_movimiento") or ""
+
+    def _clave_fila(self, cliente):
+        # El nombre y el id desempatan, así el orden no depende de cómo llegaron
+        return (self.valor_orden(cliente, self._orden[0]), cliente.get("nombre", "").lower(), cliente["id"])
+
+    def _clave_bisect(self, cliente):
+        clave = self._clave_fila(cliente)
+        return _Invertida(clave) if self._orden[1] == Qt.DescendingOrder else clave
+
+    def _posicion(self, cliente):
+        """Fila en la que va el cliente según el orden (al final si no hay orden)."""
+        if self._orden is None:
+            return len(self.clientes)
+        return bisect_left(self.clientes, self._clave_bisect(cliente), key=self._clave_bisect)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._orden = (column, order)
+        self.layoutAboutToBeChanged.emit()
+        anteriores = self.persistentIndexList()
+        ids = [self.clientes[i.row()]["id"] for i in anteriores]
+        self.clientes.sort(key=self._clave_fila, reverse=order == Qt.DescendingOrder)
+        self._indexar()
+        self.changePersistentIndexList(
+            anteriores, [self.index(self._fila_por_id[i], a.column()) for i, a in zip(ids, anteriores)]
+        )
+        self.layoutChanged.emit()
+
+    # ------------------ CAMBIOS DEL ÍNDICE ------------------
+
+    def _al_cambiar_indice(self, cambiados, eliminados):
+        if len(cambiados) + len(eliminados) > MAX_CAMBIOS_FILA:
+            self.recargar()
+            return
+
+        for id_cliente in eliminados:
+            fila = self._fila_por_id.pop(id_cliente, None)
+            if fila is None:
+                continue
+            self.beginRemoveRows(QModelIndex(), fila, fila)
+            del self.clientes[fila]
+            self.endRemoveRows()
+            self._indexar(fila)
+
+        for cliente in cambiados:
+            fila = self._fila_por_id.get(cliente["id"])
+            if fila is None:
+                fila = self._posicion(cliente)
+                self.beginInsertRows(QModelIndex(), fila, fila)
+                self.clientes.insert(fila, cliente)
+                self.endInsertRows()
+                self._indexar(fila)
+            else:
+                self._reubicar(fila, cliente)
+
+    def _reubicar(self, fila, cliente):
+        """Reemplaza el cliente de la fila y, si cambió su lugar en el orden, mueve la fila."""
+        anterior = self.clientes.pop(fila)
+        nueva = self._posicion(cliente)
+        self.clientes.insert(fila, anterior)
+        if nueva != fila:
+            # beginMoveRows cuenta el destino antes de sacar la fila
+            self.beginMoveRows(QModelIndex(), fila, fila, QModelIndex(), nueva if nueva < fila else nueva + 1)
+            del self.clientes[fila]
+            self.clientes.insert(nueva, cliente)
+            self.endMoveRows()
+            self._indexar(min(fila, nueva))
+        else:
+            self.clientes[fila] = cliente
+        self.dataChanged.emit(self.index(nueva, 0), self.index(nueva, len(self.COLUMNAS) - 1))
+
+    def _indexar(self, desde=0):
+        """Rearma las filas por id desde la fila indicada (cambian al agregar, quitar o mover)."""
+        for fila in range(desde, len(self.clientes)):
+            self._fila_por_id[self.clientes[fila]["id"]] = fila
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.clientes)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNAS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNAS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        cliente = self.clientes[index.row()]
+        col = index.column()
+
+        if role == Qt.DisplayRole:
+            if col == self.COL_NOMBRE:
+                return cliente.get("nombre", "")
+            if col == self.COL_DOCUMENTO:
+                return cliente.get("documento", "")
+            if col == self.COL_VIP:
+                return "VIP" if cliente.get("vip", False) else ""
+            if col == self.COL_DEUDA:
+                return f"${float(cliente.get('deuda', 0)):.2f}"
+            if col == self.COL_ULTIMO:
+                return cliente.get("ultimo_movimiento") or ""
+        elif role == ROL_ID:
+            return cliente["id"]
+        elif role == Qt.TextAlignmentRole:
+            if col == self.COL_DEUDA:
+                return Qt.AlignRight | Qt.AlignVCenter
+            return Qt.AlignCenter
+        elif role == Qt.BackgroundRole:
+            if cliente.get("vip", False):
+                return self.COLOR_VIP
+        elif role == Qt.FontRole:
+            return self._fuente
+        return None
+
+
+class ClientesProxy(QSortFilterProxyModel):
+    """
+    Filtra con el texto de búsqueda y pasa el orden al ClientesModel. El filtro
+    lo resuelve el índice de clientes una vez por texto (prefijos del nombre o
+    del documento) y cada fila solo consulta si su id quedó.
+    """
+
+    def __init__(self, indice=None, parent=None):
+        super().__init__(parent)
+        self.indice = indice or obtener_indice_clientes()
+        self.setDynamicSortFilter(True)
+        self._texto = ""
+        self._ids = None  # Ids que pasan el filtro; None muestra todos
+        self.indice.agregar_observador(self._al_cambiar_indice)
+
+    def filtrar(self, texto):
+        self._texto = texto.strip()
+        self._actualizar_ids()
+        self.invalidateFilter()
+
+    def _actualizar_ids(self):
+        if self._texto:
+            self._ids = {c["id"] for c in self.indice.buscar(self._texto)}
+        else:
+            self._ids = None
+
+    def _al_cambiar_indice(self, cambiados, eliminados):
+        # Un cliente nuevo o renombrado puede entrar o salir del filtro
+        if self._texto and cambiados:
+            self._actualizar_ids()
+            self.invalidateFilter()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # El proxy respeta el orden de las filas del modelo
+        self.sourceModel().sort(column, order)
+
+    def filterAcceptsRow(self, fila, parent):
+        if self._ids is None:
+            return True
+        indice = self.sourceModel().index(fila, 0, parent)
+        return self.sourceModel().data(indice, ROL_ID) in self._ids
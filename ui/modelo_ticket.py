@@ -0,0 +1,278 @@
+# ui/modelo_ticket.py
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QFont, QColor
+from utils.dinero import a_centavos, a_pesos, formatear
+from utils.precios import precio_efectivo
+
+
+class LineaTicket:
+    """
+    Una línea del ticket con sus valores ya tipados. Los productos pesables se
+    venden en gramos ("g") y el resto por unidad ("und"); el subtotal se guarda
+    en centavos para que el total se pueda sumar y restar sin error.
+    """
+
+    __slots__ = ("codigo", "descripcion", "es_pesable", "cantidad", "precio", "subtotal_centavos")
+
+    def __init__(self, codigo, descripcion, es_pesable, cantidad, precio):
+        self.codigo = codigo
+        self.descripcion = descripcion
+        self.es_pesable = es_pesable
+        self.cantidad = cantidad
+        self.precio = precio  # Precio efectivo (con oferta) por kilo o por unidad
+        self.subtotal_centavos = 0
+        self.recalcular()
+
+    @classmethod
+    def desde_producto(cls, producto, cantidad, precio=None):
+        """Línea del producto; sin precio, se calcula el efectivo de hoy."""
+        return cls(
+            producto["codigo"],
+            producto["descripcion"].upper(),
+            bool(producto.get("es_pesable", False)),
+            cantidad,
+            precio if precio is not None else precio_efectivo(producto),
+        )
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye una línea guardada con a_dict()."""
+        return cls(datos["codigo"], datos["descripcion"], datos["es_pesable"],
+                   datos["cantidad"], datos["precio"])
+
+    def a_dict(self):
+        """Datos de la línea para guardarla en disco (tickets en espera, diario)."""
+        return {
+            "codigo": self.codigo,
+            "descripcion": self.descripcion,
+            "es_pesable": self.es_pesable,
+            "cantidad": self.cantidad,
+            "precio": self.precio,
+        }
+
+    @property
+    def clave(self):
+        """Identifica las líneas que se suman en una sola: mismo producto y unidad."""
+        return (self.codigo.lower(), self.unidad)
+
+    @property
+    def unidad(self):
+        return "g" if self.es_pesable else "und"
+
+    @property
+    def subtotal(self):
+        return a_pesos(self.subtotal_centavos)
+
+    def recalcular(self):
+        """Recalcula el subtotal a partir de la cantidad y el precio."""
+        if self.es_pesable:
+            subtotal = (self.cantidad / 1000) * self.precio  # Gramos a kilos
+        else:
+            subtotal = self.cantidad * self.precio
+        self.subtotal_centavos = a_centavos(subtotal)
+
+    def a_articulo(self):
+        """Retorna la línea con el formato de "articulos" del ticket."""
+        return {
+            "codigo": self.codigo,
+            "descripcion": self.descripcion,
+            "cantidad": int(self.cantidad),
+            "precio_unitario": a_pesos(a_centavos(self.precio)),
+            "subtotal": self.subtotal,
+        }
+
+
+class TicketModel(QAbstractTableModel):
+    """
+    Líneas del ticket de Caja. Mantiene el total en centavos y lo actualiza con
+    la diferencia de cada cambio, sin recorrer las demás líneas.
+
+    Se pueden editar la cantidad y, en los pesables, el subtotal (se recalcula
+    la cantidad de gramos).
+
+    Con fusionar=True, agregar_o_sumar suma las lecturas repetidas de un producto
+    a su línea en lugar de agregar otra.
+    """
+
+    COLUMNAS = ["Código", "Descripción", "Cantidad", "Precio", "Subtotal"]
+    COL_CANTIDAD = 2
+    COL_SUBTOTAL = 4
+
+    total_cambiado = pyqtSignal()
+    error = pyqtSignal(str)  # Mensaje para el banner de Caja
+
+    COLOR_RESALTADO = QColor("#fff3a0")
+
+    def __init__(self, parent=None, fusionar=True):
+        super().__init__(parent)
+        self.lineas = []
+        self.total_centavos = 0
+        self.fusionar = fusionar
+        self._fila_por_clave = {}  # (clave, precio) -> última fila con ese producto, unidad y precio
+        self.resaltada = None  # Fila que se muestra resaltada (la última leída)
+
+    def total(self):
+        return a_pesos(self.total_centavos)
+
+    def linea(self, fila):
+        return self.lineas[fila]
+
+    def agregar(self, linea):
+        """Agrega una línea al final y retorna su fila."""
+        fila = len(self.lineas)
+        self.beginInsertRows(QModelIndex(), fila, fila)
+        self.lineas.append(linea)
+        self.endInsertRows()
+        self._fila_por_clave[(linea.clave, linea.precio)] = fila
+        self.total_centavos += linea.subtotal_centavos
+        self.total_cambiado.emit()
+        return fila
+
+    def agregar_o_sumar(self, linea):
+        """
+        Suma la cantidad de linea a la del mismo producto y unidad si ya está en
+        el ticket con el mismo precio; si no, la agrega al final.
+
+        :return: Tupla (fila, sumada).
+        """
+        # Con el precio en la clave, un cambio de precio a mitad del ticket abre
+        # otra línea y las lecturas siguientes se siguen sumando en ella
+        fila = self._fila_por_clave.get((linea.clave, linea.precio)) if self.fusionar else None
+        if fila is None:
+            return self.agregar(linea), False
+        existente = self.lineas[fila]
+        anterior = existente.subtotal_centavos
+        existente.cantidad += linea.cantidad
+        existente.recalcular()
+        self.linea_cambiada(fila, anterior)
+        return fila, True
+
+    def quitar(self, fila):
+        self.beginRemoveRows(QModelIndex(), fila, fila)
+        linea = self.lineas.pop(fila)
+        self.endRemoveRows()
+        self.resaltada = None
+        self._indexar()
+        self.total_centavos -= linea.subtotal_centavos
+        self.total_cambiado.emit()
+
+    def limpiar(self):
+        self.beginResetModel()
+        self.lineas = []
+        self._fila_por_clave = {}
+        self.resaltada = None
+        self.endResetModel()
+        self.total_centavos = 0
+        self.total_cambiado.emit()
+
+    def cargar(self, lineas):
+        """Reemplaza las líneas del ticket (por ejemplo, al recuperar uno en espera)."""
+        self.beginResetModel()
+        self.lineas = list(lineas)
+        self.resaltada = None
+        self._indexar()
+        self.endResetModel()
+        self.total_centavos = sum(linea.subtotal_centavos for linea in self.lineas)
+        self.total_cambiado.emit()
+
+    def _indexar(self):
+        """Rearma el índice de líneas por clave y precio (las filas cambian al quitar una)."""
+        self._fila_por_clave = {(linea.clave, linea.precio): fila for fila, linea in enumerate(self.lineas)}
+
+    def resaltar(self, fila):
+        """Resalta la fila (o ninguna, con None)."""
+        anteriores = [f for f in (self.resaltada, fila) if f is not None]
+        self.resaltada = fila
+        for f in anteriores:
+            self.dataChanged.emit(self.index(f, 0), self.index(f, len(self.COLUMNAS) - 1),
+                                  [Qt.BackgroundRole])
+
+    def linea_cambiada(self, fila, anterior_centavos):
+        """Avisa que la línea de fila cambió, con el subtotal que tenía antes."""
+        self.total_centavos += self.lineas[fila].subtotal_centavos - anterior_centavos
+        self.dataChanged.emit(self.index(fila, 0), self.index(fila, len(self.COLUMNAS) - 1))
+        self.total_cambiado.emit()
+
+    def articulos(self):
+        """Retorna las líneas con el formato de "articulos" del ticket."""
+        return [linea.a_articulo() for linea in self.lineas]
+
+    # ------------------ INTERFAZ DE QAbstractTableModel ------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lineas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNAS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNAS[section]
+        if role == Qt.FontRole and orientation == Qt.Horizontal:
+            return QFont("Arial", 14, QFont.Bold)
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if index.column() in (self.COL_CANTIDAD, self.COL_SUBTOTAL):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        linea = self.lineas[index.row()]
+        col = index.column()
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return linea.codigo
+            if col == 1:
+                return linea.descripcion
+            if col == 2:
+                return f"{int(linea.cantidad)} {linea.unidad}"
+            if col == 3:
+                return f"{linea.precio:.2f}"
+            return formatear(linea.subtotal_centavos)
+        if role == Qt.EditRole:
+            if col == self.COL_CANTIDAD:
+                return str(int(linea.cantidad))
+            if col == self.COL_SUBTOTAL:
+                return formatear(linea.subtotal_centavos)
+        if role == Qt.UserRole and col == self.COL_CANTIDAD:
+            return linea.unidad
+        if role == Qt.BackgroundRole and index.row() == self.resaltada:
+            return self.COLOR_RESALTADO
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        fila = index.row()
+        linea = self.lineas[fila]
+        texto = str(value).replace(" g", "").replace(" und", "").strip()
+        try:
+            if index.column() == self.COL_CANTIDAD:
+                cantidad = int(texto)
+                if cantidad <= 0:
+                    raise ValueError
+                anterior = linea.subtotal_centavos
+                linea.cantidad = cantidad
+                linea.recalcular()
+            elif index.column() == self.COL_SUBTOTAL:
+                if not linea.es_pesable:
+                    self.error.emit("NO SE PUEDE SUBTOTAL EN PRODUCTOS NO PESABLES.")
+                    return False
+                subtotal = float(texto)
+                if subtotal <= 0 or linea.precio <= 0:
+                    raise ValueError
+                anterior = linea.subtotal_centavos
+                linea.cantidad = int((subtotal / linea.precio) * 1000)  # Kilos a gramos
+                linea.recalcular()
+            else:
+                return False
+        except ValueError:
+            self.error.emit("VALOR INVÁLIDO, REVISE CAMPOS.")
+            return False
+        self.linea_cambiada(fila, anterior)
+        return True
@@ -2,19 +2,19 @@
 
 import os
 import json
+import sqlite3
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox,
     QComboBox, QFormLayout
 )
 from PyQt5.QtGui import QFont, QColor
 from PyQt5.QtCore import Qt
+from utils import almacenamiento
 
 # Rutas de los archivos
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_DIR = os.path.join(BASE_DIR, "db")
-OPERACIONES_FILE = os.path.join(DB_DIR, "registro_operaciones.json")
 SESSION_FILE = os.path.join(DB_DIR, "session.json")
-BALANCE_FILE = os.path.join(DB_DIR, "balance.json")
 
 
 def cargar_sesion():
@@ -27,20 +27,15 @@ def cargar_sesion():
 
 
 def cargar_balance():
-    """Carga el balance actual desde el archivo JSON."""
+    """Carga el balance actual desde la base de datos."""
     try:
-        with open(BALANCE_FILE, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Crear archivo con valores por defecto si no existe
-        balance_default = {
+        return almacenamiento.cargar_balance()
+    except sqlite3.Error:
+        return {
             "efectivo": 0.0,
             "dinero_cuenta": 0.0,
             "historial": []
         }
-        with open(BALANCE_FILE, "w", encoding="utf-8") as file:
-            json.dump(balance_default, file, indent=4)
-        return balance_default
 
 
 def actualizar_balance(tipo_operacion, cuenta, monto):
@@ -52,47 +47,25 @@ def actualizar_balance(tipo_operacion, cuenta, monto):
         cuenta: "efectivo" o "dinero_cuenta"
         monto: float, cantidad a sumar o restar
     """
-    balance = cargar_balance()
-    
-    # Asegurar que las claves existan
-    if "efectivo" not in balance:
-        balance["efectivo"] = 0.0
-    if "dinero_cuenta" not in balance:
-        balance["dinero_cuenta"] = 0.0
-    if "historial" not in balance:
-        balance["historial"] = []
-    
     # Actualizar saldo según tipo de operación
     if tipo_operacion == "ingreso":
-        balance[cuenta] += float(monto)
+        diferencia = float(monto)
     elif tipo_operacion == "gasto":
-        balance[cuenta] -= float(monto)
-    
-    # Guardar cambios
+        diferencia = -float(monto)
+    else:
+        return
+
     try:
-        with open(BALANCE_FILE, "w", encoding="utf-8") as file:
-            json.dump(balance, file, indent=4)
-    except Exception as e:
+        almacenamiento.mover_saldo(cuenta, diferencia)
+    except (sqlite3.Error, ValueError) as e:
         print(f"Error al actualizar balance: {e}")
 
 
 def guardar_operacion(data):
-    """Guarda la operación en el archivo JSON."""
-    if not os.path.exists(OPERACIONES_FILE):
-        operaciones = []
-    else:
-        try:
-            with open(OPERACIONES_FILE, "r", encoding="utf-8") as file:
-                operaciones = json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
-            operaciones = []
-
-    operaciones.append(data)
-
+    """Guarda la operación en la base de datos."""
     try:
-        with open(OPERACIONES_FILE, "w", encoding="utf-8") as file:
-            json.dump(operaciones, file, indent=4, ensure_ascii=False)
-    except IOError:
+        almacenamiento.guardar_operacion(data)
+    except sqlite3.Error:
         QMessageBox.critical(None, "Error", "No se pudo guardar la operación.")
 
 
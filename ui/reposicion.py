@@ -1,6 +1,6 @@
 # ui/reposicion.py
 
-import json
+import sqlite3
 from datetime import datetime
 from PyQt5.QtCore import Qt, QStringListModel
 from PyQt5.QtGui import QFont, QIntValidator, QRegExpValidator
@@ -9,6 +9,8 @@ from PyQt5.QtWidgets import (
     QDateEdit, QMessageBox, QCompleter, QSpacerItem, QSizePolicy
 )
 from PyQt5.QtCore import QRegExp
+from utils.indice_productos import obtener_indice
+from utils import almacenamiento
 
 
 class Reposicion(QDialog):
@@ -179,12 +181,13 @@ class Reposicion(QDialog):
     # ------------------ LÓGICA DE INVENTARIO ------------------
 
     def cargar_inventario(self):
-        """Carga inventario desde el JSON."""
+        """Carga una copia del inventario desde el índice compartido de productos."""
+        indice = obtener_indice()
         try:
-            with open("./db/inventario.json", "r", encoding="utf-8") as file:
-                return json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
+            indice.refrescar()
+        except sqlite3.Error:
             return []
+        return [dict(p) for p in indice.productos()]
 
     def build_lista_completa(self):
         """Lista 'CODIGO - DESCRIPCION' para QCompleter."""
@@ -199,7 +202,7 @@ class Reposicion(QDialog):
         self.search_line.setText(text)
         self.search_line.setReadOnly(True)
         codigo = text.split(" - ")[0].strip()
-        producto = next((p for p in self.inventario if p["codigo"] == codigo), None)
+        producto = obtener_indice().obtener(codigo)
         if producto:
             self.asignar_producto(producto)
             # Pasar foco a cantidad
@@ -346,8 +349,8 @@ class Reposicion(QDialog):
                 p["fecha_ingreso"] = datetime.now().strftime("%d-%m-%Y")
                 break
 
-        # Guardar en JSON
-        self.guardar_inventario()
+        # Guardar en la base de datos
+        self.guardar_producto(p)
 
         if self.actualizar_tabla_callback:
             self.actualizar_tabla_callback()
@@ -367,11 +370,11 @@ class Reposicion(QDialog):
         self.current_input_index = 0
         self.inputs[0].setFocus()
 
-    def guardar_inventario(self):
-        """Guarda el inventario en inventario.json."""
+    def guardar_producto(self, producto):
+        """Guarda el producto repuesto en la base de datos."""
         try:
-            with open("./db/inventario.json", "w", encoding="utf-8") as file:
-                json.dump(self.inventario, file, indent=4, ensure_ascii=False)
-        except Exception as e:
+            almacenamiento.guardar_producto(producto)
+            obtener_indice().refrescar()  # Caja toma el precio nuevo en la próxima lectura
+        except sqlite3.Error as e:
             QMessageBox.critical(self, "Error", f"Error al guardar inventario: {e}")
 
@@ -0,0 +1,112 @@
+# ui/seleccion_cliente.py
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem, QPushButton
+)
+from PyQt5.QtGui import QFont, QColor
+from PyQt5.QtCore import Qt
+
+from utils.indice_clientes import obtener_indice_clientes
+
+LIMITE_LISTA = 200  # Más filas no ayudan a elegir: se sigue escribiendo
+
+
+class SeleccionClienteDialog(QDialog):
+    """
+    Elige un cliente escribiendo parte del nombre o del documento: la lista se
+    filtra con cada tecla, las flechas mueven la selección y Enter confirma.
+    Deja el id del cliente elegido en cliente_id.
+    """
+
+    def __init__(self, parent=None, indice=None):
+        super().__init__(parent)
+        self.setWindowTitle("Seleccionar Cliente")
+        self.indice = indice or obtener_indice_clientes()
+        self.cliente_id = None
+        self.setMinimumSize(800, 500)
+        self.init_ui()
+        self.filtrar("")
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+        self.setLayout(layout)
+
+        self.filtro_input = QLineEdit()
+        self.filtro_input.setFont(QFont("Arial", 18))
+        self.filtro_input.setPlaceholderText("ESCRIBA NOMBRE O DOCUMENTO...")
+        self.filtro_input.setMinimumHeight(50)
+        self.filtro_input.textChanged.connect(self.filtrar)
+        self.filtro_input.returnPressed.connect(self.aceptar)
+        self.filtro_input.installEventFilter(self)
+        layout.addWidget(self.filtro_input)
+
+        self.resultado_label = QLabel()
+        self.resultado_label.setFont(QFont("Arial", 14))
+        layout.addWidget(self.resultado_label)
+
+        self.lista = QListWidget()
+        self.lista.setFont(QFont("Arial", 16))
+        self.lista.itemActivated.connect(self.aceptar)
+        layout.addWidget(self.lista)
+
+        # Botones Aceptar y Cancelar
+        botones_layout = QHBoxLayout()
+        botones_layout.addStretch()
+
+        aceptar_button = QPushButton("Aceptar")
+        aceptar_button.setFont(QFont("Arial", 16, QFont.Bold))
+        aceptar_button.setFixedSize(160, 50)
+        aceptar_button.setAutoDefault(False)  # Enter lo maneja el filtro
+        aceptar_button.clicked.connect(self.aceptar)
+
+        cancelar_button = QPushButton("Cancelar")
+        cancelar_button.setFont(QFont("Arial", 16, QFont.Bold))
+        cancelar_button.setFixedSize(160, 50)
+        cancelar_button.setAutoDefault(False)
+        cancelar_button.clicked.connect(self.reject)
+
+        botones_layout.addWidget(aceptar_button)
+        botones_layout.addWidget(cancelar_button)
+        botones_layout.addStretch()
+        layout.addLayout(botones_layout)
+
+        self.filtro_input.setFocus()
+
+    def filtrar(self, texto):
+        """Muestra los clientes que coinciden con el texto, marcando el primero."""
+        clientes = self.indice.buscar(texto)
+        self.lista.clear()
+        for cliente in clientes[:LIMITE_LISTA]:
+            documento = cliente.get("documento", "")
+            texto_item = cliente.get("nombre", "").upper()
+            if documento:
+                texto_item += f" - {documento}"
+            if cliente.get("vip", False):
+                texto_item += " - VIP"
+            texto_item += f" - DEUDA ${float(cliente.get('deuda', 0)):.2f}"
+            item = QListWidgetItem(texto_item)
+            item.setData(Qt.UserRole, cliente["id"])
+            if cliente.get("vip", False):
+                item.setBackground(QColor(255, 255, 200))  # Amarillo claro, como en Clientes
+            self.lista.addItem(item)
+        if clientes:
+            self.lista.setCurrentRow(0)
+        extra = f" (SE MUESTRAN {LIMITE_LISTA})" if len(clientes) > LIMITE_LISTA else ""
+        self.resultado_label.setText(f"{len(clientes)} CLIENTES{extra}")
+
+    def eventFilter(self, obj, event):
+        # Las flechas y las páginas mueven la selección sin sacar el foco del filtro
+        if obj is self.filtro_input and event.type() == event.KeyPress and event.key() in (
+                Qt.Key_Up, Qt.Key_Down, Qt.Key_PageUp, Qt.Key_PageDown):
+            self.lista.keyPressEvent(event)
+            return True
+        return super().eventFilter(obj, event)
+
+    def aceptar(self, *args):
+        item = self.lista.currentItem()
+        if item is None:
+            return
+        self.cliente_id = item.data(Qt.UserRole)
+        self.accept()
@@ -0,0 +1,72 @@
+# ui/seleccion_producto.py
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QPushButton
+)
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt
+
+
+class SeleccionProductoDialog(QDialog):
+    """
+    Lista de productos candidatos, ordenados de mejor a peor coincidencia, para
+    elegir uno cuando la búsqueda de Caja encuentra varios.
+    """
+
+    def __init__(self, productos, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Seleccionar Producto")
+        self.productos = productos
+        self.producto_seleccionado = None
+        self.setMinimumSize(800, 500)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+        self.setLayout(layout)
+
+        titulo = QLabel(f"MÚLTIPLES COINCIDENCIAS ({len(self.productos)}), ELIJA UN PRODUCTO:")
+        titulo.setFont(QFont("Arial", 18, QFont.Bold))
+        layout.addWidget(titulo)
+
+        self.lista = QListWidget()
+        self.lista.setFont(QFont("Arial", 16))
+        for producto in self.productos:
+            texto = (f"{producto.get('descripcion', '').upper()} - "
+                     f"{producto.get('codigo', '')} - ${float(producto.get('precio', 0)):.2f}")
+            item = QListWidgetItem(texto)
+            item.setData(Qt.UserRole, producto)
+            self.lista.addItem(item)
+        self.lista.setCurrentRow(0)
+        self.lista.itemActivated.connect(self.aceptar)
+        layout.addWidget(self.lista)
+
+        # Botones Aceptar y Cancelar
+        botones_layout = QHBoxLayout()
+        botones_layout.addStretch()
+
+        aceptar_button = QPushButton("Aceptar")
+        aceptar_button.setFont(QFont("Arial", 16, QFont.Bold))
+        aceptar_button.setFixedSize(160, 50)
+        aceptar_button.clicked.connect(self.aceptar)
+
+        cancelar_button = QPushButton("Cancelar")
+        cancelar_button.setFont(QFont("Arial", 16, QFont.Bold))
+        cancelar_button.setFixedSize(160, 50)
+        cancelar_button.clicked.connect(self.reject)
+
+        botones_layout.addWidget(aceptar_button)
+        botones_layout.addWidget(cancelar_button)
+        botones_layout.addStretch()
+        layout.addLayout(botones_layout)
+
+        self.lista.setFocus()
+
+    def aceptar(self, *args):
+        item = self.lista.currentItem()
+        if item is None:
+            return
+        self.producto_seleccionado = item.data(Qt.UserRole)
+        self.accept()
@@ -12,15 +12,19 @@ from PyQt5.QtWidgets import QApplication  # Añadido para cerrar la aplicación
 
 
 from .editarperfil import EditarPerfil
-from .informe_caja import InformeDeCaja
+from .informe_caja import InformeDeCaja, preparar_cierre
 from .notas import NotasDialog
 from .informes import Informes  # Asegúrate de importar la clase Informes
+from .tareas import obtener_ejecutor
+from utils import almacenamiento
+from utils.persistencia import escribir_json
 
 
 class Sidebar(QWidget):
     def __init__(self, main):
         super().__init__()
         self.main = main
+        self.preparando_cierre = False
         self.setFixedWidth(200)  # Ancho del sidebar
 
         # Definir el color de fondo
@@ -205,18 +209,9 @@ class Sidebar(QWidget):
         sender = self.sender()
         page = sender.text()
         self.select_button(page)
+        # cambiar_pagina construye la página la primera vez y la recarga si hace falta
         self.main.cambiar_pagina(page)
 
-        # MODIFICACIÓN: Recargar la lista de clientes al hacer clic en "Clientes"
-        if page == "Clientes":
-            if hasattr(self.main.main_section.page_clientes, "load_clientes"):
-                self.main.main_section.page_clientes.load_clientes()
-
-        # NUEVA MODIFICACIÓN: Recargar informes al hacer clic en "Informes"
-        if page == "Informes":
-            if hasattr(self.main.main_section.page_informes, "load_informe_vencimientos"):
-                self.main.main_section.page_informes.load_informe_vencimientos()
-
     def open_edit_profile(self):
         """Abre la ventana para editar el perfil."""
         edit_profile_dialog = EditarPerfil(parent=self, update_sidebar_callback=self.update_user_info)
@@ -237,13 +232,28 @@ class Sidebar(QWidget):
             QMessageBox.warning(self, "Error", "No se encontró la sesión activa.")
             return
 
-        # 2. Cargar tickets de la sesión actual
-        try:
-            with open("./db/tickets.json", "r", encoding="utf-8") as file:
-                all_tickets = json.load(file)
-            tickets_session = [t for t in all_tickets if t.get("num_session") == num_session]
-        except FileNotFoundError:
-            tickets_session = []
+        # 2. Cargar tickets y calcular el resumen en segundo plano
+        if self.preparando_cierre:
+            return
+        self.preparando_cierre = True
+        self.main.main_section.page_caja.mostrar_mensaje("PREPARANDO CIERRE DE CAJA...", "info")
+        tarea = obtener_ejecutor().enviar(preparar_cierre, num_session)
+        tarea.al_terminar(lambda datos: self.continuar_logout(num_session, current_user, *datos))
+        tarea.al_fallar(self.cierre_fallido)
+
+    def cierre_fallido(self, error):
+        """
+        No se pudieron leer los tickets de la sesión: se avisa y la sesión sigue
+        abierta, nunca se cierra sin su informe de caja.
+        """
+        self.preparando_cierre = False
+        self.main.main_section.page_caja.mostrar_mensaje("NO SE PUDO PREPARAR EL CIERRE DE CAJA", "error")
+        QMessageBox.critical(self, "Error", f"No se pudieron leer los tickets de la sesión: {error}\n"
+                                            "La sesión sigue abierta, intente cerrarla de nuevo.")
+
+    def continuar_logout(self, num_session, current_user, tickets_session, resumen):
+        """Segunda parte de logout, con los tickets de la sesión ya leídos."""
+        self.preparando_cierre = False
 
         # 3. Verificar si existen tickets para la sesión
         if tickets_session:
@@ -256,13 +266,13 @@ class Sidebar(QWidget):
                 return
 
             # Mostrar el informe de caja con las notas
-            informe_dialog = InformeDeCaja(num_session, current_user, tickets_session, notas, parent=self)
+            informe_dialog = InformeDeCaja(num_session, current_user, tickets_session, notas,
+                                           parent=self, resumen=resumen)
             if informe_dialog.exec_() == QDialog.Accepted:
                 # Al cerrar el informe, terminar la aplicación (cerrar sesión)
                 session_data = {"logged_in": False, "current_user": ""}
                 try:
-                    with open("./db/session.json", "w", encoding="utf-8") as file:
-                        json.dump(session_data, file, indent=4)
+                    escribir_json("./db/session.json", session_data)
                     QApplication.quit()
                 except Exception as e:
                     QMessageBox.warning(self, "Error", f"No se pudo cerrar sesión: {e}")
@@ -278,8 +288,7 @@ class Sidebar(QWidget):
             if respuesta == QMessageBox.Yes:
                 session_data = {"logged_in": False, "current_user": ""}
                 try:
-                    with open("./db/session.json", "w", encoding="utf-8") as file:
-                        json.dump(session_data, file, indent=4)
+                    escribir_json("./db/session.json", session_data)
                     QApplication.quit()
                 except Exception as e:
                     QMessageBox.warning(self, "Error", f"No se pudo cerrar sesión: {e}")
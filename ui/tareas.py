@@ -0,0 +1,116 @@
+# ui/tareas.py
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from utils import almacenamiento
+
+
+class Tarea(QObject):
+    """
+    Resultado futuro de una función que corre fuera del hilo de la interfaz.
+
+    Las señales terminada(resultado) y fallida(excepcion) se emiten siempre en el
+    hilo de la interfaz, así que quien las recibe puede tocar widgets.
+    """
+
+    terminada = pyqtSignal(object)
+    fallida = pyqtSignal(object)
+    _hecha = pyqtSignal(bool, object)  # Aviso interno desde el hilo de trabajo
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lista = False
+        self.resultado = None
+        self.error = None
+        self._hecha.connect(self._completar)
+
+    def al_terminar(self, funcion):
+        """Llama a funcion(resultado) cuando la tarea termina bien."""
+        self.terminada.connect(funcion)
+        return self
+
+    def al_fallar(self, funcion):
+        """Llama a funcion(excepcion) si la tarea lanza una excepción."""
+        self.fallida.connect(funcion)
+        return self
+
+    def _completar(self, ok, valor):
+        self.lista = True
+        if ok:
+            self.resultado = valor
+            self.terminada.emit(valor)
+        else:
+            self.error = valor
+            self.fallida.emit(valor)
+
+
+class _Trabajo(QRunnable):
+    def __init__(self, tarea, funcion, args, kwargs):
+        super().__init__()
+        self.tarea = tarea
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            resultado = self.funcion(*self.args, **self.kwargs)
+        except Exception as e:
+            self._avisar(False, e)
+        else:
+            self._avisar(True, resultado)
+        finally:
+            # Cada hilo tiene su propia conexión a SQLite
+            almacenamiento.cerrar_conexion()
+
+    def _avisar(self, ok, valor):
+        try:
+            self.tarea._hecha.emit(ok, valor)
+        except RuntimeError:
+            pass  # La aplicación se cerró sin esperar la tarea: ya no hay a quién avisar
+
+
+class EjecutorES(QObject):
+    """
+    Ejecuta en un único hilo de fondo las tareas de disco (base de datos,
+    informes, PDF) para que la interfaz y el lector de códigos no se congelen.
+
+    Al haber un solo hilo, las tareas se ejecutan de a una y en el orden en que
+    se enviaron: dos escrituras nunca se adelantan entre sí.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._pendientes = set()  # Evita que Python libere las tareas en curso
+
+    def enviar(self, funcion, *args, **kwargs):
+        """
+        Encola funcion(*args, **kwargs) para ejecutarse en segundo plano.
+
+        :return: Tarea con las señales terminada y fallida.
+        """
+        tarea = Tarea()
+        self._pendientes.add(tarea)
+        tarea._hecha.connect(lambda *_: self._pendientes.discard(tarea))
+        self.pool.start(_Trabajo(tarea, funcion, args, kwargs))
+        return tarea
+
+    def ocupado(self):
+        return bool(self._pendientes)
+
+    def esperar(self, msecs=-1):
+        """Bloquea hasta que terminen las tareas encoladas (por ejemplo, al cerrar la aplicación)."""
+        return self.pool.waitForDone(msecs)
+
+
+_ejecutor = None
+
+
+def obtener_ejecutor():
+    """Retorna el ejecutor compartido de tareas de disco."""
+    global _ejecutor
+    if _ejecutor is None:
+        _ejecutor = EjecutorES()
+    return _ejecutor
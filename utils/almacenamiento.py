@@ -0,0 +1,1201 @@
+# utils/almacenamiento.py
+
+"""
+Capa de almacenamiento sobre SQLite (modo WAL) para los datos del punto de venta.
+
+Reemplaza a los archivos db/*.json: cada venta, operación o cambio de producto
+escribe solo sus filas en lugar de reescribir el historial completo. Las funciones
+reciben y devuelven diccionarios con la misma forma que tenían los JSON, así las
+pantallas no dependen del esquema.
+
+session.json y usuarios.json siguen siendo archivos JSON: son configuración y
+estado de la sesión activa, no historial.
+
+Los montos de dinero se guardan como enteros de centavos (ver utils/dinero.py);
+las funciones los reciben y devuelven en pesos, como estaban en los JSON.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from utils.dinero import a_centavos, a_pesos
+
+DB_DIR = "./db"
+RUTA_DB = os.path.join(DB_DIR, "miposqt.db")
+
+VERSION_ESQUEMA = 6
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+
+CREATE TABLE IF NOT EXISTS productos (
+    clave TEXT PRIMARY KEY,             -- código en minúsculas
+    codigo TEXT NOT NULL,
+    descripcion TEXT NOT NULL DEFAULT '',
+    es_pesable INTEGER NOT NULL DEFAULT 0,
+    cantidad NUMERIC NOT NULL DEFAULT 0,
+    costo REAL,
+    precio REAL NOT NULL DEFAULT 0,
+    fecha_ingreso TEXT,
+    fecha_vencimiento TEXT,
+    oferta NUMERIC,
+    extra TEXT,                         -- claves adicionales en JSON
+    orden INTEGER NOT NULL,
+    rev INTEGER NOT NULL,
+    eliminado INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS productos_rev ON productos (rev);
+-- Sin este índice calcular el próximo "orden" recorre toda la tabla en cada alta
+CREATE INDEX IF NOT EXISTS productos_orden ON productos (orden);
+
+CREATE TABLE IF NOT EXISTS movimientos_stock (
+    id INTEGER PRIMARY KEY,
+    clave TEXT NOT NULL,                -- código del producto en minúsculas
+    diferencia NUMERIC NOT NULL,        -- en unidades o kilos, negativa si sale mercadería
+    motivo TEXT NOT NULL,               -- 'venta', ...
+    referencia TEXT,                    -- número de ticket para las ventas
+    fecha TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS movimientos_stock_clave ON movimientos_stock (clave);
+
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY,
+    numero_ticket TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    cajero TEXT,
+    monto INTEGER NOT NULL DEFAULT 0,   -- en centavos, como todos los montos
+    cambio INTEGER NOT NULL DEFAULT 0,
+    num_session TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS tickets_dia ON tickets (dia);
+CREATE INDEX IF NOT EXISTS tickets_sesion ON tickets (num_session);
+CREATE INDEX IF NOT EXISTS tickets_numero ON tickets (numero_ticket);
+
+CREATE TABLE IF NOT EXISTS contadores_tickets (
+    dia TEXT PRIMARY KEY,               -- "dd-mm-aaaa"
+    ultimo INTEGER NOT NULL             -- último número de ticket usado ese día
+);
+
+CREATE TABLE IF NOT EXISTS lineas_ticket (
+    id INTEGER PRIMARY KEY,
+    ticket_id INTEGER NOT NULL REFERENCES tickets (id) ON DELETE CASCADE,
+    codigo TEXT,
+    descripcion TEXT,
+    cantidad NUMERIC,
+    precio_unitario INTEGER,
+    subtotal INTEGER,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS lineas_ticket_ticket ON lineas_ticket (ticket_id);
+
+CREATE TABLE IF NOT EXISTS pagos (
+    id INTEGER PRIMARY KEY,
+    ticket_id INTEGER NOT NULL REFERENCES tickets (id) ON DELETE CASCADE,
+    metodo TEXT,
+    monto INTEGER,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS pagos_ticket ON pagos (ticket_id);
+
+CREATE TABLE IF NOT EXISTS operaciones (
+    id INTEGER PRIMARY KEY,
+    num_session TEXT,
+    tipo TEXT,
+    cuenta TEXT,
+    monto INTEGER,
+    nota TEXT,
+    fecha TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS operaciones_sesion ON operaciones (num_session);
+
+CREATE TABLE IF NOT EXISTS sesiones (
+    id INTEGER PRIMARY KEY,
+    num_session TEXT,
+    usuario TEXT,
+    fecha_hora_inicio TEXT,
+    extra TEXT
+);
+
+CREATE TABLE IF NOT EXISTS clientes (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    documento TEXT NOT NULL DEFAULT '',
+    vip INTEGER NOT NULL DEFAULT 0,
+    deuda INTEGER NOT NULL DEFAULT 0,
+    extra TEXT
+);
+
+CREATE TABLE IF NOT EXISTS movimientos_deuda (
+    id INTEGER PRIMARY KEY,
+    cliente_id INTEGER NOT NULL REFERENCES clientes (id) ON DELETE CASCADE,
+    tipo TEXT NOT NULL,                 -- 'ticket', 'agregar_deuda', 'pago_deuda', ...
+    numero_ticket TEXT,                 -- solo para tipo 'ticket'
+    monto INTEGER,
+    descuento_aplicado INTEGER,
+    descripcion TEXT,
+    extra TEXT,
+    fecha TEXT,                         -- AAAA-MM-DD HH:MM:SS
+    saldo INTEGER                       -- deuda del cliente después del movimiento
+);
+CREATE INDEX IF NOT EXISTS movimientos_deuda_cliente ON movimientos_deuda (cliente_id);
+
+-- Parte todavía impaga de cada cargo de deuda (los pagos cancelan primero los más viejos)
+CREATE TABLE IF NOT EXISTS deuda_pendiente (
+    id INTEGER PRIMARY KEY,
+    cliente_id INTEGER NOT NULL REFERENCES clientes (id) ON DELETE CASCADE,
+    fecha TEXT,                         -- fecha del cargo (NULL si es anterior a que se guardaran)
+    pendiente INTEGER NOT NULL          -- centavos
+);
+CREATE INDEX IF NOT EXISTS deuda_pendiente_cliente ON deuda_pendiente (cliente_id);
+
+CREATE TABLE IF NOT EXISTS balance (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    efectivo INTEGER NOT NULL DEFAULT 0,
+    dinero_cuenta INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS historial_balance (
+    id INTEGER PRIMARY KEY,
+    fecha TEXT,
+    efectivo INTEGER,
+    dinero_cuenta INTEGER,
+    nota TEXT,
+    extra TEXT
+);
+
+CREATE TABLE IF NOT EXISTS cajas_rendidas (
+    id INTEGER PRIMARY KEY,
+    num_session TEXT,
+    cajero TEXT,
+    fecha TEXT,
+    datos TEXT NOT NULL                 -- informe completo en JSON
+);
+"""
+
+# Columnas de cada tabla que se corresponden con claves del JSON original;
+# cualquier otra clave se conserva en la columna "extra".
+COLUMNAS_PRODUCTO = ("codigo", "descripcion", "es_pesable", "cantidad", "costo", "precio",
+                     "fecha_ingreso", "fecha_vencimiento", "oferta")
+COLUMNAS_TICKET = ("numero_ticket", "dia", "cajero", "monto", "cambio", "num_session")
+COLUMNAS_LINEA = ("codigo", "descripcion", "cantidad", "precio_unitario", "subtotal")
+COLUMNAS_PAGO = ("metodo", "monto")
+COLUMNAS_OPERACION = ("num_session", "tipo", "cuenta", "monto", "nota", "fecha")
+COLUMNAS_SESION = ("num_session", "usuario", "fecha_hora_inicio")
+COLUMNAS_CLIENTE = ("nombre", "documento", "vip", "deuda")
+COLUMNAS_MOVIMIENTO = ("tipo", "monto", "descuento_aplicado", "descripcion")
+COLUMNAS_ESTADO_CUENTA = ("id", "tipo", "numero_ticket", "monto", "descuento_aplicado",
+                          "descripcion", "fecha", "saldo")
+COLUMNAS_HISTORIAL = ("fecha", "efectivo", "dinero_cuenta", "nota")
+
+# Columnas con montos de dinero, guardados en centavos
+DINERO = {
+    "tickets": ("monto", "cambio"),
+    "lineas_ticket": ("precio_unitario", "subtotal"),
+    "pagos": ("monto",),
+    "operaciones": ("monto",),
+    "clientes": ("deuda",),
+    "movimientos_deuda": ("monto", "descuento_aplicado", "saldo"),
+    "deuda_pendiente": ("pendiente",),
+    "balance": ("efectivo", "dinero_cuenta"),
+    "historial_balance": ("efectivo", "dinero_cuenta"),
+}
+
+_local = threading.local()
+_preparada = set()  # Rutas cuyo esquema ya se verificó en este proceso
+_candado = threading.Lock()
+
+
+# ------------------ CONEXIÓN Y TRANSACCIONES ------------------
+
+def conexion():
+    """
+    Retorna la conexión del hilo actual, abriéndola si hace falta.
+
+    SQLite no permite compartir una conexión entre hilos, por eso cada hilo
+    tiene la suya; el modo WAL deja leer mientras otro hilo escribe.
+    """
+    con = getattr(_local, "con", None)
+    if con is not None and getattr(_local, "ruta", None) == RUTA_DB:
+        return con
+    if con is not None:
+        con.close()
+
+    os.makedirs(os.path.dirname(RUTA_DB) or ".", exist_ok=True)
+    con = sqlite3.connect(RUTA_DB, timeout=10, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    # FULL sincroniza el disco en cada COMMIT: un ticket confirmado sobrevive a un corte de luz
+    con.execute("PRAGMA synchronous=FULL")
+    con.execute("PRAGMA foreign_keys=ON")
+    with _candado:
+        if RUTA_DB not in _preparada:
+            try:
+                _preparar(con)
+            except BaseException:
+                con.close()
+                raise
+            _preparada.add(RUTA_DB)
+
+    _local.con = con
+    _local.ruta = RUTA_DB
+    _local.nivel = 0
+    return con
+
+
+def cerrar_conexion():
+    """Cierra la conexión del hilo actual, si existe."""
+    con = getattr(_local, "con", None)
+    if con is not None:
+        con.close()
+        _local.con = None
+
+
+@contextmanager
+def transaccion():
+    """
+    Agrupa varias escrituras en una sola transacción. Se puede anidar: solo la
+    transacción más externa hace COMMIT (o ROLLBACK si hubo una excepción).
+    """
+    con = conexion()
+    if _local.nivel == 0:
+        con.execute("BEGIN IMMEDIATE")
+    _local.nivel += 1
+    try:
+        yield con
+    except BaseException:
+        _local.nivel -= 1
+        if _local.nivel == 0:
+            con.execute("ROLLBACK")
+        raise
+    else:
+        _local.nivel -= 1
+        if _local.nivel == 0:
+            con.execute("COMMIT")
+
+
+def _preparar(con):
+    """Crea o actualiza el esquema y migra los JSON la primera vez."""
+    version = con.execute("PRAGMA user_version").fetchone()[0]
+    if version > VERSION_ESQUEMA:
+        raise sqlite3.DatabaseError(
+            f"La base de datos tiene la versión {version} y esta aplicación solo conoce "
+            f"hasta la {VERSION_ESQUEMA}."
+        )
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        # executescript haría COMMIT por su cuenta, por eso se ejecuta sentencia por sentencia
+        for sentencia in ESQUEMA.split(";"):
+            if sentencia.strip():
+                con.execute(sentencia)
+        con.execute("INSERT OR IGNORE INTO balance (id, efectivo, dinero_cuenta) VALUES (1, 0, 0)")
+        for nueva_version in range(version + 1, VERSION_ESQUEMA + 1):
+            if nueva_version in MIGRACIONES:
+                MIGRACIONES[nueva_version](con)
+        if version < VERSION_ESQUEMA:
+            con.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+        if _leer_meta(con, "migrado_json") is None:
+            _migrar_json(con)
+            _escribir_meta(con, "migrado_json", "1")
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+
+
+def _leer_meta(con, clave):
+    fila = con.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+    return fila[0] if fila else None
+
+
+def _escribir_meta(con, clave, valor):
+    con.execute(
+        "INSERT INTO meta (clave, valor) VALUES (?, ?) "
+        "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor",
+        (clave, valor)
+    )
+
+
+def _extra(datos, columnas):
+    """Serializa las claves de datos que no tienen columna propia."""
+    resto = {k: v for k, v in datos.items() if k not in columnas}
+    return json.dumps(resto, ensure_ascii=False) if resto else None
+
+
+def _centavos(monto):
+    """Monto en pesos a centavos para guardarlo; None queda como NULL."""
+    return None if monto is None else a_centavos(monto)
+
+
+def _pesos(centavos):
+    return None if centavos is None else a_pesos(centavos)
+
+
+def _valores(datos, columnas, dinero=()):
+    """Valores de las columnas para un INSERT, con los montos pasados a centavos."""
+    return tuple(_centavos(datos.get(c)) if c in dinero else datos.get(c) for c in columnas)
+
+
+def _a_dict(fila, columnas, dinero=()):
+    """
+    Arma el diccionario original a partir de una fila, omitiendo columnas nulas.
+    Las columnas de dinero se devuelven en pesos.
+    """
+    datos = {}
+    for columna in columnas:
+        valor = fila[columna]
+        if valor is not None:
+            datos[columna] = a_pesos(valor) if columna in dinero else valor
+    if fila["extra"]:
+        datos.update(json.loads(fila["extra"]))
+    return datos
+
+
+# ------------------ MIGRACIÓN DESDE JSON ------------------
+
+def _leer_json(nombre, defecto):
+    ruta = os.path.join(os.path.dirname(RUTA_DB), nombre)
+    if not os.path.exists(ruta):
+        return defecto
+    try:
+        with open(ruta, "r", encoding="utf-8") as file:
+            datos = json.load(file)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"No se pudo migrar {nombre}: {e}")
+        return defecto
+    return datos if isinstance(datos, type(defecto)) else defecto
+
+
+def _migrar_json(con):
+    """
+    Importa una sola vez los archivos db/*.json existentes. Los archivos quedan en
+    su lugar como respaldo; no se vuelven a leer.
+    """
+    productos = _leer_json("inventario.json", [])
+    if productos:
+        rev = _siguiente_rev(con)
+        for producto in productos:
+            _guardar_producto(con, producto, rev)
+
+    for ticket in _leer_json("tickets.json", []):
+        _insertar_ticket(con, ticket)
+
+    for operacion in _leer_json("registro_operaciones.json", []):
+        _insertar_operacion(con, operacion)
+
+    for sesion in _leer_json("sesiones.json", []):
+        _insertar_sesion(con, sesion)
+
+    for cliente in _leer_json("clientes.json", []):
+        _guardar_cliente(con, dict(cliente))
+
+    balance = _leer_json("balance.json", {})
+    if balance:
+        # Formato antiguo con cuentas separadas
+        if "mercadopago" in balance or "bbva" in balance:
+            balance["dinero_cuenta"] = balance.pop("mercadopago", 0) + balance.pop("bbva", 0)
+        con.execute(
+            "UPDATE balance SET efectivo = ?, dinero_cuenta = ? WHERE id = 1",
+            (a_centavos(balance.get("efectivo", 0.0)), a_centavos(balance.get("dinero_cuenta", 0.0)))
+        )
+        # El historial del JSON está del más reciente al más antiguo
+        for registro in reversed(balance.get("historial", [])):
+            registro = dict(registro)
+            if "mercadopago" in registro or "bbva" in registro:
+                registro["dinero_cuenta"] = registro.pop("mercadopago", 0) + registro.pop("bbva", 0)
+            _insertar_historial_balance(con, registro)
+
+    for caja in _leer_json("cajas_rendidas.json", []):
+        _insertar_caja_rendida(con, caja)
+
+
+# ------------------ PRODUCTOS ------------------
+
+def _siguiente_rev(con):
+    rev = int(_leer_meta(con, "rev_productos") or 0) + 1
+    _escribir_meta(con, "rev_productos", str(rev))
+    return rev
+
+
+def _producto_desde_fila(fila):
+    producto = _a_dict(fila, COLUMNAS_PRODUCTO)
+    producto["es_pesable"] = bool(fila["es_pesable"])
+    return producto
+
+
+def _guardar_producto(con, producto, rev):
+    codigo = str(producto.get("codigo", ""))
+    con.execute(
+        """
+        INSERT INTO productos (clave, codigo, descripcion, es_pesable, cantidad, costo, precio,
+                               fecha_ingreso, fecha_vencimiento, oferta, extra, orden, rev, eliminado)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                (SELECT IFNULL(MAX(orden), 0) + 1 FROM productos), ?, 0)
+        ON CONFLICT (clave) DO UPDATE SET
+            codigo = excluded.codigo, descripcion = excluded.descripcion,
+            es_pesable = excluded.es_pesable, cantidad = excluded.cantidad,
+            costo = excluded.costo, precio = excluded.precio,
+            fecha_ingreso = excluded.fecha_ingreso, fecha_vencimiento = excluded.fecha_vencimiento,
+            oferta = excluded.oferta, extra = excluded.extra, rev = excluded.rev, eliminado = 0
+        """,
+        (codigo.lower(), codigo, producto.get("descripcion", ""),
+         1 if producto.get("es_pesable", False) else 0, producto.get("cantidad", 0),
+         producto.get("costo"), producto.get("precio", 0.0), producto.get("fecha_ingreso"),
+         producto.get("fecha_vencimiento"), producto.get("oferta"),
+         _extra(producto, COLUMNAS_PRODUCTO), rev)
+    )
+
+
+def cargar_productos():
+    """Retorna todos los productos en el orden en que se agregaron."""
+    filas = conexion().execute("SELECT * FROM productos WHERE eliminado = 0 ORDER BY orden")
+    return [_producto_desde_fila(f) for f in filas]
+
+
+def obtener_producto(codigo):
+    """Retorna el producto con ese código (sin distinguir mayúsculas) o None."""
+    fila = conexion().execute(
+        "SELECT * FROM productos WHERE clave = ? AND eliminado = 0", (str(codigo).strip().lower(),)
+    ).fetchone()
+    return _producto_desde_fila(fila) if fila else None
+
+
+def guardar_producto(producto):
+    """Agrega o reemplaza un producto (la clave es el código, sin distinguir mayúsculas)."""
+    guardar_productos([producto])
+
+
+def guardar_productos(productos):
+    """Agrega o reemplaza varios productos en una sola transacción."""
+    with transaccion() as con:
+        rev = _siguiente_rev(con)
+        for producto in productos:
+            _guardar_producto(con, producto, rev)
+
+
+def eliminar_producto(codigo):
+    """
+    Elimina un producto. La fila queda marcada como eliminada para que los índices
+    en memoria puedan enterarse con cambios_productos().
+
+    :return: True si el producto existía.
+    """
+    with transaccion() as con:
+        rev = _siguiente_rev(con)
+        cursor = con.execute(
+            "UPDATE productos SET eliminado = 1, rev = ? WHERE clave = ? AND eliminado = 0",
+            (rev, str(codigo).strip().lower())
+        )
+        return cursor.rowcount > 0
+
+
+def ajustar_cantidad(codigo, diferencia):
+    """
+    Suma diferencia (puede ser negativa) a la cantidad del producto.
+
+    :return: True si el producto existe.
+    """
+    with transaccion() as con:
+        rev = _siguiente_rev(con)
+        cursor = con.execute(
+            "UPDATE productos SET cantidad = cantidad + ?, rev = ? WHERE clave = ? AND eliminado = 0",
+            (diferencia, rev, str(codigo).strip().lower())
+        )
+        return cursor.rowcount > 0
+
+
+def registrar_movimientos_stock(diferencias, motivo, referencia=None):
+    """
+    Suma a cada producto su diferencia de stock y asienta el movimiento. Solo se
+    escriben las filas de esos productos, sin importar el tamaño del catálogo.
+
+    :param diferencias: Diccionario {codigo: diferencia} (negativa si sale mercadería).
+    :param motivo: Origen del movimiento ('venta', ...).
+    :param referencia: Dato que identifica el origen, por ejemplo el número de ticket.
+    :return: Lista de códigos que no existen en el inventario (no se modifican).
+    """
+    fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    faltantes = []
+    with transaccion() as con:
+        rev = _siguiente_rev(con)
+        for codigo, diferencia in diferencias.items():
+            clave = str(codigo).strip().lower()
+            cursor = con.execute(
+                "UPDATE productos SET cantidad = cantidad + ?, rev = ? WHERE clave = ? AND eliminado = 0",
+                (diferencia, rev, clave)
+            )
+            if cursor.rowcount == 0:
+                faltantes.append(codigo)
+                continue
+            con.execute(
+                "INSERT INTO movimientos_stock (clave, diferencia, motivo, referencia, fecha) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (clave, diferencia, motivo, referencia, fecha)
+            )
+    return faltantes
+
+
+def cargar_movimientos_stock(codigo=None):
+    """Retorna los movimientos de stock (de un producto o de todos), del más antiguo al más nuevo."""
+    consulta = "SELECT clave, diferencia, motivo, referencia, fecha FROM movimientos_stock"
+    parametros = ()
+    if codigo is not None:
+        consulta += " WHERE clave = ?"
+        parametros = (str(codigo).strip().lower(),)
+    filas = conexion().execute(consulta + " ORDER BY id", parametros)
+    return [dict(f) for f in filas]
+
+
+def contar_ventas(desde):
+    """
+    Retorna {código en minúsculas: veces vendido} contando las líneas de los
+    tickets desde el día indicado (datetime) hasta hoy.
+    """
+    dias = []
+    dia = desde
+    while dia.date() <= datetime.now().date():
+        dias.append(dia.strftime("%d-%m-%Y"))
+        dia += timedelta(days=1)
+    if not dias:
+        return {}
+    filas = conexion().execute(
+        "SELECT lower(l.codigo), COUNT(*) FROM lineas_ticket l JOIN tickets t ON t.id = l.ticket_id "
+        f"WHERE t.dia IN ({', '.join('?' * len(dias))}) GROUP BY lower(l.codigo)", dias
+    )
+    return {clave: veces for clave, veces in filas}
+
+
+def revision_productos():
+    """Número que aumenta con cada cambio en los productos."""
+    return int(_leer_meta(conexion(), "rev_productos") or 0)
+
+
+def cambios_productos(desde_rev):
+    """
+    Retorna los cambios de productos posteriores a una revisión.
+
+    :return: Tupla (cambiados, eliminados, rev) con los productos agregados o
+             modificados, las claves (código en minúsculas) eliminadas y la
+             revisión a usar en la próxima consulta.
+    """
+    con = conexion()
+    rev = int(_leer_meta(con, "rev_productos") or 0)
+    cambiados, eliminados = [], []
+    # Sin INDEXED BY, SQLite prefiere recorrer productos_orden entero para no ordenar
+    filas = con.execute(
+        "SELECT * FROM productos INDEXED BY productos_rev WHERE rev > ? ORDER BY orden", (desde_rev,)
+    )
+    for fila in filas:
+        if fila["eliminado"]:
+            eliminados.append(fila["clave"])
+        else:
+            cambiados.append(_producto_desde_fila(fila))
+    return cambiados, eliminados, rev
+
+
+# ------------------ TICKETS ------------------
+
+def _insertar_ticket(con, ticket):
+    cursor = con.execute(
+        "INSERT INTO tickets (numero_ticket, dia, cajero, monto, cambio, num_session, extra) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (ticket.get("numero_ticket", ""), ticket.get("dia", ""), ticket.get("cajero"),
+         a_centavos(ticket.get("monto", 0.0)), a_centavos(ticket.get("cambio", 0.0)),
+         ticket.get("num_session"),
+         _extra(ticket, COLUMNAS_TICKET + ("articulos", "pagos")))
+    )
+    ticket_id = cursor.lastrowid
+    _actualizar_contador(con, ticket.get("dia", ""), ticket.get("numero_ticket", ""))
+    con.executemany(
+        "INSERT INTO lineas_ticket (ticket_id, codigo, descripcion, cantidad, precio_unitario, "
+        "subtotal, extra) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(ticket_id,) + _valores(a, COLUMNAS_LINEA, DINERO["lineas_ticket"]) + (_extra(a, COLUMNAS_LINEA),)
+         for a in ticket.get("articulos", [])]
+    )
+    con.executemany(
+        "INSERT INTO pagos (ticket_id, metodo, monto, extra) VALUES (?, ?, ?, ?)",
+        [(ticket_id,) + _valores(p, COLUMNAS_PAGO, DINERO["pagos"]) + (_extra(p, COLUMNAS_PAGO),)
+         for p in ticket.get("pagos", [])]
+    )
+    return ticket_id
+
+
+def guardar_ticket(ticket):
+    """Guarda un ticket con sus artículos y pagos. Retorna su id."""
+    with transaccion() as con:
+        return _insertar_ticket(con, ticket)
+
+
+def existe_ticket(numero_ticket):
+    """Indica si ya hay un ticket guardado con ese número."""
+    fila = conexion().execute(
+        "SELECT 1 FROM tickets WHERE numero_ticket = ? LIMIT 1", (numero_ticket,)
+    ).fetchone()
+    return fila is not None
+
+
+def cargar_tickets(dia=None, num_session=None):
+    """
+    Retorna los tickets (con "articulos" y "pagos"), opcionalmente filtrados por
+    día ("dd-mm-aaaa") y/o número de sesión.
+    """
+    condiciones, parametros = [], []
+    if dia is not None:
+        condiciones.append("dia = ?")
+        parametros.append(dia)
+    if num_session is not None:
+        condiciones.append("num_session = ?")
+        parametros.append(num_session)
+    filtro = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    con = conexion()
+    filas = con.execute(f"SELECT * FROM tickets {filtro} ORDER BY id", parametros).fetchall()
+    articulos, pagos = {}, {}
+    subconsulta = f"SELECT id FROM tickets {filtro}"
+    for fila in con.execute(
+            f"SELECT * FROM lineas_ticket WHERE ticket_id IN ({subconsulta}) ORDER BY id", parametros):
+        articulos.setdefault(fila["ticket_id"], []).append(
+            _a_dict(fila, COLUMNAS_LINEA, DINERO["lineas_ticket"]))
+    for fila in con.execute(
+            f"SELECT * FROM pagos WHERE ticket_id IN ({subconsulta}) ORDER BY id", parametros):
+        pagos.setdefault(fila["ticket_id"], []).append(_a_dict(fila, COLUMNAS_PAGO, DINERO["pagos"]))
+
+    tickets = []
+    for fila in filas:
+        ticket = {
+            "dia": fila["dia"],
+            "cajero": fila["cajero"],
+            "articulos": articulos.get(fila["id"], []),
+            "monto": a_pesos(fila["monto"]),
+            "numero_ticket": fila["numero_ticket"],
+            "pagos": pagos.get(fila["id"], []),
+            "cambio": a_pesos(fila["cambio"]),
+            "num_session": fila["num_session"],
+        }
+        if fila["extra"]:
+            ticket.update(json.loads(fila["extra"]))
+        tickets.append(ticket)
+    return tickets
+
+
+def _actualizar_contador(con, dia, numero_ticket):
+    """Registra el número del ticket (el sufijo de "dd-mm-aaaa-N") como usado ese día."""
+    try:
+        numero = int(str(numero_ticket).split("-")[-1])
+    except ValueError:
+        return
+    con.execute(
+        "INSERT INTO contadores_tickets (dia, ultimo) VALUES (?, ?) "
+        "ON CONFLICT (dia) DO UPDATE SET ultimo = MAX(ultimo, excluded.ultimo)",
+        (dia, numero)
+    )
+
+
+def siguiente_numero_ticket(dia):
+    """Retorna el número que le corresponde al próximo ticket del día ("dd-mm-aaaa")."""
+    fila = conexion().execute("SELECT ultimo FROM contadores_tickets WHERE dia = ?", (dia,)).fetchone()
+    return fila[0] + 1 if fila else 1
+
+
+# ------------------ OPERACIONES Y SESIONES ------------------
+
+def _insertar_operacion(con, operacion):
+    con.execute(
+        "INSERT INTO operaciones (num_session, tipo, cuenta, monto, nota, fecha, extra) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        _valores(operacion, COLUMNAS_OPERACION, DINERO["operaciones"])
+        + (_extra(operacion, COLUMNAS_OPERACION),)
+    )
+
+
+def guardar_operacion(operacion):
+    """Registra una operación de ingreso o gasto."""
+    with transaccion() as con:
+        _insertar_operacion(con, operacion)
+
+
+def cargar_operaciones(num_session=None):
+    """Retorna las operaciones registradas, opcionalmente solo las de una sesión."""
+    if num_session is None:
+        filas = conexion().execute("SELECT * FROM operaciones ORDER BY id")
+    else:
+        filas = conexion().execute(
+            "SELECT * FROM operaciones WHERE num_session = ? ORDER BY id", (num_session,)
+        )
+    return [_a_dict(f, COLUMNAS_OPERACION, DINERO["operaciones"]) for f in filas]
+
+
+def _insertar_sesion(con, sesion):
+    con.execute(
+        "INSERT INTO sesiones (num_session, usuario, fecha_hora_inicio, extra) VALUES (?, ?, ?, ?)",
+        tuple(sesion.get(c) for c in COLUMNAS_SESION) + (_extra(sesion, COLUMNAS_SESION),)
+    )
+
+
+def registrar_sesion(sesion):
+    """Agrega una sesión al registro de inicios de sesión."""
+    with transaccion() as con:
+        _insertar_sesion(con, sesion)
+
+
+def cargar_sesiones():
+    filas = conexion().execute("SELECT * FROM sesiones ORDER BY id")
+    return [_a_dict(f, COLUMNAS_SESION) for f in filas]
+
+
+# ------------------ CLIENTES ------------------
+
+# Tipo de movimiento de deuda -> signo con el que su monto cambia la deuda
+TIPOS_MOVIMIENTO_DEUDA = {
+    "ticket": 1,
+    "agregar_deuda": 1,
+    "pago_deuda": -1,
+}
+
+
+def _movimiento_a_fila(movimiento):
+    """Los movimientos de clientes.json pueden ser un número de ticket (texto) o un diccionario."""
+    if isinstance(movimiento, str):
+        return ("ticket", movimiento, None, None, None, None)
+    return (movimiento.get("tipo", ""), None, _centavos(movimiento.get("monto")),
+            _centavos(movimiento.get("descuento_aplicado")), movimiento.get("descripcion"),
+            _extra(movimiento, COLUMNAS_MOVIMIENTO))
+
+
+def _reconstruir_saldos(con, cliente_id):
+    """
+    Calcula el saldo de los movimientos del cliente hacia atrás desde su deuda
+    actual. Los tickets de clientes.json no guardaban el monto: antes de uno de
+    ellos el saldo queda sin calcular (NULL).
+    """
+    fila = con.execute("SELECT deuda FROM clientes WHERE id = ?", (cliente_id,)).fetchone()
+    saldo = fila["deuda"]
+    movimientos = con.execute(
+        "SELECT id, tipo, monto FROM movimientos_deuda WHERE cliente_id = ? ORDER BY id DESC",
+        (cliente_id,)
+    ).fetchall()
+    for movimiento in movimientos:
+        con.execute("UPDATE movimientos_deuda SET saldo = ? WHERE id = ?", (saldo, movimiento["id"]))
+        signo = TIPOS_MOVIMIENTO_DEUDA.get(movimiento["tipo"])
+        if saldo is None or signo is None or movimiento["monto"] is None:
+            saldo = None
+        else:
+            saldo -= signo * movimiento["monto"]
+
+
+def _cargar_pendiente(con, cliente_id, centavos, fecha):
+    con.execute("INSERT INTO deuda_pendiente (cliente_id, fecha, pendiente) VALUES (?, ?, ?)",
+                (cliente_id, fecha, centavos))
+
+
+def _cancelar_pendiente(con, cliente_id, centavos):
+    """Descuenta un pago de los cargos impagos del cliente, del más viejo al más nuevo."""
+    filas = con.execute(
+        "SELECT id, pendiente FROM deuda_pendiente WHERE cliente_id = ? ORDER BY id", (cliente_id,)
+    )
+    for fila in filas.fetchall():
+        if centavos <= 0:
+            break
+        if fila["pendiente"] <= centavos:
+            con.execute("DELETE FROM deuda_pendiente WHERE id = ?", (fila["id"],))
+        else:
+            con.execute("UPDATE deuda_pendiente SET pendiente = ? WHERE id = ?",
+                        (fila["pendiente"] - centavos, fila["id"]))
+        centavos -= fila["pendiente"]
+
+
+def _reconstruir_pendiente(con, cliente_id):
+    """
+    Arma los cargos impagos del cliente repasando sus movimientos. Si la deuda
+    guardada no coincide con los movimientos (los tickets de clientes.json no
+    tienen monto), la diferencia queda como un cargo sin fecha o como un pago.
+    """
+    con.execute("DELETE FROM deuda_pendiente WHERE cliente_id = ?", (cliente_id,))
+    movimientos = con.execute(
+        "SELECT tipo, monto, fecha FROM movimientos_deuda WHERE cliente_id = ? ORDER BY id", (cliente_id,)
+    ).fetchall()
+    for movimiento in movimientos:
+        signo = TIPOS_MOVIMIENTO_DEUDA.get(movimiento["tipo"])
+        if signo is None or not movimiento["monto"]:
+            continue
+        if signo > 0:
+            _cargar_pendiente(con, cliente_id, movimiento["monto"], movimiento["fecha"])
+        else:
+            _cancelar_pendiente(con, cliente_id, movimiento["monto"])
+
+    deuda = con.execute("SELECT deuda FROM clientes WHERE id = ?", (cliente_id,)).fetchone()[0]
+    pendiente = con.execute(
+        "SELECT COALESCE(SUM(pendiente), 0) FROM deuda_pendiente WHERE cliente_id = ?", (cliente_id,)
+    ).fetchone()[0]
+    if deuda > pendiente:
+        # Se ubica primero: la deuda sin movimientos registrados es la más vieja
+        con.execute("INSERT INTO deuda_pendiente (id, cliente_id, fecha, pendiente) VALUES "
+                    "((SELECT COALESCE(MIN(id), 1) - 1 FROM deuda_pendiente), ?, NULL, ?)",
+                    (cliente_id, deuda - pendiente))
+    elif deuda < pendiente:
+        _cancelar_pendiente(con, cliente_id, pendiente - deuda)
+
+
+def _guardar_cliente(con, cliente):
+    """
+    Agrega o actualiza los datos del cliente. La deuda de un cliente existente
+    no se toca: solo cambia con registrar_movimiento_deuda. Un cliente nuevo
+    puede traer "deuda" y "ticketsdeuda" (los de clientes.json).
+    """
+    datos = (cliente.get("nombre", ""), cliente.get("documento", ""),
+             1 if cliente.get("vip", False) else 0)
+    extra = _extra(cliente, COLUMNAS_CLIENTE + ("id", "ticketsdeuda", "ultimo_movimiento"))
+    if cliente.get("id") is not None:
+        con.execute(
+            "UPDATE clientes SET nombre = ?, documento = ?, vip = ?, extra = ? WHERE id = ?",
+            datos + (extra, cliente["id"])
+        )
+        return
+
+    cursor = con.execute(
+        "INSERT INTO clientes (nombre, documento, vip, deuda, extra) VALUES (?, ?, ?, ?, ?)",
+        datos + (a_centavos(cliente.get("deuda", 0.0)), extra)
+    )
+    cliente["id"] = cursor.lastrowid
+    movimientos = cliente.get("ticketsdeuda", [])
+    if movimientos:
+        con.executemany(
+            "INSERT INTO movimientos_deuda (cliente_id, tipo, numero_ticket, monto, descuento_aplicado, "
+            "descripcion, extra) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(cliente["id"],) + _movimiento_a_fila(m) for m in movimientos]
+        )
+        _reconstruir_saldos(con, cliente["id"])
+    _reconstruir_pendiente(con, cliente["id"])
+
+
+# La fecha del último movimiento sale del índice por cliente: no recorre los movimientos
+SELECT_CLIENTES = (
+    "SELECT clientes.*, (SELECT fecha FROM movimientos_deuda WHERE cliente_id = clientes.id "
+    "ORDER BY id DESC LIMIT 1) AS ultimo_movimiento FROM clientes"
+)
+
+
+def _cliente_desde_fila(fila):
+    cliente = {
+        "id": fila["id"],
+        "nombre": fila["nombre"],
+        "deuda": a_pesos(fila["deuda"]),
+        "documento": fila["documento"],
+        "vip": bool(fila["vip"]),
+        "ultimo_movimiento": fila["ultimo_movimiento"],
+    }
+    if fila["extra"]:
+        cliente.update(json.loads(fila["extra"]))
+    return cliente
+
+
+def cargar_clientes():
+    """
+    Retorna los clientes con su deuda y la fecha de su último movimiento
+    ("ultimo_movimiento", None si no tiene o es anterior a que se guardaran las
+    fechas), sin los movimientos (ver cargar_movimientos_deuda). Cada
+    diccionario incluye "id", que
+    guardar_cliente y registrar_movimiento_deuda usan para ubicar la fila.
+    """
+    return [_cliente_desde_fila(fila) for fila in conexion().execute(SELECT_CLIENTES + " ORDER BY id")]
+
+
+def cargar_cliente(cliente_id):
+    """Retorna un cliente con la misma forma que cargar_clientes, o None si no existe."""
+    fila = conexion().execute(SELECT_CLIENTES + " WHERE id = ?", (cliente_id,)).fetchone()
+    return _cliente_desde_fila(fila) if fila is not None else None
+
+
+def guardar_cliente(cliente):
+    """Agrega (si no tiene "id") o actualiza los datos de un cliente."""
+    with transaccion() as con:
+        _guardar_cliente(con, cliente)
+
+
+def guardar_clientes(clientes):
+    """Guarda varios clientes en una sola transacción."""
+    with transaccion() as con:
+        for cliente in clientes:
+            _guardar_cliente(con, cliente)
+
+
+def registrar_movimiento_deuda(cliente_id, tipo, monto, numero_ticket=None, descuento=0.0,
+                               descripcion=None):
+    """
+    Agrega un movimiento a la cuenta del cliente y actualiza su deuda y sus
+    cargos impagos (deuda_pendiente) en la misma transacción, sin importar
+    cuántos movimientos tenga el cliente: un cargo agrega una fila y un pago
+    cancela los cargos más viejos.
+
+    :param tipo: Una de las claves de TIPOS_MOVIMIENTO_DEUDA.
+    :param monto: Monto en pesos, positivo; el tipo decide si suma o resta.
+    :param descuento: Descuento VIP ya restado del monto, en pesos.
+    :return: Deuda del cliente después del movimiento, en pesos.
+    :raises ValueError: Si el tipo no existe, el monto no es positivo o el pago
+                        supera la deuda.
+    :raises sqlite3.IntegrityError: Si el cliente no existe.
+    """
+    signo = TIPOS_MOVIMIENTO_DEUDA.get(tipo)
+    if signo is None:
+        raise ValueError(f"Tipo de movimiento de deuda desconocido: {tipo}")
+    centavos = a_centavos(monto)
+    if centavos <= 0:
+        raise ValueError("El monto debe ser positivo.")
+
+    with transaccion() as con:
+        # El pago se valida contra la deuda guardada, no la que muestra la pantalla
+        cursor = con.execute(
+            "UPDATE clientes SET deuda = deuda + ? WHERE id = ? AND deuda + ? >= 0",
+            (signo * centavos, cliente_id, signo * centavos)
+        )
+        if cursor.rowcount == 0:
+            if con.execute("SELECT 1 FROM clientes WHERE id = ?", (cliente_id,)).fetchone():
+                raise ValueError("El monto excede la deuda actual.")
+            raise sqlite3.IntegrityError(f"No existe el cliente {cliente_id}.")
+        saldo = con.execute("SELECT deuda FROM clientes WHERE id = ?", (cliente_id,)).fetchone()[0]
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if signo > 0:
+            _cargar_pendiente(con, cliente_id, centavos, fecha)
+        else:
+            _cancelar_pendiente(con, cliente_id, centavos)
+        con.execute(
+            "INSERT INTO movimientos_deuda (cliente_id, tipo, numero_ticket, monto, descuento_aplicado, "
+            "descripcion, fecha, saldo) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (cliente_id, tipo, numero_ticket, centavos, a_centavos(descuento), descripcion, fecha, saldo)
+        )
+    return a_pesos(saldo)
+
+
+def cargar_deuda_ticket(cliente_id, monto, numero_ticket, descuento=0.0):
+    """Suma monto a la deuda del cliente por una venta a crédito."""
+    return registrar_movimiento_deuda(cliente_id, "ticket", monto, numero_ticket, descuento)
+
+
+def cargar_movimientos_deuda(cliente_id):
+    """
+    Retorna el estado de cuenta del cliente: sus movimientos del más antiguo al
+    más reciente, todos con las claves de COLUMNAS_ESTADO_CUENTA (None si el
+    dato no se conoce, como el monto de los tickets de clientes.json).
+    """
+    filas = conexion().execute(
+        "SELECT * FROM movimientos_deuda WHERE cliente_id = ? ORDER BY id", (cliente_id,)
+    )
+    movimientos = []
+    for fila in filas:
+        movimiento = {c: fila[c] for c in COLUMNAS_ESTADO_CUENTA}
+        for columna in DINERO["movimientos_deuda"]:
+            movimiento[columna] = _pesos(fila[columna])
+        if fila["extra"]:
+            movimiento.update(json.loads(fila["extra"]))
+        movimientos.append(movimiento)
+    return movimientos
+
+
+TRAMOS_ANTIGUEDAD = (("0-30", 30), ("31-60", 60), ("61-90", 90), ("+90", None))
+
+
+def antiguedad_deudas(hoy=None):
+    """
+    Deuda de cada cliente con deuda, repartida por la antigüedad de los cargos
+    impagos (los pagos cancelan primero los más viejos). Lee solo los cargos
+    impagos, no el historial de movimientos.
+
+    :return: Lista de diccionarios con "id", "nombre", "deuda", un monto por
+             cada tramo de TRAMOS_ANTIGUEDAD, "sin_fecha" (cargos anteriores a
+             que se guardaran las fechas) y "mas_antigua" (fecha del cargo
+             impago más viejo o None), de la mayor deuda a la menor.
+    """
+    hoy = (hoy or datetime.now()).strftime("%Y-%m-%d")
+    columnas, anterior = [], None
+    for nombre, hasta in TRAMOS_ANTIGUEDAD:
+        condiciones = ["dias IS NOT NULL"]
+        if anterior is not None:
+            condiciones.append(f"dias > {anterior}")
+        if hasta is not None:
+            condiciones.append(f"dias <= {hasta}")
+        condicion = " AND ".join(condiciones)
+        columnas.append(f'COALESCE(SUM(CASE WHEN {condicion} THEN pendiente END), 0) AS "{nombre}"')
+        anterior = hasta
+    filas = conexion().execute(
+        "SELECT clientes.id, clientes.nombre, clientes.deuda, "
+        + ", ".join(columnas) + ", "
+        "COALESCE(SUM(CASE WHEN dias IS NULL THEN pendiente END), 0) AS sin_fecha, "
+        "MIN(fecha) AS mas_antigua "
+        "FROM (SELECT cliente_id, pendiente, fecha, "
+        "      CAST(julianday(?) - julianday(date(fecha)) AS INTEGER) AS dias FROM deuda_pendiente) "
+        "JOIN clientes ON clientes.id = cliente_id "
+        "GROUP BY clientes.id ORDER BY clientes.deuda DESC, clientes.nombre",
+        (hoy,)
+    )
+    deudas = []
+    for fila in filas:
+        deuda = {"id": fila["id"], "nombre": fila["nombre"], "deuda": a_pesos(fila["deuda"]),
+                 "sin_fecha": a_pesos(fila["sin_fecha"]), "mas_antigua": fila["mas_antigua"]}
+        for nombre, _hasta in TRAMOS_ANTIGUEDAD:
+            deuda[nombre] = a_pesos(fila[nombre])
+        deudas.append(deuda)
+    return deudas
+
+
+def eliminar_cliente(cliente_id):
+    """Elimina un cliente junto con sus movimientos."""
+    with transaccion() as con:
+        con.execute("DELETE FROM clientes WHERE id = ?", (cliente_id,))
+
+
+# ------------------ BALANCE ------------------
+
+CUENTAS_BALANCE = ("efectivo", "dinero_cuenta")
+
+
+def _insertar_historial_balance(con, registro):
+    con.execute(
+        "INSERT INTO historial_balance (fecha, efectivo, dinero_cuenta, nota, extra) "
+        "VALUES (?, ?, ?, ?, ?)",
+        _valores(registro, COLUMNAS_HISTORIAL, DINERO["historial_balance"])
+        + (_extra(registro, COLUMNAS_HISTORIAL),)
+    )
+
+
+def cargar_balance():
+    """Retorna {"efectivo", "dinero_cuenta", "historial"} con el historial del más reciente al más antiguo."""
+    con = conexion()
+    fila = con.execute("SELECT efectivo, dinero_cuenta FROM balance WHERE id = 1").fetchone()
+    historial = [_a_dict(f, COLUMNAS_HISTORIAL, DINERO["historial_balance"])
+                 for f in con.execute("SELECT * FROM historial_balance ORDER BY id DESC")]
+    return {"efectivo": a_pesos(fila["efectivo"]), "dinero_cuenta": a_pesos(fila["dinero_cuenta"]),
+            "historial": historial}
+
+
+def mover_saldo(cuenta, monto):
+    """Suma monto (negativo para restar) al saldo de la cuenta indicada."""
+    if cuenta not in CUENTAS_BALANCE:
+        raise ValueError(f"Cuenta desconocida: {cuenta}")
+    with transaccion() as con:
+        con.execute(f"UPDATE balance SET {cuenta} = {cuenta} + ? WHERE id = 1", (a_centavos(monto),))
+
+
+def ajustar_balance(efectivo, dinero_cuenta, registro):
+    """Fija ambos saldos y agrega el registro del ajuste al historial."""
+    with transaccion() as con:
+        con.execute("UPDATE balance SET efectivo = ?, dinero_cuenta = ? WHERE id = 1",
+                    (a_centavos(efectivo), a_centavos(dinero_cuenta)))
+        _insertar_historial_balance(con, registro)
+
+
+# ------------------ CAJAS RENDIDAS ------------------
+
+def _insertar_caja_rendida(con, caja):
+    con.execute(
+        "INSERT INTO cajas_rendidas (num_session, cajero, fecha, datos) VALUES (?, ?, ?, ?)",
+        (caja.get("num_session"), caja.get("cajero"), caja.get("fecha"),
+         json.dumps(caja, ensure_ascii=False))
+    )
+
+
+def guardar_caja_rendida(caja):
+    """Guarda el informe de cierre de una caja."""
+    with transaccion() as con:
+        _insertar_caja_rendida(con, caja)
+
+
+def cargar_cajas_rendidas():
+    filas = conexion().execute("SELECT datos FROM cajas_rendidas ORDER BY id")
+    return [json.loads(f["datos"]) for f in filas]
+
+
+def verificar_integridad():
+    """
+    Abre la base de datos y comprueba su integridad. Al abrirla, SQLite aplica las
+    transacciones confirmadas que quedaron en el WAL y descarta las incompletas;
+    luego se pasan al archivo principal y se vacía el WAL.
+
+    :return: Lista de problemas encontrados (vacía si está todo bien).
+    """
+    con = conexion()
+    problemas = [fila[0] for fila in con.execute("PRAGMA quick_check")]
+    if problemas == ["ok"]:
+        problemas = []
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return problemas
+
+
+# ------------------ MIGRACIONES ------------------
+
+def _migrar_v2(con):
+    """Arma el contador de tickets por día a partir de los tickets existentes."""
+    for fila in con.execute("SELECT dia, numero_ticket FROM tickets").fetchall():
+        _actualizar_contador(con, fila["dia"], fila["numero_ticket"])
+
+
+def _migrar_v4(con):
+    """
+    Pasa las columnas de dinero de REAL (pesos) a INTEGER (centavos). SQLite no
+    cambia el tipo de una columna: se agrega la nueva, se copian los montos
+    convertidos y se reemplaza a la anterior. Las columnas que ya son INTEGER
+    (bases creadas con este esquema) no se tocan.
+    """
+    con.create_function("a_centavos", 1, _centavos, deterministic=True)
+    for tabla, columnas in DINERO.items():
+        tipos = {f["name"]: f for f in con.execute(f"PRAGMA table_info({tabla})")}
+        for columna in columnas:
+            # Las columnas que agregan versiones posteriores todavía no existen
+            if columna not in tipos or tipos[columna]["type"].upper() != "REAL":
+                continue
+            definicion = "INTEGER NOT NULL DEFAULT 0" if tipos[columna]["notnull"] else "INTEGER"
+            nueva = f"{columna}_centavos"
+            con.execute(f"ALTER TABLE {tabla} ADD COLUMN {nueva} {definicion}")
+            con.execute(f"UPDATE {tabla} SET {nueva} = a_centavos({columna})")
+            con.execute(f"ALTER TABLE {tabla} DROP COLUMN {columna}")
+            con.execute(f"ALTER TABLE {tabla} RENAME COLUMN {nueva} TO {columna}")
+
+
+def _migrar_v5(con):
+    """
+    Agrega la fecha y el saldo a los movimientos de deuda y calcula el saldo de
+    los movimientos existentes.
+    """
+    columnas = {f["name"] for f in con.execute("PRAGMA table_info(movimientos_deuda)")}
+    for columna, definicion in (("fecha", "TEXT"), ("saldo", "INTEGER")):
+        if columna not in columnas:
+            con.execute(f"ALTER TABLE movimientos_deuda ADD COLUMN {columna} {definicion}")
+    for fila in con.execute("SELECT id FROM clientes").fetchall():
+        _reconstruir_saldos(con, fila["id"])
+
+
+def _migrar_v6(con):
+    """Arma los cargos impagos de cada cliente (la tabla deuda_pendiente la crea ESQUEMA)."""
+    for fila in con.execute("SELECT id FROM clientes").fetchall():
+        _reconstruir_pendiente(con, fila["id"])
+
+
+# Versión del esquema -> función que actualiza los datos desde la versión anterior
+# (la versión 3 solo agrega la tabla movimientos_stock, que crea ESQUEMA)
+MIGRACIONES = {
+    2: _migrar_v2,
+    4: _migrar_v4,
+    5: _migrar_v5,
+    6: _migrar_v6,
+}
+
+
+# ------------------ MANTENIMIENTO ------------------
+
+def reiniciar():
+    """Borra todos los datos (productos, ventas, clientes, balance...) dejando el esquema."""
+    with transaccion() as con:
+        for tabla in ("pagos", "lineas_ticket", "tickets", "contadores_tickets", "operaciones",
+                      "sesiones", "deuda_pendiente", "movimientos_deuda", "clientes", "historial_balance",
+                      "cajas_rendidas", "movimientos_stock"):
+            con.execute(f"DELETE FROM {tabla}")
+        rev = _siguiente_rev(con)
+        con.execute("UPDATE productos SET eliminado = 1, rev = ? WHERE eliminado = 0", (rev,))
+        con.execute("UPDATE balance SET efectivo = 0, dinero_cuenta = 0 WHERE id = 1")
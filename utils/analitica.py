@@ -0,0 +1,326 @@
+# utils/analitica.py
+
+"""
+Análisis de ventas sobre las líneas de los tickets guardadas en columnas de
+NumPy: producto, cantidad, subtotal, día, ticket, sesión y cajero de cada línea.
+
+Los textos (códigos, sesiones, cajeros) se guardan como el número de su
+posición en una lista, así cada agrupación es un np.bincount sobre un arreglo
+de enteros y un año de ventas se resume en milisegundos.
+
+Las líneas solo se agregan: actualizar() lee únicamente las líneas nuevas desde
+la última vez. Las columnas se guardan en db/analitica.npz para no releer el
+historial completo al abrir la aplicación.
+"""
+
+import os
+import threading
+from datetime import date, datetime
+
+import numpy as np
+
+from utils import almacenamiento
+
+NOMBRE_CACHE = "analitica.npz"  # Junto a la base de datos
+TAMANO_BLOQUE = 50000  # Líneas leídas de la base de datos por vez
+MIN_LINEAS_CACHE = 20000  # Líneas nuevas que justifican volver a escribir el caché
+
+# Columnas numéricas y su tipo; los textos van en las listas de Columnas
+TIPOS = {
+    "producto": np.int32,   # Posición en codigos
+    "cantidad": np.float64,  # Unidades o, en los pesables, gramos
+    "subtotal": np.int64,   # Centavos
+    "dia": np.int32,        # Ordinal de la fecha (date.toordinal)
+    "ticket": np.int64,     # Id del ticket
+    "sesion": np.int32,     # Posición en sesiones
+    "cajero": np.int32,     # Posición en cajeros
+}
+
+
+class Columnas:
+    """
+    Foto inmutable de las ventas: los arreglos de TIPOS, todos del mismo largo
+    y en el orden en que se guardaron las líneas, más las listas de textos.
+    """
+
+    def __init__(self, arreglos=None, codigos=(), descripciones=(), sesiones=(), cajeros=(), ultimo_id=0):
+        self.arreglos = arreglos or {c: np.empty(0, dtype=t) for c, t in TIPOS.items()}
+        self.codigos = list(codigos)
+        self.descripciones = list(descripciones)  # Descripción con la que se vendió cada código por primera vez
+        self.sesiones = list(sesiones)
+        self.cajeros = list(cajeros)
+        self.ultimo_id = ultimo_id  # Id de la última línea incorporada
+        # Primera línea de cada ticket: las líneas de un ticket se guardan juntas
+        tickets = self.arreglos["ticket"]
+        self.inicio_ticket = np.ones(len(tickets), dtype=bool)
+        self.inicio_ticket[1:] = tickets[1:] != tickets[:-1]
+
+    def __len__(self):
+        return len(self.arreglos["dia"])
+
+    def __getitem__(self, columna):
+        return self.arreglos[columna]
+
+
+def _posiciones(valores, lista):
+    """Convierte textos en su posición en lista, agregando al final los que no estaban."""
+    mapa = {valor: i for i, valor in enumerate(lista)}
+    posiciones = []
+    for valor in valores:
+        posicion = mapa.get(valor)
+        if posicion is None:
+            posicion = mapa[valor] = len(lista)
+            lista.append(valor)
+        posiciones.append(posicion)
+    return posiciones
+
+
+class AnalisisVentas:
+    """
+    Mantiene las Columnas de todas las ventas y resuelve los resúmenes por
+    producto, día, cajero o sesión en un rango de días.
+
+    actualizar() puede correr en el hilo de fondo: arma una Columnas nueva y la
+    reemplaza de una vez, así las consultas siempre ven una foto completa.
+    """
+
+    def __init__(self, ruta_cache=None):
+        self.ruta_cache = ruta_cache or os.path.join(os.path.dirname(almacenamiento.RUTA_DB), NOMBRE_CACHE)
+        self.columnas = Columnas()
+        self._cache_leido = False
+        self._lineas_en_cache = 0
+        self._candado = threading.Lock()  # Un solo actualizar() a la vez
+
+    # ------------------ CARGA ------------------
+
+    def actualizar(self):
+        """
+        Incorpora las líneas de tickets guardadas desde la última vez.
+        Lanza sqlite3.Error si la base de datos no se puede leer.
+
+        :return: Cantidad de líneas nuevas.
+        """
+        with self._candado:
+            if not self._cache_leido:
+                self._cache_leido = True
+                self.columnas = self._leer_cache() or self.columnas
+                self._lineas_en_cache = len(self.columnas)
+            actual = self.columnas
+            if not self._es_prefijo(actual):
+                # Se borraron ventas (reinicio de la base): se relee todo
+                actual = Columnas()
+                self._lineas_en_cache = -MIN_LINEAS_CACHE  # El caché en disco ya no sirve: se reescribe siempre
+            nuevas = self._leer_lineas(actual)
+            if nuevas is not self.columnas:
+                self.columnas = nuevas
+                # Las pocas líneas de cada día se leen rápido: el caché se reescribe de a muchas
+                if abs(len(nuevas) - self._lineas_en_cache) >= MIN_LINEAS_CACHE:
+                    self._guardar_cache(nuevas)
+            return len(nuevas) - len(actual)
+
+    @staticmethod
+    def _es_prefijo(columnas):
+        """Indica si las líneas ya incorporadas siguen en la base de datos."""
+        if not columnas.ultimo_id:
+            return True
+        guardadas = almacenamiento.conexion().execute(
+            "SELECT COUNT(*) FROM lineas_ticket WHERE id <= ?", (columnas.ultimo_id,)
+        ).fetchone()[0]
+        return guardadas == len(columnas)
+
+    @staticmethod
+    def _leer_lineas(actual):
+        cursor = almacenamiento.conexion().cursor()
+        cursor.row_factory = None  # Tuplas: sqlite3.Row cuesta el doble con millones de filas
+        cursor.execute(
+            "SELECT id, ticket_id, lower(codigo), descripcion, cantidad, subtotal FROM lineas_ticket "
+            "WHERE id > ? ORDER BY id", (actual.ultimo_id,)
+        )
+        lista_codigos, lista_descripciones = list(actual.codigos), list(actual.descripciones)
+        mapa = {c: i for i, c in enumerate(lista_codigos)}
+        bloques = {"producto": [], "cantidad": [], "subtotal": [], "ticket": []}
+        ultimo_id = actual.ultimo_id
+        # Por bloques, para no tener millones de tuplas en memoria a la vez
+        while True:
+            filas = cursor.fetchmany(TAMANO_BLOQUE)
+            if not filas:
+                break
+            ids, tickets, codigos, descripciones, cantidades, subtotales = zip(*filas)
+            producto = []
+            for codigo, descripcion in zip(codigos, descripciones):
+                posicion = mapa.get(codigo)
+                if posicion is None:
+                    posicion = mapa[codigo] = len(lista_codigos)
+                    lista_codigos.append(codigo or "")
+                    lista_descripciones.append(descripcion or "")
+                producto.append(posicion)
+            bloques["producto"].append(np.asarray(producto, dtype=TIPOS["producto"]))
+            bloques["cantidad"].append(np.asarray([c or 0 for c in cantidades], dtype=TIPOS["cantidad"]))
+            bloques["subtotal"].append(np.asarray([s or 0 for s in subtotales], dtype=TIPOS["subtotal"]))
+            bloques["ticket"].append(np.asarray(tickets, dtype=TIPOS["ticket"]))
+            ultimo_id = ids[-1]
+        if ultimo_id == actual.ultimo_id:
+            return actual
+        nuevos = {columna: np.concatenate(partes) for columna, partes in bloques.items()}
+        tickets = nuevos["ticket"]
+
+        # Día, sesión y cajero se leen una vez por ticket y se reparten a sus líneas
+        tickets = np.asarray(tickets, dtype=np.int64)
+        datos_tickets = cursor.execute(
+            "SELECT id, dia, num_session, cajero FROM tickets WHERE id >= ? ORDER BY id", (int(tickets.min()),)
+        ).fetchall()
+        ids_tickets, dias, sesiones, cajeros = zip(*datos_tickets)
+        ordinales = {}
+        for dia in set(dias):
+            try:
+                ordinales[dia] = datetime.strptime(dia, "%d-%m-%Y").toordinal()
+            except (TypeError, ValueError):
+                ordinales[dia] = 0  # Día ilegible: queda fuera de cualquier rango
+        lista_sesiones, lista_cajeros = list(actual.sesiones), list(actual.cajeros)
+        por_ticket = {
+            "dia": np.asarray([ordinales[d] for d in dias], dtype=TIPOS["dia"]),
+            "sesion": np.asarray(_posiciones([s or "" for s in sesiones], lista_sesiones), dtype=TIPOS["sesion"]),
+            "cajero": np.asarray(_posiciones([c or "" for c in cajeros], lista_cajeros), dtype=TIPOS["cajero"]),
+        }
+        # Las líneas siempre tienen su ticket (la clave foránea borra las líneas con el ticket)
+        fila_ticket = np.searchsorted(np.asarray(ids_tickets, dtype=np.int64), tickets)
+
+        for columna, valores in por_ticket.items():
+            nuevos[columna] = valores[fila_ticket]
+        arreglos = {columna: np.concatenate([actual[columna], nuevos[columna]]) for columna in TIPOS}
+        return Columnas(arreglos, lista_codigos, lista_descripciones, lista_sesiones, lista_cajeros, ultimo_id)
+
+    def _leer_cache(self):
+        try:
+            with np.load(self.ruta_cache, allow_pickle=False) as datos:
+                arreglos = {c: datos[c].astype(t, copy=False) for c, t in TIPOS.items()}
+                return Columnas(arreglos, datos["codigos"].tolist(), datos["descripciones"].tolist(),
+                                datos["sesiones"].tolist(), datos["cajeros"].tolist(), int(datos["ultimo_id"]))
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Caché de análisis de ventas inválido, se relee el historial: {e}")
+            return None
+
+    def _guardar_cache(self, columnas):
+        temporal = self.ruta_cache + ".tmp.npz"  # np.savez agrega .npz si la ruta no termina así
+        try:
+            os.makedirs(os.path.dirname(self.ruta_cache) or ".", exist_ok=True)
+            np.savez(temporal, ultimo_id=columnas.ultimo_id,
+                     codigos=np.array(columnas.codigos, dtype=str),
+                     descripciones=np.array(columnas.descripciones, dtype=str),
+                     sesiones=np.array(columnas.sesiones, dtype=str),
+                     cajeros=np.array(columnas.cajeros, dtype=str), **columnas.arreglos)
+            os.replace(temporal, self.ruta_cache)
+            self._lineas_en_cache = len(columnas)
+        except OSError as e:
+            # Sin caché solo se tarda más en la próxima apertura
+            print(f"No se pudo guardar el caché de análisis de ventas: {e}")
+
+    # ------------------ CONSULTAS ------------------
+
+    @staticmethod
+    def _rango(columnas, desde=None, hasta=None):
+        """Máscara de las líneas entre los días desde y hasta (date, ambos incluidos)."""
+        dias = columnas["dia"]
+        mascara = dias > 0
+        if desde is not None:
+            mascara &= dias >= desde.toordinal()
+        if hasta is not None:
+            mascara &= dias <= hasta.toordinal()
+        return mascara
+
+    def agrupar(self, columna, desde=None, hasta=None):
+        """
+        Suma las líneas del rango agrupadas por una columna ("producto", "dia",
+        "sesion" o "cajero").
+
+        :return: Diccionario de arreglos del mismo largo, uno por grupo con
+                 ventas: "grupo" (posición o, para "dia", ordinal), "lineas",
+                 "tickets", "cantidad" y "subtotal" (centavos).
+        """
+        columnas = self.columnas
+        mascara = self._rango(columnas, desde, hasta)
+        grupos = columnas[columna][mascara]
+        if columna == "dia" and len(grupos):
+            base = int(grupos.min())
+            grupos = grupos - base  # bincount necesita posiciones chicas
+        else:
+            base = 0
+        largo = int(grupos.max()) + 1 if len(grupos) else 0
+        lineas = np.bincount(grupos, minlength=largo)
+        con_ventas = np.flatnonzero(lineas)
+        resumen = {
+            "grupo": con_ventas + base,
+            "lineas": lineas[con_ventas],
+            "tickets": np.bincount(grupos, weights=columnas.inicio_ticket[mascara], minlength=largo)[con_ventas],
+            "cantidad": np.bincount(grupos, weights=columnas["cantidad"][mascara], minlength=largo)[con_ventas],
+            "subtotal": np.bincount(grupos, weights=columnas["subtotal"][mascara], minlength=largo)[con_ventas],
+        }
+        resumen["tickets"] = resumen["tickets"].astype(np.int64)
+        resumen["subtotal"] = np.rint(resumen["subtotal"]).astype(np.int64)
+        return resumen
+
+    def mas_vendidos(self, desde=None, hasta=None, limite=50, por="subtotal"):
+        """
+        Los limite productos con más ventas en el rango, ordenados por "subtotal"
+        (recaudado) o "lineas" (veces vendido).
+
+        :return: Lista de diccionarios con "codigo", "descripcion", "lineas",
+                 "cantidad" y "subtotal" (en pesos).
+        """
+        columnas = self.columnas
+        resumen = self.agrupar("producto", desde, hasta)
+        valores = resumen[por]
+        if len(valores) > limite:
+            # argpartition elige los limite mayores sin ordenar todo el catálogo
+            elegidos = np.argpartition(-valores, limite - 1)[:limite]
+        else:
+            elegidos = np.arange(len(valores))
+        elegidos = elegidos[np.argsort(-valores[elegidos], kind="stable")]
+        return [{
+            "codigo": columnas.codigos[resumen["grupo"][i]],
+            "descripcion": columnas.descripciones[resumen["grupo"][i]],
+            "lineas": int(resumen["lineas"][i]),
+            "cantidad": float(resumen["cantidad"][i]),
+            "subtotal": int(resumen["subtotal"][i]) / 100,
+        } for i in elegidos]
+
+    def por_dia(self, desde=None, hasta=None):
+        """Ventas de cada día del rango con ventas: "dia" (date), "tickets", "lineas" y "subtotal" (pesos)."""
+        resumen = self.agrupar("dia", desde, hasta)
+        return [{
+            "dia": date.fromordinal(int(ordinal)),
+            "tickets": int(tickets),
+            "lineas": int(lineas),
+            "subtotal": int(subtotal) / 100,
+        } for ordinal, tickets, lineas, subtotal in
+            zip(resumen["grupo"], resumen["tickets"], resumen["lineas"], resumen["subtotal"])]
+
+    def por_cajero(self, desde=None, hasta=None, columna="cajero"):
+        """
+        Ventas de cada cajero (o, con columna="sesion", de cada sesión) del
+        rango: "nombre", "tickets", "lineas" y "subtotal" (pesos), de mayor a
+        menor recaudado.
+        """
+        columnas = self.columnas
+        nombres = columnas.cajeros if columna == "cajero" else columnas.sesiones
+        resumen = self.agrupar(columna, desde, hasta)
+        orden = np.argsort(-resumen["subtotal"], kind="stable")
+        return [{
+            "nombre": nombres[resumen["grupo"][i]],
+            "tickets": int(resumen["tickets"][i]),
+            "lineas": int(resumen["lineas"][i]),
+            "subtotal": int(resumen["subtotal"][i]) / 100,
+        } for i in orden]
+
+
+_analisis = None
+
+
+def obtener_analisis():
+    """Retorna la instancia compartida del análisis de ventas."""
+    global _analisis
+    if _analisis is None:
+        _analisis = AnalisisVentas()
+    return _analisis
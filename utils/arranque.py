@@ -0,0 +1,42 @@
+# utils/arranque.py
+
+"""
+Tiempos de arranque de la aplicación, para ver en qué se va el tiempo hasta que
+aparece la ventana. Se imprimen ejecutando: python main.py --tiempos
+"""
+
+import time
+from contextlib import contextmanager
+
+_inicio = time.perf_counter()
+_etapas = []  # (etapa, segundos desde el inicio, duración en segundos)
+
+
+@contextmanager
+def medir(etapa):
+    """Anota cuánto tarda el bloque."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fin = time.perf_counter()
+        _etapas.append((etapa, inicio - _inicio, fin - inicio))
+
+
+def marcar(etapa):
+    """Anota un instante (sin duración), por ejemplo "ventana visible"."""
+    _etapas.append((etapa, time.perf_counter() - _inicio, 0.0))
+
+
+def etapas():
+    """Retorna la lista de (etapa, inicio, duración) en segundos."""
+    return list(_etapas)
+
+
+def informe():
+    """Texto con las etapas en el orden en que empezaron."""
+    lineas = [f"{'Etapa':<34}{'Inicio':>10}{'Duración':>12}"]
+    for etapa, inicio, duracion in sorted(_etapas, key=lambda e: e[1]):
+        duracion_txt = f"{duracion * 1000:9.1f} ms" if duracion else ""
+        lineas.append(f"{etapa:<34}{inicio * 1000:7.1f} ms{duracion_txt:>12}")
+    return "\n".join(lineas)
@@ -0,0 +1,181 @@
+# utils/busqueda.py
+
+"""
+Búsqueda aproximada de productos por código y descripción.
+"""
+
+import difflib
+
+from utils.indice_productos import obtener_indice
+
+CUTOFF = 0.8
+
+
+def tokenizar(texto):
+    """Divide un texto en tokens en minúsculas, igual que la búsqueda de Caja."""
+    return texto.lower().split()
+
+
+def bigramas(token):
+    """
+    Bigramas del token con marcas de inicio y fin.
+
+    Dos tokens con similitud >= 0.8 según difflib siempre comparten al menos uno
+    de estos bigramas, por lo que sirven para generar candidatos sin perder
+    coincidencias (con trigramas sí se pierden, por ejemplo 'ab' y 'adb').
+    """
+    marcado = f"^{token}$"
+    return {marcado[i:i + 2] for i in range(len(marcado) - 1)}
+
+
+class MotorBusqueda:
+    """
+    Índice invertido de tokens sobre "codigo descripcion" de cada producto.
+
+    Para cada token de la búsqueda se generan candidatos del vocabulario mediante
+    bigramas y solo esa lista corta se puntúa con difflib. Se mantiene la regla de
+    Caja: un producto coincide si cada token buscado tiene algún token del
+    producto con similitud >= 0.8.
+    """
+
+    def __init__(self, indice=None):
+        self.indice = indice or obtener_indice()
+        self._tokens_por_producto = {}  # clave -> set de tokens
+        self._productos_por_token = {}  # token -> set de claves
+        self._tokens_por_bigrama = {}  # bigrama -> set de tokens
+        self._similares = {}  # token buscado -> {token del vocabulario: similitud}
+        self.version = 0  # Aumenta cada vez que cambian los tokens de algún producto
+        self.indice.agregar_observador(self._al_cambiar_indice)
+        self._al_cambiar_indice(self.indice.productos(), [])
+
+    # ------------------ MANTENIMIENTO DEL ÍNDICE ------------------
+
+    def _al_cambiar_indice(self, cambiados, eliminados):
+        for clave in eliminados:
+            if clave in self._tokens_por_producto:
+                self.version += 1
+            self._quitar_producto(clave)
+        for producto in cambiados:
+            clave = str(producto.get("codigo", "")).lower()
+            anteriores = self._tokens_por_producto.get(clave)
+            self._quitar_producto(clave)
+            self._agregar_producto(clave, producto)
+            # Las ventas solo cambian el stock: los resultados de buscar() siguen valiendo
+            if self._tokens_por_producto[clave] != anteriores:
+                self.version += 1
+
+    def _agregar_producto(self, clave, producto):
+        tokens = set(tokenizar(f"{producto.get('codigo', '')} {producto.get('descripcion', '')}"))
+        self._tokens_por_producto[clave] = tokens
+        for token in tokens:
+            claves = self._productos_por_token.get(token)
+            if claves is None:
+                claves = self._productos_por_token[token] = set()
+                for bigrama in bigramas(token):
+                    self._tokens_por_bigrama.setdefault(bigrama, set()).add(token)
+                self._similares.clear()  # El vocabulario cambió
+            claves.add(clave)
+
+    def _quitar_producto(self, clave):
+        tokens = self._tokens_por_producto.pop(clave, ())
+        for token in tokens:
+            claves = self._productos_por_token.get(token)
+            if claves is None:
+                continue
+            claves.discard(clave)
+            if not claves:
+                del self._productos_por_token[token]
+                for bigrama in bigramas(token):
+                    del_tokens = self._tokens_por_bigrama.get(bigrama)
+                    if del_tokens is not None:
+                        del_tokens.discard(token)
+                        if not del_tokens:
+                            del self._tokens_por_bigrama[bigrama]
+                self._similares.clear()
+
+    # ------------------ CONSULTAS ------------------
+
+    def similares(self, token):
+        """
+        Retorna {token del vocabulario: similitud} con los tokens que superan el
+        cutoff para el token buscado.
+        """
+        if token in self._similares:
+            return self._similares[token]
+
+        candidatos = set()
+        for bigrama in bigramas(token):
+            candidatos |= self._tokens_por_bigrama.get(bigrama, set())
+
+        # Mismas comprobaciones y en el mismo orden que difflib.get_close_matches;
+        # real_quick_ratio descarta enseguida los tokens de largo incompatible
+        resultado = {}
+        s = difflib.SequenceMatcher()
+        s.set_seq2(token)
+        for candidato in candidatos:
+            s.set_seq1(candidato)
+            if (s.real_quick_ratio() >= CUTOFF and
+                    s.quick_ratio() >= CUTOFF and
+                    s.ratio() >= CUTOFF):
+                resultado[candidato] = s.ratio()
+
+        self._similares[token] = resultado
+        return resultado
+
+    def buscar(self, texto, limite=None):
+        """
+        Busca los productos en los que cada token del texto tiene una coincidencia
+        aproximada.
+
+        :param texto: Texto ingresado (código y/o palabras de la descripción).
+        :param limite: Cantidad máxima de resultados, o None para todos.
+        :return: Lista de (producto, puntaje) ordenada de mejor a peor.
+        """
+        tokens = tokenizar(texto)
+        if not tokens:
+            return []
+
+        por_token = []
+        for token in tokens:
+            similares = self.similares(token)
+            claves = set()
+            for candidato in similares:
+                claves |= self._productos_por_token[candidato]
+            if not claves:
+                return []
+            por_token.append((similares, claves))
+
+        # Intersectar empezando por el conjunto más chico
+        conjuntos = sorted((claves for _, claves in por_token), key=len)
+        coincidencias = set(conjuntos[0])
+        for claves in conjuntos[1:]:
+            coincidencias &= claves
+            if not coincidencias:
+                return []
+
+        resultados = []
+        for clave in coincidencias:
+            producto = self.indice.obtener(clave)
+            if producto is None:
+                continue
+            tokens_producto = self._tokens_por_producto[clave]
+            puntaje = 0.0
+            for similares, _ in por_token:
+                puntaje += max(similares[t] for t in tokens_producto if t in similares)
+            resultados.append((producto, puntaje / len(por_token)))
+
+        resultados.sort(key=lambda r: (-r[1], r[0].get("descripcion", "")))
+        if limite is not None:
+            resultados = resultados[:limite]
+        return resultados
+
+
+_motor = None
+
+
+def obtener_motor():
+    """Retorna la instancia compartida del motor de búsqueda."""
+    global _motor
+    if _motor is None:
+        _motor = MotorBusqueda()
+    return _motor
@@ -0,0 +1,141 @@
+# utils/cache_productos.py
+
+"""
+Caché de las búsquedas de Caja ya resueltas: texto escrito -> producto.
+
+Los códigos exactos no pasan por aquí: el índice de productos ya los resuelve
+con una consulta al diccionario. Lo que se ahorra es la búsqueda aproximada de
+los nombres que se escriben una y otra vez.
+"""
+
+import heapq
+
+from utils.busqueda import obtener_motor
+from utils.indice_productos import obtener_indice
+
+CAPACIDAD = 500  # Lecturas guardadas; al llenarse se descarta la menos usada
+SEMILLAS = CAPACIDAD // 2  # Descripciones de los más vendidos que se cargan al abrir Caja
+
+
+class CacheProductos:
+    """
+    Guarda por texto normalizado la clave del producto al que se resolvió la
+    búsqueda aproximada, con la cantidad de usos. Al llenarse se descarta la entrada de menor peso
+    (sus usos más las ventas recientes del producto); cada CAPACIDAD
+    inserciones los usos se reducen a la mitad para que el caché se adapte a
+    lo que se vende ahora.
+
+    Cada entrada guarda la versión del motor con la que se resolvió y se
+    descarta si cambiaron los códigos o descripciones de los productos (las
+    ventas solo cambian el stock y no las invalidan).
+    """
+
+    def __init__(self, indice=None, motor=None, capacidad=CAPACIDAD):
+        self.indice = indice or obtener_indice()
+        self.motor = motor or obtener_motor()
+        self.capacidad = capacidad
+        self._entradas = {}  # texto -> [clave, versión del motor, usos]
+        self.ventas = {}  # clave -> veces vendido recientemente
+        self._inserciones = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.descartes = 0
+
+    @staticmethod
+    def normalizar(texto):
+        return " ".join(texto.lower().split())
+
+    def obtener(self, texto):
+        """Retorna el producto guardado para el texto, o None si no está o ya no vale."""
+        texto = self.normalizar(texto)
+        entrada = self._entradas.get(texto)
+        if entrada is not None:
+            producto = self.indice.obtener(entrada[0])
+            if producto is not None and entrada[1] == self.motor.version:
+                entrada[2] += 1
+                self.aciertos += 1
+                return producto
+            del self._entradas[texto]
+        self.fallos += 1
+        return None
+
+    def recordar(self, texto, producto):
+        """Guarda el producto al que la búsqueda aproximada resolvió el texto."""
+        texto = self.normalizar(texto)
+        clave = str(producto.get("codigo", "")).lower()
+        version = self.motor.version
+        entrada = self._entradas.get(texto)
+        if entrada is not None:
+            entrada[0], entrada[1] = clave, version
+            return
+        if len(self._entradas) >= self.capacidad:
+            self._descartar()
+        self._entradas[texto] = [clave, version, 0]
+        self._inserciones += 1
+        if self._inserciones % self.capacidad == 0:
+            for entrada in self._entradas.values():
+                entrada[2] //= 2
+
+    def _descartar(self):
+        texto = min(self._entradas, key=lambda t: self._peso(self._entradas[t]))
+        del self._entradas[texto]
+        self.descartes += 1
+
+    def _peso(self, entrada):
+        return entrada[2] + self.ventas.get(entrada[0], 0)
+
+    def sembrar(self, ventas, cantidad=SEMILLAS):
+        """
+        Carga las ventas recientes ({clave: veces}), que suman al peso de las
+        entradas al elegir cuál descartar, y guarda la descripción de los
+        cantidad productos más vendidos para que su primera búsqueda por nombre
+        ya salga del caché.
+
+        Solo se guardan las descripciones que la búsqueda aproximada resuelve a
+        ese único producto: las ambiguas siguen mostrando la lista en Caja.
+        """
+        self.ventas = dict(ventas)
+        for clave in heapq.nlargest(cantidad, self.ventas, key=self.ventas.get):
+            if len(self._entradas) >= self.capacidad:
+                break
+            producto = self.indice.obtener(clave)
+            if producto is None:
+                continue
+            texto = self.normalizar(producto.get("descripcion", ""))
+            if not texto or texto in self._entradas:
+                continue
+            coincidencias = self.motor.buscar(texto, limite=2)
+            if len(coincidencias) == 1 and str(coincidencias[0][0].get("codigo", "")).lower() == clave:
+                self.recordar(texto, producto)
+
+    def registrar_venta(self, codigos):
+        """Suma una venta a cada código, para que sus entradas se conserven."""
+        for codigo in codigos:
+            clave = str(codigo).lower()
+            self.ventas[clave] = self.ventas.get(clave, 0) + 1
+
+    def reiniciar_estadisticas(self):
+        self.aciertos = self.fallos = self.descartes = 0
+
+    def estadisticas(self):
+        """Aciertos, fallos y tasa de aciertos, para ajustar la capacidad."""
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._entradas),
+            "capacidad": self.capacidad,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "descartes": self.descartes,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else None,
+        }
+
+
+_cache = None
+
+
+def obtener_cache():
+    """Retorna la instancia compartida del caché de productos."""
+    global _cache
+    if _cache is None:
+        _cache = CacheProductos()
+    return _cache
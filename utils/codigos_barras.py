@@ -0,0 +1,77 @@
+# utils/codigos_barras.py
+
+"""
+Decodificación de las etiquetas EAN-13 que imprime la balanza para los productos
+pesables. Los códigos con prefijo 20 a 29 son de uso interno del comercio y
+llevan el PLU del producto y el peso o el precio de la porción:
+
+    PP LLLLL VVVVV D
+    |  |     |     └ dígito verificador EAN-13
+    |  |     └ peso en gramos o precio (según el prefijo)
+    |  └ PLU
+    └ prefijo (20-29)
+
+El formato se puede ajustar a la balanza con ./db/balanza.json, por ejemplo:
+
+    {"largo_plu": 4, "prefijos": {"20": "peso", "21": "precio"}, "decimales_precio": 2}
+"""
+
+import json
+import os
+
+from utils.dinero import CENTAVOS_POR_PESO
+
+RUTA_FORMATO = "./db/balanza.json"
+
+FORMATO_POR_DEFECTO = {
+    "largo_plu": 5,  # Dígitos del PLU después del prefijo
+    # Qué lleva cada prefijo: "peso" (gramos) o "precio"
+    "prefijos": {str(prefijo): "peso" for prefijo in range(20, 30)},
+    "decimales_precio": 0,  # Decimales del precio en la etiqueta
+    "verificar_digito": True,
+}
+
+
+def cargar_formato(ruta=RUTA_FORMATO):
+    """Retorna el formato de etiquetas, con los valores de ruta si el archivo existe."""
+    formato = dict(FORMATO_POR_DEFECTO)
+    if os.path.exists(ruta):
+        try:
+            with open(ruta, "r", encoding="utf-8") as file:
+                formato.update(json.load(file))
+        except (json.JSONDecodeError, IOError, TypeError, ValueError) as e:
+            print(f"No se pudo leer {ruta}, se usa el formato por defecto: {e}")
+    return formato
+
+
+def digito_verificador_ean13(digitos):
+    """Calcula el dígito verificador de los primeros 12 dígitos de un EAN-13."""
+    suma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digitos[:12]))
+    return (10 - suma % 10) % 10
+
+
+def decodificar(codigo, formato=FORMATO_POR_DEFECTO):
+    """
+    Interpreta una etiqueta de balanza.
+
+    :return: Diccionario {"plu", "gramos", "importe"} (importe en centavos; solo
+             uno de los dos tiene valor) o None si el código no es una etiqueta
+             de balanza con el formato indicado.
+    """
+    codigo = codigo.strip()
+    if len(codigo) != 13 or not codigo.isdigit():
+        return None
+    tipo = formato["prefijos"].get(codigo[:2])
+    if tipo is None:
+        return None
+    if formato["verificar_digito"] and digito_verificador_ean13(codigo) != int(codigo[12]):
+        return None
+
+    fin_plu = 2 + formato["largo_plu"]
+    plu = int(codigo[2:fin_plu])
+    valor = int(codigo[fin_plu:12])
+    if tipo == "peso":
+        return {"plu": plu, "gramos": valor, "importe": None}
+    # El precio se pasa a centavos según los decimales que imprime la balanza
+    importe = valor * CENTAVOS_POR_PESO // 10 ** formato["decimales_precio"]
+    return {"plu": plu, "gramos": None, "importe": importe}
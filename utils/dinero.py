@@ -0,0 +1,56 @@
+# utils/dinero.py
+
+"""
+Montos de dinero como enteros de centavos.
+
+Los float no representan exactamente la mayoría de los montos con centavos, y al
+sumarlos muchas veces el error se acumula (0.1 + 0.2 != 0.3). Los montos se
+guardan y se suman como enteros de centavos, que son exactos; solo se pasan a
+pesos (float) para mostrarlos o para las pantallas que todavía los esperan así.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENTAVOS_POR_PESO = 100
+
+
+def a_centavos(monto):
+    """
+    Convierte un monto en pesos (float, int, str o None) a centavos, redondeando
+    al centavo más cercano (las mitades hacia arriba).
+
+    :raises ValueError: Si el monto no es un número (igual que float()).
+    """
+    if monto is None or monto == "":
+        return 0
+    if isinstance(monto, int):
+        return monto * CENTAVOS_POR_PESO
+    # str() da la representación decimal más corta del float: 0.285 -> "0.285"
+    try:
+        centavos = Decimal(str(monto).strip()) * CENTAVOS_POR_PESO
+        return int(centavos.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        raise ValueError(f"Monto inválido: {monto!r}") from None
+
+
+def a_pesos(centavos):
+    """Convierte centavos a pesos (float) para mostrarlos."""
+    return centavos / CENTAVOS_POR_PESO
+
+
+def sumar(montos):
+    """Suma exacta, en centavos, de montos en pesos."""
+    return sum(a_centavos(monto) for monto in montos)
+
+
+def porcentaje(centavos, por_ciento):
+    """Retorna el por_ciento de un monto en centavos, redondeado al centavo."""
+    valor = Decimal(centavos) * Decimal(str(por_ciento)) / 100
+    return int(valor.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def formatear(centavos):
+    """Texto con dos decimales ("1234.50") sin pasar por float."""
+    signo = "-" if centavos < 0 else ""
+    pesos, resto = divmod(abs(centavos), CENTAVOS_POR_PESO)
+    return f"{signo}{pesos}.{resto:02d}"
@@ -0,0 +1,47 @@
+# utils/exportar_tickets.py
+
+"""
+Exporta los tickets de la base de datos al formato del antiguo db/tickets.json,
+para herramientas o planillas que todavía leen ese archivo. Por defecto se
+escriben en db/tickets_exportados.json.
+
+Uso: python -m utils.exportar_tickets [ruta_destino] [--dia dd-mm-aaaa] [--sesion num_session]
+"""
+
+import argparse
+import os
+
+from utils import almacenamiento
+from utils.persistencia import escribir_json
+
+# No es db/tickets.json: ese es el respaldo original que importa la migración y no se pisa
+RUTA_TICKETS = os.path.join(almacenamiento.DB_DIR, "tickets_exportados.json")
+
+
+def exportar_tickets(ruta=RUTA_TICKETS, dia=None, num_session=None):
+    """
+    Escribe los tickets (opcionalmente filtrados) como una lista JSON.
+
+    El archivo se reemplaza de forma atómica: quien lo esté leyendo nunca ve un
+    archivo a medio escribir.
+
+    :return: Cantidad de tickets exportados.
+    """
+    tickets = almacenamiento.cargar_tickets(dia=dia, num_session=num_session)
+    escribir_json(ruta, tickets)
+    return len(tickets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta los tickets al formato de tickets.json.")
+    parser.add_argument("ruta", nargs="?", default=RUTA_TICKETS, help="Archivo de destino.")
+    parser.add_argument("--dia", help="Exportar solo los tickets de este día (dd-mm-aaaa).")
+    parser.add_argument("--sesion", help="Exportar solo los tickets de esta sesión.")
+    args = parser.parse_args()
+
+    cantidad = exportar_tickets(args.ruta, dia=args.dia, num_session=args.sesion)
+    print(f"{cantidad} tickets exportados a {args.ruta}")
+
+
+if __name__ == "__main__":
+    main()
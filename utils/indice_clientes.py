@@ -0,0 +1,207 @@
+# utils/indice_clientes.py
+
+"""
+Índice en memoria de los clientes, compartido por Facturar (ventas a crédito) y
+la pantalla de Clientes.
+"""
+
+from bisect import bisect_left
+
+from utils import almacenamiento
+from utils.busqueda import tokenizar
+
+MAX_INSERCIONES = 100  # Con más tokens nuevos o quitados se reordena todo el vocabulario
+
+
+class IndiceClientes:
+    """
+    Mantiene los clientes en un diccionario por id, con un índice por documento
+    y un vocabulario ordenado de los tokens del nombre y del documento, como el
+    de las sugerencias de Caja: los tokens que empiezan con lo escrito se ubican
+    con dos búsquedas binarias, así filtrar mientras se escribe no recorre todos
+    los clientes ni relee la base de datos.
+
+    Después de guardar un cliente o un movimiento de deuda se llama a
+    refrescar(cliente_id), que relee solo ese cliente; refrescar() relee todos.
+    """
+
+    def __init__(self):
+        self._por_id = {}
+        self._por_documento = {}  # Documento -> id
+        self._tokens_por_cliente = {}  # Id -> set de tokens
+        self._ids_por_token = {}  # Token -> set de ids
+        self._vocabulario = []  # Tokens ordenados
+        self._textos = {}  # Id -> " token token ...", para probar prefijos
+        self._orden = None  # Caché de clientes() hasta el próximo cambio
+        self._cargado = False
+        self._observadores = []
+
+    def agregar_observador(self, funcion):
+        """
+        Registra una función que se llama con (cambiados, eliminados) cada vez
+        que el índice incorpora cambios: los clientes que cambiaron y los ids
+        que ya no existen.
+        """
+        if funcion not in self._observadores:
+            self._observadores.append(funcion)
+
+    def quitar_observador(self, funcion):
+        if funcion in self._observadores:
+            self._observadores.remove(funcion)
+
+    def refrescar(self, cliente_id=None):
+        """
+        Relee de la base de datos un cliente (o todos, sin cliente_id) e
+        incorpora lo que cambió. Lanza sqlite3.Error si no se puede leer.
+
+        :return: Tupla (cambiados, eliminados).
+        """
+        if cliente_id is None:
+            nuevos = {c["id"]: c for c in almacenamiento.cargar_clientes()}
+            eliminados = [i for i in self._por_id if i not in nuevos]
+            self._cargado = True
+        else:
+            cliente = almacenamiento.cargar_cliente(cliente_id)
+            nuevos = {cliente_id: cliente} if cliente is not None else {}
+            eliminados = [cliente_id] if cliente is None and cliente_id in self._por_id else []
+
+        cambiados = []
+        tocados = set()  # Tokens que pudieron entrar o salir del vocabulario
+        for id_cliente, cliente in nuevos.items():
+            if self._por_id.get(id_cliente) != cliente:
+                tocados |= self._quitar(id_cliente)
+                tocados |= self._agregar(cliente)
+                cambiados.append(cliente)
+        for id_cliente in eliminados:
+            tocados |= self._quitar(id_cliente)
+        self._actualizar_vocabulario(tocados)
+
+        if cambiados or eliminados:
+            self._orden = None
+            for funcion in list(self._observadores):
+                funcion(cambiados, eliminados)
+        return cambiados, eliminados
+
+    def _agregar(self, cliente):
+        """Indexa el cliente y retorna los tokens que no estaban en el índice."""
+        id_cliente = cliente["id"]
+        self._por_id[id_cliente] = cliente
+        documento = str(cliente.get("documento", "")).strip()
+        if documento:
+            self._por_documento[documento] = id_cliente
+        tokens = set(tokenizar(f"{cliente.get('nombre', '')} {documento}"))
+        self._tokens_por_cliente[id_cliente] = tokens
+        self._textos[id_cliente] = " " + " ".join(tokens)
+        nuevos = set()
+        for token in tokens:
+            ids = self._ids_por_token.get(token)
+            if ids is None:
+                ids = self._ids_por_token[token] = set()
+                nuevos.add(token)
+            ids.add(id_cliente)
+        return nuevos
+
+    def _quitar(self, id_cliente):
+        """Saca el cliente del índice y retorna los tokens que quedaron sin clientes."""
+        cliente = self._por_id.pop(id_cliente, None)
+        if cliente is None:
+            return set()
+        documento = str(cliente.get("documento", "")).strip()
+        if self._por_documento.get(documento) == id_cliente:
+            del self._por_documento[documento]
+        del self._textos[id_cliente]
+        quitados = set()
+        for token in self._tokens_por_cliente.pop(id_cliente, ()):
+            ids = self._ids_por_token[token]
+            ids.discard(id_cliente)
+            if not ids:
+                del self._ids_por_token[token]
+                quitados.add(token)
+        return quitados
+
+    def _actualizar_vocabulario(self, tocados):
+        if len(tocados) > MAX_INSERCIONES:
+            self._vocabulario = sorted(self._ids_por_token)
+            return
+        for token in tocados:
+            i = bisect_left(self._vocabulario, token)
+            presente = i < len(self._vocabulario) and self._vocabulario[i] == token
+            if token in self._ids_por_token:
+                if not presente:
+                    self._vocabulario.insert(i, token)
+            elif presente:
+                del self._vocabulario[i]
+
+    def _tokens_con_prefijo(self, prefijo):
+        inicio = bisect_left(self._vocabulario, prefijo)
+        # "\uffff" ordena después de cualquier caracter que siga al prefijo
+        fin = bisect_left(self._vocabulario, prefijo + "\uffff", inicio)
+        return self._vocabulario[inicio:fin]
+
+    def _cargar(self):
+        if not self._cargado:
+            self.refrescar()
+
+    def obtener(self, cliente_id):
+        """Retorna el cliente con ese id o None."""
+        self._cargar()
+        return self._por_id.get(cliente_id)
+
+    def obtener_por_documento(self, documento):
+        """Retorna el cliente con ese documento o None."""
+        self._cargar()
+        id_cliente = self._por_documento.get(str(documento).strip())
+        return self._por_id.get(id_cliente) if id_cliente is not None else None
+
+    def clientes(self):
+        """Retorna los clientes ordenados por nombre."""
+        self._cargar()
+        if self._orden is None:
+            self._orden = sorted(self._por_id.values(), key=lambda c: (c.get("nombre", "").lower(), c["id"]))
+        return self._orden
+
+    def buscar(self, texto):
+        """
+        Retorna los clientes en los que cada token del texto es el comienzo de
+        una palabra del nombre o del documento, ordenados por nombre. El cliente
+        cuyo documento es exactamente el texto va primero.
+        """
+        self._cargar()
+        tokens = tokenizar(texto)
+        if not tokens:
+            return list(self.clientes())
+
+        # Se intersectan los clientes de cada token empezando por el de menos
+        # palabras; un token que abarca más palabras que los clientes que
+        # quedan (un prefijo corto) se prueba cliente por cliente
+        rangos = sorted(((token, self._tokens_con_prefijo(token)) for token in tokens),
+                        key=lambda par: len(par[1]))
+        coincidencias, pendientes = None, []
+        for token, vocabulario in rangos:
+            if coincidencias is not None and len(vocabulario) > len(coincidencias):
+                pendientes.append(token)
+                continue
+            ids = set().union(*(self._ids_por_token[t] for t in vocabulario))
+            coincidencias = ids if coincidencias is None else coincidencias & ids
+        for token in pendientes:
+            marca = " " + token
+            coincidencias = {i for i in coincidencias if marca in self._textos[i]}
+
+        exacto = self._por_documento.get(texto.strip())
+        return sorted((self._por_id[i] for i in coincidencias),
+                      key=lambda c: (c["id"] != exacto, c.get("nombre", "").lower(), c["id"]))
+
+    def __len__(self):
+        self._cargar()
+        return len(self._por_id)
+
+
+_indice = None
+
+
+def obtener_indice_clientes():
+    """Retorna la instancia compartida del índice de clientes."""
+    global _indice
+    if _indice is None:
+        _indice = IndiceClientes()
+    return _indice
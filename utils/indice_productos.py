@@ -0,0 +1,132 @@
+# utils/indice_productos.py
+
+"""
+Índice en memoria de los productos del inventario, compartido por todas las pantallas.
+"""
+
+from utils import almacenamiento
+
+
+def plu_de_producto(producto):
+    """
+    PLU con el que la balanza identifica al producto: el campo "plu" si lo tiene
+    o, en los pesables, su código cuando es numérico. None si no tiene.
+    """
+    plu = producto.get("plu")
+    if plu is None and producto.get("es_pesable", False):
+        plu = str(producto.get("codigo", "")).strip()
+    try:
+        return int(plu)
+    except (TypeError, ValueError):
+        return None
+
+
+class IndiceProductos:
+    """
+    Mantiene los productos de la base de datos en un diccionario indexado por
+    código en minúsculas, de modo que la búsqueda por código no depende del
+    tamaño del catálogo. También indexa los productos por PLU para las
+    etiquetas de la balanza.
+    """
+
+    def __init__(self):
+        self._por_codigo = {}
+        self._por_plu = {}  # PLU -> código en minúsculas
+        self._lista = None  # Caché de productos() hasta el próximo cambio
+        self._rev = None  # Revisión de productos incorporada por última vez
+        self._observadores = []
+
+    def agregar_observador(self, funcion):
+        """
+        Registra una función que se llama con (cambiados, eliminados) cada vez
+        que el índice incorpora cambios de la base de datos.
+        """
+        if funcion not in self._observadores:
+            self._observadores.append(funcion)
+
+    def quitar_observador(self, funcion):
+        if funcion in self._observadores:
+            self._observadores.remove(funcion)
+
+    def refrescar(self, forzar=False):
+        """
+        Incorpora al índice únicamente los productos agregados, modificados o
+        eliminados desde la última carga. Con forzar=True se releen todos.
+
+        Lanza sqlite3.Error si la base de datos no se puede leer; en ese caso el
+        índice conserva los datos que ya tenía.
+
+        :return: Tupla (cambiados, eliminados) con los productos que cambiaron y
+                 los códigos (en minúsculas) que ya no existen.
+        """
+        if forzar or self._rev is None:
+            rev = almacenamiento.revision_productos()
+            nuevos = {}
+            for p in almacenamiento.cargar_productos():
+                nuevos[str(p.get("codigo", "")).lower()] = p
+            eliminados = [clave for clave in self._por_codigo if clave not in nuevos]
+        else:
+            if almacenamiento.revision_productos() == self._rev:
+                return [], []
+            productos, eliminados, rev = almacenamiento.cambios_productos(self._rev)
+            nuevos = {str(p.get("codigo", "")).lower(): p for p in productos}
+            eliminados = [clave for clave in eliminados if clave in self._por_codigo]
+
+        cambiados = []
+        for clave, producto in nuevos.items():
+            anterior = self._por_codigo.get(clave)
+            if anterior != producto:
+                if anterior is not None:
+                    self._quitar_plu(clave, anterior)
+                self._por_codigo[clave] = producto
+                plu = plu_de_producto(producto)
+                if plu is not None:
+                    self._por_plu[plu] = clave
+                cambiados.append(producto)
+
+        for clave in eliminados:
+            self._quitar_plu(clave, self._por_codigo.pop(clave))
+
+        self._rev = rev
+        if cambiados or eliminados:
+            self._lista = None
+            for funcion in list(self._observadores):
+                funcion(cambiados, eliminados)
+        return cambiados, eliminados
+
+    def obtener(self, codigo):
+        """Retorna el producto con ese código (sin distinguir mayúsculas) o None."""
+        return self._por_codigo.get(str(codigo).strip().lower())
+
+    def obtener_por_plu(self, plu):
+        """Retorna el producto con ese PLU (número de la etiqueta de balanza) o None."""
+        clave = self._por_plu.get(plu)
+        return self._por_codigo.get(clave) if clave is not None else None
+
+    def _quitar_plu(self, clave, producto):
+        plu = plu_de_producto(producto)
+        if plu is not None and self._por_plu.get(plu) == clave:
+            del self._por_plu[plu]
+
+    def productos(self):
+        """Retorna la lista de productos indexados, en el orden en que se incorporaron."""
+        if self._lista is None:
+            self._lista = list(self._por_codigo.values())
+        return self._lista
+
+    def __contains__(self, codigo):
+        return self.obtener(codigo) is not None
+
+    def __len__(self):
+        return len(self._por_codigo)
+
+
+_indice = None
+
+
+def obtener_indice():
+    """Retorna la instancia compartida del índice de productos."""
+    global _indice
+    if _indice is None:
+        _indice = IndiceProductos()
+    return _indice
@@ -0,0 +1,69 @@
+# utils/persistencia.py
+
+"""
+Escritura segura de los archivos JSON que quedan fuera de la base de datos
+(session.json, usuarios.json y exportaciones).
+
+Los datos se escriben en un temporal del mismo directorio, se sincronizan al
+disco y recién entonces reemplazan al archivo original. Un corte de luz deja el
+archivo anterior o el nuevo completo, nunca uno truncado.
+"""
+
+import json
+import os
+import tempfile
+
+SUFIJO_TEMPORAL = ".tmp"
+
+
+def escribir_json(ruta, datos, indent=4):
+    """Escribe datos como JSON en ruta de forma atómica."""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    fd, temporal = tempfile.mkstemp(
+        prefix=f"{os.path.basename(ruta)}.", suffix=SUFIJO_TEMPORAL, dir=directorio
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(datos, file, indent=indent)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+    sincronizar_directorio(directorio)
+
+
+def sincronizar_directorio(directorio):
+    """Asegura que el cambio de nombre del archivo quede registrado en el disco."""
+    if os.name != "posix":
+        return
+    fd = os.open(directorio, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def limpiar_temporales(directorio):
+    """
+    Borra los temporales que dejó una escritura interrumpida.
+
+    :return: Lista de archivos borrados.
+    """
+    borrados = []
+    if not os.path.isdir(directorio):
+        return borrados
+    for nombre in os.listdir(directorio):
+        # Los temporales se llaman "<archivo>.json.<aleatorio>.tmp"
+        if ".json." in nombre and nombre.endswith(SUFIJO_TEMPORAL):
+            ruta = os.path.join(directorio, nombre)
+            try:
+                os.remove(ruta)
+                borrados.append(ruta)
+            except OSError:
+                pass
+    return borrados
@@ -0,0 +1,131 @@
+# utils/precios.py
+
+"""
+Precio efectivo de los productos: el precio de lista con la oferta vigente
+aplicada.
+
+La oferta es el porcentaje del campo "oferta". Si el producto tiene además
+"oferta_desde" y/o "oferta_hasta" (dd-mm-aaaa, ambos días incluidos), la oferta
+solo rige entre esas fechas; sin fechas rige siempre.
+"""
+
+from datetime import date, datetime, timedelta
+
+from utils.indice_productos import obtener_indice
+
+FORMATO_FECHA = "%d-%m-%Y"
+
+
+def leer_fecha(texto):
+    """
+    Convierte un texto dd-mm-aaaa en date (None si está vacío).
+
+    :raises ValueError: Si el texto no tiene el formato dd-mm-aaaa.
+    """
+    texto = str(texto or "").strip()
+    if not texto:
+        return None
+    return datetime.strptime(texto, FORMATO_FECHA).date()
+
+
+def periodo_oferta(producto):
+    """
+    Retorna (desde, hasta) de la oferta del producto; cualquiera puede ser None.
+    Una fecha mal escrita se ignora, como si no estuviera.
+    """
+    fechas = []
+    for campo in ("oferta_desde", "oferta_hasta"):
+        try:
+            fechas.append(leer_fecha(producto.get(campo)))
+        except ValueError:
+            print(f"Fecha de oferta inválida en {producto.get('codigo')}: {producto.get(campo)!r}")
+            fechas.append(None)
+    return tuple(fechas)
+
+
+def oferta_vigente(producto, dia=None):
+    """Retorna el porcentaje de oferta que rige el día indicado (hoy por defecto), o 0."""
+    oferta = float(producto.get("oferta", 0) or 0)
+    if oferta <= 0:
+        return 0
+    dia = dia or date.today()
+    desde, hasta = periodo_oferta(producto)
+    if (desde and dia < desde) or (hasta and dia > hasta):
+        return 0
+    return oferta
+
+
+def precio_efectivo(producto, dia=None):
+    """Precio del producto con la oferta vigente el día indicado (hoy por defecto)."""
+    precio = float(producto.get("precio", 0) or 0)
+    oferta = oferta_vigente(producto, dia)
+    if oferta > 0:
+        return precio * (1 - oferta / 100)
+    return precio
+
+
+def proximo_cambio(producto, dia):
+    """Primer día posterior a dia en que la oferta del producto empieza o termina."""
+    if float(producto.get("oferta", 0) or 0) > 0:
+        desde, hasta = periodo_oferta(producto)
+        if desde and dia < desde:
+            return desde
+        if hasta and dia <= hasta:
+            return hasta + timedelta(days=1)
+    return date.max
+
+
+class Precios:
+    """
+    Guarda el precio efectivo de cada producto ya calculado, para que Caja no
+    lo recalcule en cada lectura.
+
+    Un precio se descarta cuando el producto cambia (Informes, Editar,
+    Reposición y los inventarios guardan los productos y refrescan el índice,
+    que avisa a sus observadores) o cuando llega el día en que la oferta
+    empieza o termina.
+    """
+
+    def __init__(self, indice=None):
+        self.indice = indice or obtener_indice()
+        self._precios = {}  # Código en minúsculas -> (precio, calculado, vence)
+        self.indice.agregar_observador(self._productos_cambiados)
+
+    def _productos_cambiados(self, cambiados, eliminados):
+        for producto in cambiados:
+            self._precios.pop(str(producto.get("codigo", "")).lower(), None)
+        for clave in eliminados:
+            self._precios.pop(clave, None)
+
+    def precio(self, producto):
+        """Retorna el precio efectivo de hoy del producto."""
+        hoy = date.today()
+        clave = str(producto.get("codigo", "")).lower()
+        guardado = self._precios.get(clave)
+        if guardado is not None and guardado[1] <= hoy < guardado[2]:
+            return guardado[0]
+        precio = precio_efectivo(producto, hoy)
+        self._precios[clave] = (precio, hoy, proximo_cambio(producto, hoy))
+        return precio
+
+    def obtener(self, codigo):
+        """
+        Busca el producto por código en el índice.
+
+        :return: Tupla (producto, precio efectivo) o (None, None) si no existe.
+        """
+        producto = self.indice.obtener(codigo)
+        if producto is None:
+            return None, None
+        return producto, self.precio(producto)
+
+
+_precios = None
+
+
+def obtener_precios():
+    """Retorna la instancia compartida de los precios efectivos."""
+    global _precios
+    if _precios is None:
+        _precios = Precios()
+    return _precios
@@ -0,0 +1,69 @@
+# utils/stock.py
+
+"""
+Descuento de stock por ventas: cada ticket modifica solo las filas de los
+productos vendidos y deja el movimiento asentado en movimientos_stock.
+"""
+
+from utils import almacenamiento
+from utils.indice_productos import obtener_indice
+
+
+def cantidad_en_stock(producto, cantidad):
+    """
+    Convierte una cantidad del ticket a la unidad del inventario: los productos
+    pesables se venden en gramos y se guardan en kilos.
+    """
+    if producto.get("es_pesable", False):
+        return cantidad / 1000
+    return cantidad
+
+
+def productos_vendidos(articulos, indice=None):
+    """
+    Copia del índice los productos de los artículos de un ticket, para que el
+    hilo de fondo que guarda la venta no lea el índice compartido mientras la
+    interfaz lo modifica. Se llama en el hilo de la interfaz.
+
+    :return: Diccionario código en minúsculas -> copia del producto (None si no existe).
+    """
+    indice = indice or obtener_indice()
+    productos = {}
+    for articulo in articulos:
+        clave = str(articulo["codigo"]).lower()
+        if clave not in productos:
+            producto = indice.obtener(articulo["codigo"])
+            productos[clave] = dict(producto) if producto is not None else None
+    return productos
+
+
+def descontar_venta(articulos, numero_ticket, productos):
+    """
+    Resta del stock las cantidades vendidas en un ticket.
+
+    Se llama dentro de la misma almacenamiento.transaccion() que guarda el
+    ticket. El índice en memoria no se toca aquí: incorpora las filas cambiadas
+    con indice.refrescar() recién después del COMMIT, para no mostrar stock de
+    una venta que terminó en ROLLBACK.
+
+    :param articulos: Artículos del ticket (codigo, cantidad, ...).
+    :param numero_ticket: Número del ticket, queda como referencia del movimiento.
+    :param productos: Productos del ticket tomados con productos_vendidos().
+    :return: Lista de artículos cuyos productos no existen en el inventario.
+    """
+    diferencias = {}
+    sin_producto = []
+    for articulo in articulos:
+        producto = productos.get(str(articulo["codigo"]).lower())
+        if producto is None:
+            sin_producto.append(articulo)
+            continue
+        # Las líneas repetidas del mismo producto se suman en un único movimiento
+        clave = str(producto.get("codigo", "")).lower()
+        diferencias[clave] = diferencias.get(clave, 0) - cantidad_en_stock(producto, articulo["cantidad"])
+
+    faltantes = set(almacenamiento.registrar_movimientos_stock(diferencias, "venta", numero_ticket))
+    if faltantes:
+        # Productos eliminados desde otra pantalla después de cargar el índice
+        sin_producto.extend(a for a in articulos if str(a["codigo"]).lower() in faltantes)
+    return sin_producto
@@ -0,0 +1,226 @@
+# utils/sugerencias.py
+
+"""
+Sugerencias mientras se escribe en la búsqueda de Caja: productos cuyo código o
+palabras de la descripción empiezan con lo escrito, los más vendidos primero.
+"""
+
+from bisect import bisect_left
+
+from utils.busqueda import tokenizar
+from utils.indice_productos import obtener_indice
+
+LIMITE = 10
+MIN_CARACTERES = 2  # Con una sola letra coincide casi todo el catálogo
+DIAS_VENTAS = 30  # Ventas que cuentan para el orden de las sugerencias
+MAX_INSERCIONES = 100  # Con más tokens nuevos o quitados se reordena todo el vocabulario
+
+
+class Sugerencias:
+    """
+    Vocabulario ordenado de los tokens de "codigo descripcion" de cada producto.
+    Los tokens que empiezan con un prefijo quedan contiguos, así que se ubican
+    con dos búsquedas binarias sin recorrer el vocabulario.
+
+    Cada token del texto es un prefijo: un producto se sugiere si cada uno
+    coincide con el comienzo de alguno de sus tokens.
+    """
+
+    def __init__(self, indice=None):
+        self.indice = indice or obtener_indice()
+        self._tokens_por_producto = {}  # clave -> set de tokens
+        self._textos = {}  # clave -> " token token ...", para probar prefijos sin recorrer los tokens
+        self._productos_por_token = {}  # token -> set de claves
+        self._vocabulario = []  # Tokens ordenados
+        self.ventas = {}  # clave -> veces vendido en los últimos DIAS_VENTAS días
+        self._ranking = None  # Caché de ranking()
+        self.indice.agregar_observador(self._al_cambiar_indice)
+        self._al_cambiar_indice(self.indice.productos(), [])
+
+    # ------------------ MANTENIMIENTO DEL ÍNDICE ------------------
+
+    def _al_cambiar_indice(self, cambiados, eliminados):
+        tocados = set()  # Tokens que pudieron entrar o salir del vocabulario
+        for clave in eliminados:
+            tocados |= self._quitar_producto(clave)
+        for producto in cambiados:
+            clave = str(producto.get("codigo", "")).lower()
+            tocados |= self._quitar_producto(clave)
+            tocados |= self._agregar_producto(clave, producto)
+
+        if len(tocados) > MAX_INSERCIONES:
+            self._vocabulario = sorted(self._productos_por_token)
+            return
+        for token in tocados:
+            i = bisect_left(self._vocabulario, token)
+            presente = i < len(self._vocabulario) and self._vocabulario[i] == token
+            if token in self._productos_por_token:
+                if not presente:
+                    self._vocabulario.insert(i, token)
+            elif presente:
+                del self._vocabulario[i]
+
+    def _agregar_producto(self, clave, producto):
+        """Indexa el producto y retorna los tokens que no estaban en el índice."""
+        tokens = set(tokenizar(f"{producto.get('codigo', '')} {producto.get('descripcion', '')}"))
+        self._tokens_por_producto[clave] = tokens
+        self._textos[clave] = " " + " ".join(tokens)
+        nuevos = set()
+        for token in tokens:
+            claves = self._productos_por_token.get(token)
+            if claves is None:
+                claves = self._productos_por_token[token] = set()
+                nuevos.add(token)
+            claves.add(clave)
+        return nuevos
+
+    def _quitar_producto(self, clave):
+        """Saca el producto del índice y retorna los tokens que quedaron sin productos."""
+        quitados = set()
+        self._textos.pop(clave, None)
+        for token in self._tokens_por_producto.pop(clave, ()):
+            claves = self._productos_por_token[token]
+            claves.discard(clave)
+            if not claves:
+                del self._productos_por_token[token]
+                quitados.add(token)
+        return quitados
+
+    def cargar_ventas(self, ventas):
+        """Reemplaza las ventas por producto ({clave: veces}) usadas para ordenar."""
+        self.ventas = dict(ventas)
+        self._ranking = None
+
+    def registrar_venta(self, codigos):
+        """Suma una venta a cada código (una vez por línea de ticket, como cargar_ventas)."""
+        for codigo in codigos:
+            clave = str(codigo).lower()
+            self.ventas[clave] = self.ventas.get(clave, 0) + 1
+        self._ranking = None
+
+    def _orden_ventas(self, clave):
+        return (-self.ventas[clave], clave)
+
+    def ranking(self):
+        """Claves vendidas, de la más vendida a la menos vendida."""
+        if self._ranking is None:
+            self._ranking = sorted(self.ventas, key=self._orden_ventas)
+        return self._ranking
+
+    # ------------------ CONSULTAS ------------------
+
+    def tokens_con_prefijo(self, prefijo):
+        """Retorna los tokens del vocabulario que empiezan con prefijo, en orden."""
+        inicio = bisect_left(self._vocabulario, prefijo)
+        # "\uffff" ordena después de cualquier caracter que siga al prefijo
+        fin = bisect_left(self._vocabulario, prefijo + "\uffff", inicio)
+        return self._vocabulario[inicio:fin]
+
+    def _tiene_prefijo(self, clave, prefijo):
+        """Indica si algún token del producto empieza con prefijo."""
+        return " " + prefijo in self._textos.get(clave, "")
+
+    def sugerir(self, texto, limite=LIMITE):
+        """
+        Retorna hasta limite productos en los que cada token del texto es el
+        comienzo de alguno de sus tokens: primero los más vendidos en los
+        últimos DIAS_VENTAS días y después el resto, en orden alfabético.
+        """
+        tokens = tokenizar(texto)
+        if not tokens or len("".join(tokens)) < MIN_CARACTERES:
+            return []
+        rangos = [self.tokens_con_prefijo(token) for token in tokens]
+        if not all(rangos):
+            return []
+        if len(tokens) == 1:
+            elegidas = self._sugerir_prefijo(tokens[0], rangos[0], limite)
+        else:
+            elegidas = self._sugerir_varios(tokens, rangos, limite)
+        productos = (self.indice.obtener(clave) for clave in elegidas)
+        return [producto for producto in productos if producto is not None]
+
+    def _primeras_vendidas(self, condicion, limite):
+        """Las limite claves más vendidas que cumplen la condición."""
+        elegidas = []
+        for clave in self.ranking():
+            if condicion(clave):
+                elegidas.append(clave)
+                if len(elegidas) >= limite:
+                    break
+        return elegidas
+
+    def _vendidas_en(self, claves, limite):
+        """Las limite claves más vendidas del conjunto."""
+        if len(claves) * 50 > len(self.ventas):
+            # Con muchas claves, el ranking enseguida da con limite de ellas
+            return self._primeras_vendidas(claves.__contains__, limite)
+        return sorted((clave for clave in claves if clave in self.ventas), key=self._orden_ventas)[:limite]
+
+    def _sugerir_prefijo(self, prefijo, vocabulario, limite):
+        if len(vocabulario) > len(self.ventas):
+            # Un prefijo corto de código abarca miles de tokens: se prueba el
+            # prefijo en los vendidos en lugar de juntar todos sus productos
+            elegidas = self._primeras_vendidas(lambda clave: self._tiene_prefijo(clave, prefijo), limite)
+        else:
+            claves = set().union(*(self._productos_por_token[token] for token in vocabulario))
+            elegidas = self._vendidas_en(claves, limite)
+
+        # El resto, en el orden alfabético de la palabra que coincide
+        vistas = set(elegidas)
+        for token in vocabulario:
+            for clave in sorted(self._productos_por_token[token]):
+                if len(elegidas) >= limite:
+                    return elegidas
+                if clave not in vistas:
+                    elegidas.append(clave)
+                    vistas.add(clave)
+        return elegidas
+
+    def _sugerir_varios(self, tokens, rangos, limite):
+        # Se intersectan los productos de cada token empezando por el de menos
+        # palabras; un token que abarca más palabras que los productos que
+        # quedan (un prefijo de código) no se junta: se prueba en cada producto
+        # candidato recién al elegirlo, así se deja de probar al llegar a limite
+        por_largo = sorted(zip(tokens, rangos), key=lambda par: len(par[1]))
+        coincidencias, marcas = None, []
+        for token, vocabulario in por_largo:
+            if coincidencias is not None and len(vocabulario) > len(coincidencias):
+                marcas.append(" " + token)
+                continue
+            claves = set().union(*(self._productos_por_token[t] for t in vocabulario))
+            coincidencias = claves if coincidencias is None else coincidencias & claves
+
+        def coincide(clave):
+            if clave not in coincidencias:
+                return False
+            texto = self._textos[clave]
+            return all(marca in texto for marca in marcas)
+
+        if len(coincidencias) * 50 > len(self.ventas):
+            # Con muchos candidatos, el ranking enseguida da con limite de ellos
+            elegidas = self._primeras_vendidas(coincide, limite)
+        else:
+            elegidas = sorted((clave for clave in coincidencias if clave in self.ventas and coincide(clave)),
+                              key=self._orden_ventas)[:limite]
+
+        # El resto, en el orden alfabético de la palabra del token más específico
+        vistas = set(elegidas)
+        for token in por_largo[0][1]:
+            for clave in sorted(self._productos_por_token[token]):
+                if len(elegidas) >= limite:
+                    return elegidas
+                if clave not in vistas and coincide(clave):
+                    elegidas.append(clave)
+                    vistas.add(clave)
+        return elegidas
+
+
+_sugerencias = None
+
+
+def obtener_sugerencias():
+    """Retorna la instancia compartida de las sugerencias."""
+    global _sugerencias
+    if _sugerencias is None:
+        _sugerencias = Sugerencias()
+    return _sugerencias